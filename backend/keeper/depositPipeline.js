@@ -238,13 +238,20 @@ function buildDepositPipeline({
     console.log(`[bridge] node ${scripts.bridge} ${amount}`);
     await runNodeScript(scripts.bridge, [String(amount)], env);
   }
-  async function runHlDeposit({ amount, pk }) {
+  async function runHlDeposit({ amount, pk, open, jobId }) {
     const env = {
       ARB_RPC: process.env.ARBITRUM_ALCHEMY_MAINNET,
       USER: wallets.B,
     };
+    if (jobId) env.HL_JOB_ID = jobId; // cloids for the open derive from the vault deposit
     if (pk) env.PK = pk;
-    await runPythonScript(scripts.hlDeposit, [String(amount)], env);
+    const args = [String(amount)];
+    // open in the same process: sized/levered during the credit wait, sent on credit
+    if (open) {
+      args.push("--then-open");
+      for (const [k, v] of Object.entries(open)) args.push(`${k}=${String(v)}`);
+    }
+    await runPythonScript(scripts.hlDeposit, args, env);
   }
   async function runHlOrdersKV(subcmd, kv = {}, env = {}) {
     const kvArgs = Object.entries(kv).map(([k, v]) => `${k}=${String(v)}`);
@@ -311,14 +318,18 @@ function buildDepositPipeline({
     // 4) Hyperliquid: deposit B's USDC and open position
     const usdcB90 = await ninetyPercentHuman(wallets.B, usdc);
     if (parseFloat(usdcB90) > 0) {
-      await runHlDeposit({ amount: usdcB90, pk: privateKeys?.B });
-      await runHlOrdersKV("open", {
-        coin: "ETH",
-        side: "buy",
-        size: "0.003",
-        slippage: "0.005",
-        leverage: "10",
-        margin: "cross",
+      await runHlDeposit({
+        amount: usdcB90,
+        pk: privateKeys?.B,
+        jobId: `deposit:${txHash}`,
+        open: {
+          coin: "ETH",
+          side: "buy",
+          size: "0.003",
+          slippage: "0.005",
+          leverage: "10",
+          margin: "cross",
+        },
       });
     } else {
       console.log("[B] no USDC to deposit/open on HL");
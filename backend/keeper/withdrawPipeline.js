@@ -154,13 +154,13 @@ async function readPositions() {
     __dirname,
     "../../tools/drift/read_position_info.mjs"
   );
-  const driftOut = await runNode(driftScript, []);
+  // Drift and HL readers are independent: run both children concurrently
+  const [driftOut, hlRes] = await Promise.all([
+    runNode(driftScript, []),
+    runPython("summary"),
+  ]);
   const balanceUsd = parseBalanceUsd(driftOut);
 
-  const hlRes = await runPython("summary");
-  const hlStdout =
-    hlRes && typeof hlRes.stdout === "string" ? hlRes.stdout : "";
-
   const { totalUsd, cashUsd, posPNL, positionValue, marginUsed, effLev } =
     parseHlUsd(hlRes);
 
@@ -223,31 +223,25 @@ function splitHLWithdrawal({
 // Write status of withdrawal to JSON file
 const STATE_FILE = path.join(__dirname, "withdraw_state.json");
 
-// Step 1: Close a position on Hyperliquid, default 10%
-// Pass closePct explicitly, or override via --closePct / --closeSize in CLI
-// const closePctInput = 100;
-// async function step1_closeHL(closePct = closePctInput) {
-async function step1_closeHL(closePct) {
-  const coin = getArg("coin", "ETH");
-  const cliPct = getArg("closePct"); // optional CLI override
-  const size = getArg("closeSize"); // alternative: absolute size
+// Step 1: Free `usd` on Hyperliquid for the withdrawal with the deleverage planner
+// (pro-rata reduce-only across ALL open positions, hedge ratio kept; deleverage.py)
+// CLI overrides: --deleverageUsd, --targetRatio, --closeSlippage
+async function step1_closeHL(usd, opts = {}) {
+  const amount = getArg("deleverageUsd") ?? usd;
+  const ratio = getArg("targetRatio") ?? opts.targetRatio;
   const slip = getArg("closeSlippage", "0.01");
 
-  const pct = cliPct ?? closePct;
-
-  const args = [P.HL_CREATE_ORDERS, "close", `coin=${coin}`];
-  if (size) {
-    args.push(`close_size=${size}`);
-  } else if (pct != null) {
-    args.push(`pct=${pct}`);
-  }
+  const args = [P.HL_CREATE_ORDERS, "deleverage", `usd=${amount}`];
+  if (ratio != null) args.push(`target_ratio=${ratio}`);
   if (slip) args.push(`close_slippage=${slip}`);
+  // deterministic cloids: a restarted pipeline finds the reduces it already sent
+  const env = opts.jobId ? { HL_JOB_ID: String(opts.jobId) } : {};
 
   console.log(
-    "▶ Step 1: Hyperliquid partial/full close:",
+    "▶ Step 1: Hyperliquid deleverage:",
     ["python", ...args].join(" ")
   );
-  await run("python", args);
+  await run("python", args, { env });
 }
 
 // Function to request/Initiate withdraw from Drift (24 hour redemption period)
@@ -293,12 +287,14 @@ async function step4_withdrawHL(amountHL, opts = {}) {
   if (opts.config) args.push("--config", opts.config);
   if (opts.noWait) args.push("--no-wait");
   if (opts.testnet) args.push("--testnet");
+  // journal key: a restarted pipeline resumes this withdrawal instead of sending another
+  const env = opts.jobId ? { HL_JOB_ID: String(opts.jobId) } : {};
 
   console.log(
     "▶ Step 4: Withdraw from Hyperliquid:",
     ["python", ...args].join(" ")
   );
-  await run("python", args);
+  await run("python", args, { env });
 }
 
 // Function to bridge back from Solana to Arbitrum
@@ -408,7 +404,7 @@ async function step8_swapUSDCtoWBTC(amountSwap = undefined, opts = {}) {
   await run("node", args, { env, cwd: path.dirname(P.SWAP_USDC_WBTC) });
 }
 
-async function withdrawPerProtocol(usdcHuman) {
+async function withdrawPerProtocol(usdcHuman, opts = {}) {
   // Determining how much to withdraw from both protocols
   console.log("Determining how much to withdraw from both protocols");
 
@@ -479,31 +475,17 @@ async function withdrawPerProtocol(usdcHuman) {
     shortage
   );
 
-  // turn USD-notional into percentage of current position
-  function pctFromNotional(closePosUsd, positionValue) {
-    if (
-      !Number.isFinite(closePosUsd) ||
-      !Number.isFinite(positionValue) ||
-      positionValue <= 0
-    )
-      return 0;
-    const pct = (closePosUsd / positionValue) * 100;
-    // clamp and round a bit for CLI
-    return Math.max(0, Math.min(100, Number(pct.toFixed(4))));
-  }
-
-  const closePct = pctFromNotional(closePosUsd, positionValue);
-
   console.log(
-    `→ Close ${closePct}% of HL position (≈ $${closePosUsd.toFixed(
+    `→ Reduce ≈ $${closePosUsd.toFixed(
       2
-    )} notional), fromCash=${fromCash.toFixed(2)}, shortage=${shortage.toFixed(
+    )} HL notional, fromCash=${fromCash.toFixed(2)}, shortage=${shortage.toFixed(
       2
     )}`
   );
 
-  if (closePct > 0) {
-    //await step1_closeHL(closePct); // your existing function
+  if (closePosUsd > 0) {
+    // the planner sizes the reduce itself from the withdrawal and the live account
+    await step1_closeHL(neededUsdcHL, { jobId: opts.jobId, targetRatio: 0.2 });
   } else {
     console.log(
       "No HL close needed (cash covers withdraw and ratio within band)."
@@ -540,7 +522,8 @@ async function main() {
 
     // Determine how much to withdraw from both protocols
     const { neededUsdcDrift, neededUsdcHL } = await withdrawPerProtocol(
-      usdcHuman
+      usdcHuman,
+      { jobId: `withdraw:${reqId}` }
     );
 
     console.log("Withdraw needed from Drift: ", neededUsdcDrift);
@@ -550,7 +533,7 @@ async function main() {
     await step2_requestWithdrawDrift(neededUsdcDrift);
 
     // Withdraw from HL
-    await step4_withdrawHL(neededUsdcHL);
+    await step4_withdrawHL(neededUsdcHL, { jobId: `withdraw:${reqId}` });
 
     // Record it for later finalization (default 25h; change via --hours or env)
     await runRunner("init", {
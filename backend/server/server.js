@@ -192,6 +192,31 @@ function runScript(scriptKey, argv = [], envAdd = {}, ctx = {}) {
   });
 }
 
+// ----------------------------
+// HL summary service (optional)
+// ----------------------------
+// When HL_SUMMARY_URL points at tools/hyperliquid/summary_service.py, summary
+// reads are served from its coalesced cache instead of spawning create_orders.py.
+// Falls back to spawning if the service is unreachable.
+const HL_SUMMARY_URL = process.env.HL_SUMMARY_URL || "";
+
+async function fetchHlSummary(ctx = {}) {
+  if (!HL_SUMMARY_URL || typeof fetch !== "function") return null;
+  const t0 = Date.now();
+  try {
+    const r = await fetch(`${HL_SUMMARY_URL.replace(/\/$/, "")}/summary.txt`, {
+      signal: AbortSignal.timeout(15_000),
+    });
+    const output = (await r.text()).trim();
+    if (!r.ok) throw new Error(`HTTP ${r.status}: ${output.slice(0, 200)}`);
+    logger.info("summary_service.ok", { ...ctx, duration_ms: Date.now() - t0 });
+    return { ok: true, code: 0, output, error: null };
+  } catch (e) {
+    logger.warn("summary_service.fallback", { ...ctx, error: e.message });
+    return null;
+  }
+}
+
 // ----------------------------
 // HL argv builder
 // ----------------------------
@@ -451,7 +476,9 @@ app.post("/api/hl-command", async (req, res) => {
     }
 
     const argv = buildArgs(action, params);
-    const r = await runScript("hl-command", argv, {}, ctx);
+    const r =
+      (action === "summary" && (await fetchHlSummary(ctx))) ||
+      (await runScript("hl-command", argv, {}, ctx));
 
     if (!r.ok)
       logger.error("route.hl.failed", {
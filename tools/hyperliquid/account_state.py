@@ -0,0 +1,165 @@
+"""
+account_state.py — parsed Hyperliquid account snapshot.
+
+Decodes a `user_state` (clearinghouseState) payload and, optionally, the
+`open_orders` list ONCE into compact __slots__ records with coin-indexed
+lookup. After parsing, hot reads ("szi for coin X", "total unrealized PnL",
+"free cross margin") are a dict lookup or an attribute read: no dict walking,
+no float()/Decimal(str()) conversions, no allocations.
+
+The raw position dicts are kept on each record (`.raw`) so callers that print
+or forward HL's original JSON (create_orders.py summary) stay byte-compatible.
+"""
+
+from __future__ import annotations
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+
+def _f(x: Any) -> float:
+    try:
+        return float(x)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _d(x: Any) -> Decimal:
+    if x is None:
+        return Decimal(0)
+    try:
+        return Decimal(str(x))
+    except ArithmeticError:
+        return Decimal(0)
+
+
+class Position:
+    """One perp position (szi > 0 long, < 0 short)."""
+
+    __slots__ = ("coin", "szi", "entry_px", "position_value", "unrealized_pnl",
+                 "margin_used", "liquidation_px", "leverage_type", "leverage_value",
+                 "max_leverage", "raw")
+
+    def __init__(self, raw: Dict[str, Any]):
+        pos = raw.get("position") or {}
+        lev = pos.get("leverage") or {}
+        self.coin: str = pos.get("coin") or ""
+        self.szi: float = _f(pos.get("szi"))
+        self.entry_px: float = _f(pos.get("entryPx"))
+        self.position_value: float = _f(pos.get("positionValue"))
+        self.unrealized_pnl: float = _f(pos.get("unrealizedPnl"))
+        self.margin_used: float = _f(pos.get("marginUsed"))
+        liq = pos.get("liquidationPx")
+        self.liquidation_px: Optional[float] = _f(liq) if liq is not None else None
+        self.leverage_type: Optional[str] = lev.get("type") if isinstance(lev, dict) else None
+        self.leverage_value: float = _f(lev.get("value")) if isinstance(lev, dict) else 0.0
+        self.max_leverage: float = _f(pos.get("maxLeverage"))
+        self.raw = raw
+
+    @property
+    def is_long(self) -> bool:
+        return self.szi > 0
+
+    def __repr__(self) -> str:
+        return f"Position({self.coin} szi={self.szi} entry={self.entry_px} upnl={self.unrealized_pnl})"
+
+
+class Order:
+    """One resting order from `open_orders` (side "B" = bid/buy, "A" = ask/sell)."""
+
+    __slots__ = ("coin", "oid", "is_buy", "limit_px", "sz", "orig_sz", "timestamp", "cloid", "raw")
+
+    def __init__(self, raw: Dict[str, Any]):
+        self.coin: str = raw.get("coin") or ""
+        self.oid = raw.get("oid")
+        self.is_buy: bool = raw.get("side") == "B"
+        self.limit_px: float = _f(raw.get("limitPx"))
+        self.sz: float = _f(raw.get("sz"))
+        self.orig_sz: float = _f(raw.get("origSz", raw.get("sz")))
+        self.timestamp: int = int(_f(raw.get("timestamp")))
+        self.cloid: Optional[str] = raw.get("cloid")
+        self.raw = raw
+
+    def __repr__(self) -> str:
+        return f"Order({self.coin} {'buy' if self.is_buy else 'sell'} {self.sz}@{self.limit_px} oid={self.oid})"
+
+
+class AccountState:
+    """
+    One decoded snapshot. Build with AccountState.from_user_state(user_state, open_orders).
+    Positions with szi == 0 are dropped at parse time.
+    """
+
+    __slots__ = ("account_value", "total_margin_used", "total_ntl_pos", "withdrawable",
+                 "maintenance_margin", "free_cross_margin", "total_unrealized_pnl", "total_unrealized_pnl_dec",
+                 "account_value_dec", "time", "positions", "orders",
+                 "_pos_by_coin", "_orders_by_coin", "margin_summary")
+
+    def __init__(self):
+        self.account_value = self.total_margin_used = self.total_ntl_pos = 0.0
+        self.withdrawable = self.free_cross_margin = self.total_unrealized_pnl = 0.0
+        self.maintenance_margin = 0.0
+        self.account_value_dec = self.total_unrealized_pnl_dec = Decimal(0)
+        self.time = None
+        self.margin_summary: Dict[str, Any] = {}
+        self.positions: List[Position] = []
+        self.orders: List[Order] = []
+        self._pos_by_coin: Dict[str, Position] = {}
+        self._orders_by_coin: Dict[str, List[Order]] = {}
+
+    @classmethod
+    def from_user_state(cls, user_state: Dict[str, Any],
+                        open_orders: Optional[List[Dict[str, Any]]] = None) -> "AccountState":
+        st = cls()
+        ms = user_state.get("marginSummary") or {}
+        st.margin_summary = ms
+        st.account_value = _f(ms.get("accountValue"))
+        st.account_value_dec = _d(ms.get("accountValue"))
+        st.total_margin_used = _f(ms.get("totalMarginUsed"))
+        st.total_ntl_pos = _f(ms.get("totalNtlPos"))
+        st.withdrawable = _f(user_state.get("withdrawable"))
+        st.maintenance_margin = _f(user_state.get("crossMaintenanceMarginUsed"))
+        st.free_cross_margin = max(0.0, st.account_value - st.total_margin_used)
+        st.time = user_state.get("time")
+
+        upnl = 0.0
+        upnl_dec = Decimal(0)
+        for raw in user_state.get("assetPositions") or []:
+            p = Position(raw)
+            if p.szi == 0.0:
+                continue
+            st.positions.append(p)
+            if p.coin:
+                st._pos_by_coin[p.coin] = p
+            upnl += p.unrealized_pnl
+            upnl_dec += _d((raw.get("position") or {}).get("unrealizedPnl"))
+        st.total_unrealized_pnl = upnl
+        st.total_unrealized_pnl_dec = upnl_dec
+
+        for raw in open_orders or []:
+            o = Order(raw)
+            st.orders.append(o)
+            st._orders_by_coin.setdefault(o.coin, []).append(o)
+        return st
+
+    # ---- hot reads ----
+    def position(self, coin: str) -> Optional[Position]:
+        return self._pos_by_coin.get(coin)
+
+    def szi(self, coin: str) -> float:
+        p = self._pos_by_coin.get(coin)
+        return p.szi if p is not None else 0.0
+
+    def orders_for(self, coin: str) -> List[Order]:
+        return self._orders_by_coin.get(coin, [])
+
+    def coins(self) -> List[str]:
+        return list(self._pos_by_coin)
+
+    # ---- output helpers (original HL JSON shapes) ----
+    def open_positions_raw(self) -> List[Dict[str, Any]]:
+        return [p.raw for p in self.positions]
+
+    def leverage_by_coin(self) -> Dict[str, Any]:
+        """Map coin -> {'szi': float, 'leverage': {...}} for each open position."""
+        return {p.coin: {"szi": p.szi, "leverage": (p.raw.get("position") or {}).get("leverage")}
+                for p in self.positions if p.coin}
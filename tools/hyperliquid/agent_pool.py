@@ -0,0 +1,134 @@
+"""
+agent_pool.py — a pool of approved API agent wallets signing for one HL account.
+
+With a single key, every signed action on the host draws from one nonce
+sequence. A pool of agents (approved with Exchange.approve_agent) gives each
+signer its own sequence, so independent actions such as cancels, per-coin
+orders and leverage updates can be signed and sent truly in parallel.
+
+config.json:
+  {
+    "secret_key": "0x...",               # main wallet or agent (as before)
+    "account_address": "0x...",
+    "agents": [{"secret_key": "0x..."}, {"secret_key": "0x..."}]
+  }
+
+example_utils.setup() always returns a PooledExchange. Without "agents" it just
+binds the primary key's nonce sequence. With agents:
+  - each call goes to the next agent, round-robin
+  - the starting agent is taken from a host-wide counter (nonces.next_slot),
+    so concurrent processes start on different agents
+  - user-signed actions (withdrawals, transfers, agent approval) cannot be
+    signed by an agent and always use the primary key
+  - pool.parallel([...]) runs independent calls concurrently, one agent each
+"""
+
+from __future__ import annotations
+import copy
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Sequence, Tuple
+
+import nonces
+
+# Actions HL only accepts from the account's own key (EIP-712 user-signed)
+USER_SIGNED = {
+    "withdraw_from_bridge", "usd_transfer", "spot_transfer", "usd_class_transfer",
+    "approve_agent", "approve_builder_fee", "convert_to_multi_sig_user", "send_asset",
+    "token_delegate", "sub_account_transfer", "sub_account_spot_transfer", "vault_usd_transfer",
+    "multi_sig",    # the outer signer must be an authorized user of the multi-sig account
+}
+
+
+class _Bound:
+    """One Exchange whose calls draw nonces from its own signer sequence."""
+
+    def __init__(self, exchange, signer: str):
+        self.exchange = exchange
+        self.signer = signer
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self.exchange, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            with nonces.bind_signer(self.signer):
+                return attr(*args, **kwargs)
+        return call
+
+
+class PooledExchange:
+    """Exchange-compatible facade over a primary Exchange and N agent Exchanges."""
+
+    def __init__(self, primary, agents: Sequence, address: str):
+        self.primary = _Bound(primary, primary.wallet.address)
+        self.agents: List[_Bound] = [_Bound(ex, ex.wallet.address) for ex in agents] or [self.primary]
+        self.address = address
+        start = nonces.next_slot(f"agents:{address}", len(self.agents))
+        self._rr = itertools.cycle(self.agents[start:] + self.agents[:start])
+        self._lock = threading.Lock()
+        self._pool: ThreadPoolExecutor | None = None
+
+    def next(self) -> _Bound:
+        with self._lock:
+            return next(self._rr)
+
+    def __getattr__(self, name: str) -> Any:
+        if name in USER_SIGNED:
+            return getattr(self.primary, name)
+        attr = getattr(self.primary.exchange, name)
+        if not callable(attr):
+            return attr
+        return lambda *a, **k: getattr(self.next(), name)(*a, **k)
+
+    def parallel(self, calls: Sequence[Tuple[str, tuple, dict]]) -> List[Any]:
+        """
+        Run independent exchange calls concurrently, e.g.
+          pool.parallel([("cancel", ("ETH", 1), {}), ("cancel", ("SOL", 2), {})])
+        Results (or the raised exception) come back in input order.
+        """
+        def _run(item):
+            name, args, kwargs = item
+            try:
+                return getattr(self, name)(*args, **(kwargs or {}))
+            except Exception as e:
+                return e
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=len(self.agents), thread_name_prefix="hl-agent")
+        return list(self._pool.map(_run, calls))
+
+
+def parallel(exchange, calls: Sequence[Tuple[str, tuple, dict]]) -> List[Any]:
+    """pool.parallel() for a PooledExchange; plain sequential calls for a single Exchange."""
+    if isinstance(exchange, PooledExchange):
+        return exchange.parallel(calls)
+    out: List[Any] = []
+    for name, args, kwargs in calls:
+        try:
+            out.append(getattr(exchange, name)(*args, **(kwargs or {})))
+        except Exception as e:
+            out.append(e)
+    return out
+
+
+def _clone_for(primary, wallet):
+    """Agent Exchange sharing the primary's Info/meta (no extra meta fetch), with its own HTTP session."""
+    ex = copy.copy(primary)
+    ex.wallet = wallet
+    if hasattr(primary, "session"):
+        import requests
+        ex.session = requests.Session()
+        ex.session.headers.update(primary.session.headers)
+    return ex
+
+
+def build(account, address: str, base_url, agent_keys: Sequence[str], perp_dexs=None,
+          exchange_cls: Callable | None = None) -> PooledExchange:
+    import eth_account
+    if exchange_cls is None:
+        from hyperliquid.exchange import Exchange as exchange_cls
+    primary = exchange_cls(account, base_url, account_address=address, perp_dexs=perp_dexs)
+    agents = [_clone_for(primary, eth_account.Account.from_key(k)) for k in agent_keys]
+    return PooledExchange(primary, agents, address)
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+backtest.py — vectorized backtester for the long/short perp book (e.g. long BTC / short SOL).
+
+Replays HL candles + hourly funding for a coin pair and simulates the live
+book: cross margin, taker fees, slippage, funding cashflows, threshold
+rebalancing, and liquidation against intra-bar highs/lows.
+
+The time loop runs once; every step updates ALL parameter configurations at
+once as NumPy vectors. Large grids are split into chunks run on a process pool
+(one chunk per core), and the price data is shipped to each worker once.
+
+Examples:
+  python backtest.py long=BTC short=SOL interval=1h days=180
+  python backtest.py long=BTC short=SOL days=365 leverage=1:5:0.5 long_share=0.4:0.6:0.05 threshold=0.02,0.05,0.1,0.2
+  python backtest.py long=ETH short=SOL leverage=3 fee=0.00045 slip_bps=3 top=5
+  python backtest.py long=BTC short=SOL days=365 archive=1     # read/extend the market_data archive
+
+Grid keys take "a,b,c" lists or "start:stop:step" ranges (stop inclusive).
+"""
+
+from __future__ import annotations
+import profiling  # first: --profile also times the imports below
+import itertools
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+
+import codec
+import market_data
+from market_data import INTERVAL_MS
+
+
+# =========================
+# ======== DATA ===========
+# =========================
+
+def align_pair(candles_a: np.ndarray, candles_b: np.ndarray, fund_a: np.ndarray, fund_b: np.ndarray,
+               interval: str) -> Dict[str, np.ndarray]:
+    """Intersect bar timestamps; funding rates summed into the bar they settle in."""
+    t = np.intersect1d(candles_a[:, 0], candles_b[:, 0])
+    a = candles_a[np.searchsorted(candles_a[:, 0], t)]
+    b = candles_b[np.searchsorted(candles_b[:, 0], t)]
+    step = INTERVAL_MS[interval]
+
+    def _bar_funding(f: np.ndarray) -> np.ndarray:
+        out = np.zeros(len(t))
+        if len(f) == 0 or len(t) == 0:
+            return out
+        # each hourly funding print is charged in the bar that contains it
+        bar = np.searchsorted(t, f[:, 0], side="right") - 1
+        ok = (bar >= 0) & (f[:, 0] < t[np.clip(bar, 0, None)] + step)
+        np.add.at(out, bar[ok], f[ok, 1])
+        return out
+
+    return {
+        "t": t,
+        "a_close": a[:, 4], "a_high": a[:, 2], "a_low": a[:, 3],
+        "b_close": b[:, 4], "b_high": b[:, 2], "b_low": b[:, 3],
+        "a_fund": _bar_funding(fund_a), "b_fund": _bar_funding(fund_b),
+    }
+
+
+def load_pair(long_coin: str, short_coin: str, interval: str, start_ms: int, end_ms: int,
+              archive: bool = False) -> Dict[str, np.ndarray]:
+    """
+    Aligned arrays for the pair. archive=True tops up the local market_data
+    archive and slices it (memmap views) instead of re-pulling the whole window.
+    """
+    info = market_data._info()
+    if archive:
+        days = (end_ms - start_ms) / 86_400_000
+        market_data.update([long_coin, short_coin], [interval], days, info=info)
+        ca = market_data.candles(long_coin, interval, start_ms, end_ms)
+        cb = market_data.candles(short_coin, interval, start_ms, end_ms)
+        fa = market_data.funding(long_coin, start_ms, end_ms)
+        fb = market_data.funding(short_coin, start_ms, end_ms)
+        for coin, c in ((long_coin, ca), (short_coin, cb)):
+            if not len(c) or c[0, 0] - start_ms >= INTERVAL_MS[interval]:
+                first = int(c[0, 0]) if len(c) else None
+                print(f"[backtest] archive for {coin} {interval} starts at {first}, after the requested "
+                      f"{start_ms} (listed later?); the window is shorter", file=sys.stderr)
+    else:
+        ca = market_data.fetch_candles(info, long_coin, interval, start_ms, end_ms)
+        cb = market_data.fetch_candles(info, short_coin, interval, start_ms, end_ms)
+        fa = market_data.fetch_funding(info, long_coin, start_ms, end_ms)
+        fb = market_data.fetch_funding(info, short_coin, start_ms, end_ms)
+    return align_pair(ca, cb, fa, fb, interval)
+
+
+# =========================
+# ====== SIMULATION =======
+# =========================
+
+def simulate(data: Dict[str, np.ndarray], grid: Dict[str, np.ndarray], equity0: float = 1000.0,
+             bars_per_year: float = 8760.0) -> Dict[str, np.ndarray]:
+    """
+    Simulate K configurations at once. `grid` holds equal-length arrays:
+      leverage, long_share, threshold, fee, slip  (slip as a fraction, e.g. 3 bps = 0.0003)
+      maint   maintenance margin fraction of gross notional
+    Long leg = long_share * leverage * equity, short leg = the rest (opened like open_market at t0).
+    """
+    pa, pb = data["a_close"], data["b_close"]
+    T = len(pa)
+    lev = grid["leverage"]; share = grid["long_share"]; thr = grid["threshold"]
+    cost = grid["fee"] + grid["slip"]; maint = grid["maint"]
+    K = len(lev)
+
+    eq = np.full(K, float(equity0))
+    gross = lev * eq
+    qa = share * gross / pa[0]
+    qb = -(1.0 - share) * gross / pb[0]
+    fees = gross * cost
+    eq -= fees
+    funding = np.zeros(K)
+    n_reb = np.zeros(K, dtype=np.int64)
+    alive = np.ones(K, dtype=bool)
+    liq_bar = np.full(K, -1, dtype=np.int64)
+    peak = eq.copy()
+    max_dd = np.zeros(K)
+    rets_sum = np.zeros(K)
+    rets_sq = np.zeros(K)
+    prev_eq = eq.copy()
+
+    for i in range(1, T):
+        # worst intra-bar equity for the liquidation check (long marks at low, short at high)
+        worst = eq + qa * (data["a_low"][i] - pa[i - 1]) + qb * (data["b_high"][i] - pb[i - 1])
+        mm = maint * (np.abs(qa) * data["a_low"][i] + np.abs(qb) * data["b_high"][i])
+        liq = alive & (worst <= mm)
+        if liq.any():
+            eq = np.where(liq, np.maximum(worst - mm, 0.0), eq)   # maintenance margin is lost
+            qa = np.where(liq, 0.0, qa)
+            qb = np.where(liq, 0.0, qb)
+            liq_bar = np.where(liq, i, liq_bar)
+            alive &= ~liq
+
+        # mark to close
+        eq = eq + qa * (pa[i] - pa[i - 1]) + qb * (pb[i] - pb[i - 1])
+
+        # funding: positive rate => longs pay shorts, on notional
+        fcf = -(qa * pa[i] * data["a_fund"][i] + qb * pb[i] * data["b_fund"][i])
+        eq += fcf
+        funding += fcf
+
+        # threshold rebalance back to the target legs
+        tgt_a = share * lev * np.maximum(eq, 0.0)
+        tgt_b = (1.0 - share) * lev * np.maximum(eq, 0.0)
+        na, nb = qa * pa[i], -qb * pb[i]
+        drift = np.maximum(np.abs(na - tgt_a) / np.maximum(tgt_a, 1e-12),
+                           np.abs(nb - tgt_b) / np.maximum(tgt_b, 1e-12))
+        reb = alive & (drift > thr)
+        if reb.any():
+            traded = np.abs(tgt_a - na) + np.abs(tgt_b - nb)
+            c = np.where(reb, traded * cost, 0.0)
+            eq -= c
+            fees += c
+            qa = np.where(reb, tgt_a / pa[i], qa)
+            qb = np.where(reb, -tgt_b / pb[i], qb)
+            n_reb += reb
+
+        r = np.where(prev_eq > 0, eq / np.where(prev_eq > 0, prev_eq, 1.0) - 1.0, 0.0)
+        rets_sum += r
+        rets_sq += r * r
+        prev_eq = eq.copy()
+        peak = np.maximum(peak, eq)
+        max_dd = np.maximum(max_dd, np.where(peak > 0, 1.0 - eq / peak, 0.0))
+
+    n = max(T - 1, 1)
+    mean = rets_sum / n
+    std = np.sqrt(np.maximum(rets_sq / n - mean * mean, 0.0))
+    sharpe = np.where(std > 0, mean / np.where(std > 0, std, 1.0) * math.sqrt(bars_per_year), 0.0)
+    return {
+        "final_equity": eq, "total_return": eq / equity0 - 1.0, "max_drawdown": max_dd,
+        "ann_vol": std * math.sqrt(bars_per_year), "sharpe": sharpe,
+        "funding_pnl": funding, "fees_paid": fees, "rebalances": n_reb,
+        "liquidated": ~alive, "liquidation_bar": liq_bar,
+    }
+
+
+# =========================
+# ======== SWEEP ==========
+# =========================
+
+_WORKER_DATA: Dict[str, np.ndarray] = {}
+
+
+def _init_worker(data: Dict[str, np.ndarray]) -> None:
+    global _WORKER_DATA
+    _WORKER_DATA = data
+
+
+def _run_chunk(args) -> Dict[str, np.ndarray]:
+    grid, equity0, bpy = args
+    return simulate(_WORKER_DATA, grid, equity0, bpy)
+
+
+def build_grid(axes: Dict[str, List[float]]) -> Dict[str, np.ndarray]:
+    keys = list(axes)
+    combos = np.array(list(itertools.product(*(axes[k] for k in keys))), dtype=float).reshape(-1, len(keys))
+    return {k: combos[:, j] for j, k in enumerate(keys)}
+
+
+def sweep(data: Dict[str, np.ndarray], grid: Dict[str, np.ndarray], equity0: float = 1000.0,
+          bars_per_year: float = 8760.0, workers: Optional[int] = None) -> Dict[str, np.ndarray]:
+    K = len(next(iter(grid.values())))
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or K < 256:
+        return simulate(data, grid, equity0, bars_per_year)
+    bounds = np.linspace(0, K, min(workers, K) + 1).astype(int)
+    chunks = [({k: v[lo:hi] for k, v in grid.items()}, equity0, bars_per_year)
+              for lo, hi in zip(bounds[:-1], bounds[1:]) if hi > lo]
+    with ProcessPoolExecutor(max_workers=len(chunks), initializer=_init_worker, initargs=(data,)) as pool:
+        parts = list(pool.map(_run_chunk, chunks))
+    return {k: np.concatenate([p[k] for p in parts]) for k in parts[0]}
+
+
+# =========================
+# ==== ARG PARSING ========
+# =========================
+
+def _parse_axis(v: str) -> List[float]:
+    if ":" in v:
+        a, b, s = (float(x) for x in v.split(":"))
+        n = int(math.floor((b - a) / s + 1e-9)) + 1
+        return [round(a + i * s, 10) for i in range(n)]
+    return [float(x) for x in v.split(",") if x.strip()]
+
+
+def main():
+    kv = dict(a.split("=", 1) for a in sys.argv[1:] if "=" in a)
+    long_coin = kv.get("long", "BTC")
+    short_coin = kv.get("short", "SOL")
+    interval = kv.get("interval", "1h")
+    if interval not in INTERVAL_MS:
+        raise SystemExit(f"interval must be one of {list(INTERVAL_MS)}")
+    days = float(kv.get("days", 180))
+    end_ms = int(time.time() * 1000)
+    start_ms = end_ms - int(days * 86_400_000)
+    top = int(kv.get("top", 10))
+    equity0 = float(kv.get("equity", 1000))
+
+    axes = {
+        "leverage": _parse_axis(kv.get("leverage", "1,2,3,5")),
+        "long_share": _parse_axis(kv.get("long_share", "0.5")),
+        "threshold": _parse_axis(kv.get("threshold", "0.05,0.1,0.2")),
+        "fee": _parse_axis(kv.get("fee", "0.00045")),
+        "slip": [x / 1e4 for x in _parse_axis(kv.get("slip_bps", "2"))],
+        "maint": _parse_axis(kv.get("maint", "0.02")),
+    }
+    grid = build_grid(axes)
+
+    t0 = time.perf_counter()
+    data = load_pair(long_coin, short_coin, interval, start_ms, end_ms,
+                     archive=kv.get("archive", "0").lower() in ("1", "true", "yes"))
+    t_data = time.perf_counter() - t0
+    if len(data["t"]) < 2:
+        raise SystemExit("Not enough overlapping candles for this pair/interval.")
+
+    t1 = time.perf_counter()
+    bpy = 365.0 * 86_400_000 / INTERVAL_MS[interval]
+    res = sweep(data, grid, equity0, bpy, workers=int(kv["workers"]) if "workers" in kv else None)
+    t_sim = time.perf_counter() - t1
+
+    order = np.argsort(-np.where(res["liquidated"], -np.inf, res["sharpe"]))[:top]
+    rows = []
+    for j in order:
+        rows.append({**{k: float(grid[k][j]) for k in grid},
+                     **{k: (bool(v[j]) if v.dtype == bool else float(v[j])) for k, v in res.items()}})
+    print(codec.dumps({
+        "pair": {"long": long_coin, "short": short_coin, "interval": interval, "bars": int(len(data["t"]))},
+        "configs": int(len(grid["leverage"])),
+        "liquidatedConfigs": int(res["liquidated"].sum()),
+        "timing": {"dataS": round(t_data, 3), "simulateS": round(t_sim, 3)},
+        "top": rows,
+    }))
+
+
+if __name__ == "__main__":
+    profiling.run(main)
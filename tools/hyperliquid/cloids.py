@@ -0,0 +1,228 @@
+"""
+cloids.py — deterministic client order ids and hedged (retry-safe) order submission.
+
+Every order the tools send carries a cloid derived from the keeper job:
+
+  cloid = 0x + sha256("<job>|<part>|<part>...")[:16 bytes]
+
+The job comes from HL_JOB_ID (set by the keeper per pipeline run, e.g. the
+vault deposit tx hash) or `job=` on the command line. A retried job therefore
+re-derives the SAME cloids, so an order can be looked up by cloid before it is
+re-sent. Without a job id, a random per-process id is used (unique, not replayable).
+
+hedged_submit() signs each attempt with its own short expiresAfter (never the
+Exchange's shared expires_after). If there is no answer by then, HL can no
+longer execute that in-flight action, so the cloid lookup is authoritative: if
+the order exists, we report it; otherwise the same order (same cloid) is sent again.
+"""
+
+from __future__ import annotations
+import hashlib
+import os
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Optional, Tuple
+
+_JOB: Optional[str] = None
+
+CLOCK_SKEW_S = 0.25       # grace past expiresAfter before trusting a lookup
+
+
+def set_job(job: Optional[str]) -> None:
+    global _JOB
+    _JOB = job or None
+
+
+def job_id() -> str:
+    """Keeper job id (HL_JOB_ID / job=...), else a random id fixed for this process."""
+    global _JOB
+    if _JOB is None:
+        _JOB = os.getenv("HL_JOB_ID") or f"adhoc-{uuid.uuid4().hex}"
+    return _JOB
+
+
+def is_replayable() -> bool:
+    """True when the job id came from the caller, i.e. a retry may already have sent these orders."""
+    return not job_id().startswith("adhoc-")
+
+
+def cloid_str(*parts: Any, job: Optional[str] = None) -> str:
+    key = "|".join(str(p) for p in (job or job_id(), *parts))
+    return "0x" + hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+
+
+def make_cloid(*parts: Any, job: Optional[str] = None):
+    """SDK Cloid for (job, *parts)."""
+    from hyperliquid.utils.types import Cloid
+    return Cloid.from_str(cloid_str(*parts, job=job))
+
+
+def cloid_hex(cloid: Any) -> str:
+    return cloid.to_raw() if hasattr(cloid, "to_raw") else str(cloid)
+
+
+# Function to look an order up by its cloid
+def lookup(info, address: str, cloid: Any) -> Optional[Dict[str, Any]]:
+    """
+    orderStatus for the cloid, or None if HL has never seen it.
+    Returned dict: {"status": "filled"|"open"|"canceled"|..., "order": {...}}.
+    """
+    try:
+        res = info.query_order_by_cloid(address, cloid)
+    except Exception:
+        # older SDKs: raw /info request
+        res = info.post("/info", {"type": "orderStatus", "user": address, "oid": cloid_hex(cloid)})
+    if not isinstance(res, dict) or res.get("status") != "order":
+        return None
+    o = res.get("order") or {}
+    return {"status": o.get("status"), "statusTimestamp": o.get("statusTimestamp"), "order": o.get("order")}
+
+
+def _avg_fill_px(info, address: str, oid: Any, since_ms: int) -> Optional[float]:
+    """Size-weighted px of the order's fills (one userFillsByTime call), or None if they can't be read."""
+    try:
+        fills = [f for f in info.user_fills_by_time(address, int(since_ms) - 60_000) or [] if f.get("oid") == oid]
+        sz = sum(float(f["sz"]) for f in fills)
+        return sum(float(f["sz"]) * float(f["px"]) for f in fills) / sz if sz > 0 else None
+    except Exception:
+        return None
+
+
+def as_response(found: Dict[str, Any], info=None, address: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Shape a lookup result like an /exchange order response, so parse_fills()
+    and callers keep working. Only statuses are reconstructed. orderStatus has
+    no fill price, so a filled order's avgPx comes from the account's fills
+    (with info/address), else it is None. Never the limit price.
+    """
+    o = found.get("order") or {}
+    orig, left = float(o.get("origSz", 0) or 0), float(o.get("sz", 0) or 0)
+    filled = max(0.0, orig - left)
+    if filled > 0:
+        since = o.get("timestamp") or found.get("statusTimestamp") or 0
+        avg = _avg_fill_px(info, address, o.get("oid"), since) if info is not None and address else None
+        st = {"filled": {"totalSz": str(filled), "avgPx": str(avg) if avg is not None else None, "oid": o.get("oid")}}
+    elif found.get("status") == "open":
+        st = {"resting": {"oid": o.get("oid")}}
+    else:
+        st = {"error": f"order {found.get('status')}"}
+    return {"status": "ok", "response": {"type": "order", "data": {"statuses": [st]}}, "recoveredByCloid": True}
+
+
+def _start(send: Callable[[], Any]) -> Dict[str, Any]:
+    """Run send() on a daemon thread (an abandoned, hung request must not block exit)."""
+    box: Dict[str, Any] = {"done": threading.Event()}
+
+    def _run():
+        try:
+            box["result"] = send()
+        except Exception as e:
+            box["error"] = e
+        finally:
+            box["done"].set()
+
+    threading.Thread(target=_run, name="hedged-order", daemon=True).start()
+    return box
+
+
+def _signer(exchange) -> Optional[Tuple[Any, Optional[str]]]:
+    """(Exchange that signs this attempt, nonce signer), or None if `exchange` cannot sign L1 actions."""
+    import agent_pool
+    import nonces
+    if isinstance(exchange, agent_pool.PooledExchange):
+        b = exchange.next()
+        return b.exchange, b.signer
+    if all(hasattr(exchange, a) for a in ("wallet", "info", "base_url", "post")):
+        return exchange, nonces.current_signer()
+    return None
+
+
+def _signed_post(exchange, signer: Optional[str], order: Dict[str, Any], expires_after: int) -> Callable[[], Any]:
+    """
+    Sign `order` (an SDK OrderRequest) with its own expiresAfter and return the
+    call that posts it. Mirrors Exchange.bulk_orders/_post_action, except that
+    the expiry is passed in rather than read from exchange.expires_after, which
+    other threads share.
+    """
+    import hyperliquid.exchange as hl_exchange
+    from hyperliquid.utils.constants import MAINNET_API_URL
+    from hyperliquid.utils.signing import order_request_to_order_wire, order_wires_to_order_action, sign_l1_action
+    import nonces
+
+    wire = order_request_to_order_wire(order, exchange.info.name_to_asset(order["coin"]))
+    action = order_wires_to_order_action([wire], None, "na")
+    with nonces.bind_signer(signer):
+        nonce = hl_exchange.get_timestamp_ms()     # module attribute: honours nonces.install_sdk_hook()
+    signature = sign_l1_action(exchange.wallet, action, exchange.vault_address, nonce, expires_after,
+                               exchange.base_url == MAINNET_API_URL)
+    payload = {"action": action, "nonce": nonce, "signature": signature,
+               "vaultAddress": exchange.vault_address, "expiresAfter": expires_after}
+    return lambda: exchange.post("/exchange", payload)
+
+
+def hedged_submit(
+    order: Dict[str, Any],
+    exchange,
+    info,
+    address: str,
+    hedge_after_s: float = 2.0,
+    max_attempts: int = 3,
+    check_first: Optional[bool] = None,
+) -> Dict[str, Any]:
+    """
+    Send `order` (an SDK OrderRequest: coin, is_buy, sz, limit_px, order_type,
+    reduce_only, cloid) with a short deadline and re-send on timeout without
+    risking a second fill.
+
+    Each attempt is signed on this thread with its own expiresAfter before it
+    is posted, so the expiry of every in-flight attempt is known. The next
+    attempt only goes out after that expiry (+ CLOCK_SKEW_S) has passed and
+    the cloid lookup came back empty. An exchange that cannot sign here (e.g.
+    a test double) gets one plain exchange.order() call and no re-send.
+
+    Returns {"result", "attempts", "recovered", "latencyMs"}.
+    """
+    t0 = time.perf_counter()
+    cloid = order["cloid"]
+    check_first = is_replayable() if check_first is None else check_first
+    if check_first:
+        found = lookup(info, address, cloid)
+        if found is not None:
+            return {"result": as_response(found, info, address), "attempts": 0, "recovered": True,
+                    "latencyMs": round((time.perf_counter() - t0) * 1000, 1)}
+
+    last_error: Optional[str] = None
+    for attempt in range(1, max(1, int(max_attempts)) + 1):
+        signer = _signer(exchange)
+        if signer is None:
+            expires_at = None
+            box = _start(lambda: exchange.order(order["coin"], order["is_buy"], order["sz"], order["limit_px"],
+                                                order["order_type"], reduce_only=order["reduce_only"],
+                                                cloid=cloid))
+            box["done"].wait(timeout=hedge_after_s + CLOCK_SKEW_S)
+        else:
+            expires_after = int((time.time() + hedge_after_s) * 1000)
+            box = _start(_signed_post(*signer, order, expires_after))
+            expires_at = expires_after / 1000 + CLOCK_SKEW_S
+            box["done"].wait(timeout=max(0.0, expires_at - time.time()))
+        if not box["done"].is_set():
+            last_error = f"no response within {hedge_after_s}s"
+        elif "error" not in box:
+            return {"result": box["result"], "attempts": attempt, "recovered": False,
+                    "latencyMs": round((time.perf_counter() - t0) * 1000, 1)}
+        else:
+            e = box["error"]
+            last_error = f"{type(e).__name__}: {e}"
+        if expires_at is not None:
+            # e.g. a read timeout: the request may still be queued at HL until it expires
+            time.sleep(max(0.0, expires_at - time.time()))
+        # the in-flight action has expired (or failed), so the book state is final for this cloid
+        found = lookup(info, address, cloid)
+        if found is not None:
+            return {"result": as_response(found, info, address), "attempts": attempt, "recovered": True,
+                    "latencyMs": round((time.perf_counter() - t0) * 1000, 1)}
+        if expires_at is None:
+            break   # cannot prove the first send is dead: don't risk a double fill
+    return {"result": {"status": "err", "response": last_error}, "attempts": attempt, "recovered": False,
+            "latencyMs": round((time.perf_counter() - t0) * 1000, 1)}
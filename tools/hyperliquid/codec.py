@@ -0,0 +1,206 @@
+"""
+codec.py — one JSON layer for HL payloads, state files and tool output.
+
+The stdlib json module builds every object of a payload in pure Python. That
+was the bulk of the CPU in the poll loops: a clearinghouseState decoded every
+few seconds only to read `withdrawable`, a full account summary re-encoded with
+indent=2, and the keeper re-parsing all of it. Here:
+
+  - loads/dumps use orjson when installed, else msgspec, else the stdlib
+    (same output up to whitespace; non-ASCII is written as UTF-8 by all three)
+  - decode(data, Schema) decodes straight into a typed struct. With msgspec
+    only the schema's fields are materialized, the rest of the payload is
+    skipped. Without it the dict is decoded and converted, so callers see the
+    same attribute access on every backend
+  - output is compact by default. HL_JSON_PRETTY=1 (or pretty=1 on the
+    create_orders.py CLI) restores indented output for humans
+
+Decode errors are ValueError on every backend.
+"""
+
+from __future__ import annotations
+import functools
+import json
+import os
+from typing import Any, Dict, List, Optional, Type, TypeVar, Union, get_args, get_origin, get_type_hints
+
+try:
+    import orjson
+except ImportError:  # optional: pip install orjson
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # optional: pip install msgspec
+    msgspec = None
+
+BACKEND = "orjson" if orjson is not None else "msgspec" if msgspec is not None else "json"
+
+T = TypeVar("T")
+
+
+def pretty_default() -> bool:
+    return (os.getenv("HL_JSON_PRETTY") or "").strip().lower() in ("1", "true", "yes", "on")
+
+
+PRETTY = pretty_default()
+
+# =========================
+# ====== ENCODE/DECODE ====
+# =========================
+
+if msgspec is not None:
+    _msg_decoder = msgspec.json.Decoder()
+    _msg_encoder = msgspec.json.Encoder(enc_hook=str)
+    _typed_decoders: Dict[Any, Any] = {}
+
+
+def loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+    """Parse JSON (bytes or str) into plain dicts / lists."""
+    if orjson is not None:
+        return orjson.loads(data)
+    if msgspec is not None:
+        try:
+            return _msg_decoder.decode(data)
+        except msgspec.DecodeError as e:
+            raise ValueError(str(e)) from None
+    return json.loads(data)
+
+
+def dumpb(obj: Any, pretty: bool = False, sort_keys: bool = False) -> bytes:
+    """UTF-8 JSON bytes. Unknown types (Decimal, dataclass-less objects, ...) are written via str()."""
+    if orjson is not None:
+        opt = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if pretty:
+            opt |= orjson.OPT_INDENT_2
+        if sort_keys:
+            opt |= orjson.OPT_SORT_KEYS
+        try:
+            return orjson.dumps(obj, default=str, option=opt)
+        except TypeError:
+            pass                    # ints beyond 64 bits (wei amounts): stdlib handles them
+    elif msgspec is not None and not pretty and not sort_keys:
+        try:
+            return _msg_encoder.encode(obj)
+        except (TypeError, OverflowError, msgspec.EncodeError):
+            pass
+    if pretty:
+        return json.dumps(obj, indent=2, sort_keys=sort_keys, ensure_ascii=False, default=str).encode("utf-8")
+    return json.dumps(obj, separators=(",", ":"), sort_keys=sort_keys, ensure_ascii=False,
+                      default=str).encode("utf-8")
+
+
+def dumps(obj: Any, pretty: Optional[bool] = None, sort_keys: bool = False) -> str:
+    """JSON text; compact unless `pretty` (default: HL_JSON_PRETTY)."""
+    return dumpb(obj, PRETTY if pretty is None else pretty, sort_keys).decode("utf-8")
+
+
+def response(r, schema: Optional[Type[T]] = None) -> Any:
+    """Decode a `requests` response body (instead of r.json()), optionally into `schema`."""
+    return decode(r.content, schema) if schema is not None else loads(r.content)
+
+
+# =========================
+# ======== STRUCTS ========
+# =========================
+
+@functools.lru_cache(maxsize=None)
+def _hints(tp: type) -> Dict[str, Any]:
+    return get_type_hints(tp)
+
+
+if msgspec is not None:
+    class Struct(msgspec.Struct):
+        """Typed view of an HL payload; fields not declared here are skipped when decoding."""
+else:
+    class Struct:  # type: ignore[no-redef]
+        """Typed view of an HL payload; fields not declared here are dropped when converting."""
+
+        def __init__(self, **kw: Any):
+            for name in _hints(type(self)):
+                if name in kw:
+                    v = kw[name]
+                else:
+                    v = getattr(type(self), name, None)
+                    v = list(v) if isinstance(v, list) else v
+                setattr(self, name, v)
+
+        def __repr__(self) -> str:
+            body = ", ".join(f"{k}={getattr(self, k)!r}" for k in _hints(type(self)))
+            return f"{type(self).__name__}({body})"
+
+        def __eq__(self, other: Any) -> bool:
+            return type(other) is type(self) and all(
+                getattr(self, k) == getattr(other, k) for k in _hints(type(self)))
+
+
+def _convert(obj: Any, tp: Any) -> Any:
+    """Plain decoded JSON -> `tp` (stdlib fallback for msgspec's typed decode)."""
+    if obj is None:
+        return None
+    if isinstance(tp, type) and issubclass(tp, Struct):
+        if not isinstance(obj, dict):
+            raise ValueError(f"expected an object for {tp.__name__}, got {type(obj).__name__}")
+        hints = _hints(tp)
+        return tp(**{k: _convert(v, hints[k]) for k, v in obj.items() if k in hints})
+    origin, args = get_origin(tp), get_args(tp)
+    if origin is list:
+        return [_convert(x, args[0]) for x in obj] if args else list(obj)
+    if origin is dict:
+        return {k: _convert(v, args[1]) for k, v in obj.items()} if args else dict(obj)
+    if origin is Union:
+        inner = [a for a in args if a is not type(None)]
+        return _convert(obj, inner[0]) if len(inner) == 1 else obj
+    return obj
+
+
+def decode(data: Union[bytes, bytearray, memoryview, str], schema: Type[T]) -> T:
+    """Decode JSON straight into `schema` (a Struct, List[...] or Dict[str, ...])."""
+    if msgspec is not None:
+        dec = _typed_decoders.get(schema)
+        if dec is None:
+            dec = _typed_decoders[schema] = msgspec.json.Decoder(schema)
+        try:
+            return dec.decode(data)
+        except (msgspec.DecodeError, msgspec.ValidationError) as e:
+            raise ValueError(str(e)) from None
+    return _convert(loads(data), schema)
+
+
+# ---- the /info payloads the poll loops read ----
+
+class SpotBalance(Struct):
+    coin: str = ""
+    total: str = "0"
+    hold: str = "0"
+
+
+class SpotClearinghouseState(Struct):
+    balances: List[SpotBalance] = []
+
+
+class MarginSummary(Struct):
+    accountValue: str = "0"
+    totalNtlPos: str = "0"
+    totalMarginUsed: str = "0"
+
+
+class ClearinghouseState(Struct):
+    withdrawable: str = "0"
+    marginSummary: Optional[MarginSummary] = None
+
+
+class LedgerDelta(Struct):
+    type: str = ""
+    usdc: Optional[str] = None
+    nonce: Optional[int] = None
+
+
+class LedgerUpdate(Struct):
+    time: int = 0
+    hash: str = ""
+    delta: Optional[LedgerDelta] = None
+
+
+LedgerUpdates = List[LedgerUpdate]
+AllMids = Dict[str, str]
@@ -4,28 +4,45 @@ create_orders.py — Hyperliquid-only (minimal args)
 
 Examples:
   python create_orders.py summary
+  python create_orders.py summary fields=openPositions.szi,unrealizedPnl since=3f9c0a1b2c4d5e6f
   python create_orders.py open coin=ETH side=buy size=0.025 slippage=0.01 leverage=10 margin=cross
   python create_orders.py open coin=ETH side=sell size=0.05 leverage=5 margin=isolated
+  python create_orders.py open coin=ETH side=buy size=2 leverage=10 stress=resize stress_move=0.2
   python create_orders.py close coin=ETH
   python create_orders.py close coin=ETH pct=10
   python create_orders.py close coin=ETH close_size=0.003
   python create_orders.py close coin=ETH pct=10 close_slippage=0.005
   python create_orders.py cancel coin=ETH
+  python create_orders.py open coin=SOL side=sell size=400 algo=twap duration=300
+  python create_orders.py close coin=SOL pct=50 algo=pov participation=0.2 duration=120
+  python create_orders.py deleverage usd=250 target_ratio=0.2 dry_run=1
+  python create_orders.py open coin=ETH side=buy size=0.02 job=deposit-0xabc hedge=1 hedge_after=1.5
+  python create_orders.py lookup cloid=0x1234...
+  python create_orders.py screen top=10 min_oi=5000000 sort=score
+  python create_orders.py quote coin=BTC,ETH,SOL side=buy notional=25000 slippage=0.002
+  python create_orders.py report hours=24 fees=1
+  python create_orders.py report coin=ETH kind=open buckets=5000,50000
+  python create_orders.py summary --profile=sampling
 
 If no args are provided, it falls back to the USER CONFIG block.
 """
 
 from __future__ import annotations
-import json
+import profiling  # first: --profile also times the imports below
 import sys
 import math
-from typing import Any, Dict, List, Optional
+import time
+from typing import Any, Callable, Dict, List, Optional
 
 from hyperliquid.utils import constants
 from hyperliquid.info import Info
 from decimal import Decimal, getcontext
 getcontext().prec = 28
 import example_utils  # must be in the same folder
+import cloids
+import codec
+import summary_view
+from account_state import AccountState
 
 # Make stdout tolerant on Windows consoles
 try:
@@ -38,7 +55,7 @@ except Exception:
 # =========================
 # ===== USER CONFIG =======
 # =========================
-# Choose one ACTION: "summary", "open", "close", "cancel"
+# Choose one ACTION: "summary", "open", "close", "cancel", "deleverage", "lookup", "screen", "quote", "report"
 ACTION: str = "summary"
 
 # For ACTION == "open"
@@ -50,6 +67,9 @@ OPEN_PARAMS = {
     "leverage": None,       # e.g. 1, 5, 10; None = leave unchanged
     "margin_mode": "cross", # "cross" or "isolated"
     "strict": False,        # True => fail if leverage/size isn't feasible (cross)
+    "notional_usd": None,   # deposit_HL.py --then-open: size from USD notional / mid (when size is omitted)
+    "stress": None,         # stress.py pre-trade check: None, "check" (report), "reject" or "resize"
+    "stress_limits": {},    # overrides of stress.DEFAULT_LIMITS: max_liq_prob, min_liq_move
 }
 
 # For ACTION == "close" (supports partial close)
@@ -61,13 +81,74 @@ CLOSE_SLIPPAGE_FRAC: float = 0.01   # 1% default slippage for partial close
 # For ACTION == "cancel"
 CANCEL_COIN: str = "ETH"
 
+# For ACTION == "lookup" (order status by client order id)
+LOOKUP_CLOID: str | None = None
+
+# For ACTION == "summary": projection / delta output (see summary_view.py). Both None => full text summary
+SUMMARY_FIELDS: str | None = None   # e.g. "openPositions.szi,unrealizedPnl,marginSummary.accountValue"
+SUMMARY_SINCE: str | None = None    # snapshot id from a previous call => only what changed
+
+# For ACTION == "screen" (screener.py: rank perps as short-hedge candidates for the BTC long)
+SCREEN_PARAMS = {
+    "top": 10,
+    "sort": "score",        # score | fundingAnn | oiUsd | volUsd | basis | corrBtc
+    "min_oi_usd": 0.0,
+    "min_vol_usd": 0.0,
+    "max_abs_basis": 0.02,  # skip perps whose mark is >2% away from the oracle
+    "corr_fetch": 10,       # fetch 1h candles for this many candidates missing from the archive
+}
+
+# For ACTION == "quote" (order_book.quote: expected fill / impact from cached L2 books, nothing is sent)
+QUOTE_PARAMS = {
+    "coins": "ETH",         # one or many: "BTC,ETH,SOL"
+    "side": "buy",
+    "size": None,           # coin units; or
+    "notional_usd": None,   # USD, sized from each book's mid; neither => depth / max size only
+    "slippage_frac": 0.01,  # budget for maxSize / maxSizeAvg
+    "max_age_s": None,      # book cache TTL override (default HL_BOOK_TTL, 2s)
+}
+_BOOKS = None               # shared L2 cache (order_book.shared_cache), built on first quote
+
+# For ACTION == "report" (exec_log.report: latency / slippage / impact of the orders logged by this script)
+REPORT_PARAMS = {
+    "hours": None,          # look-back window; None => whole log
+    "coin": None,
+    "kind": None,           # open | close | close_partial | deleverage
+    "fees": False,          # first pull fees for logged oids from userFillsByTime
+    "buckets": "1000,10000,100000",  # notional bucket edges (USD)
+}
+
+# For ACTION == "deleverage" (pro-rata reduce across all positions to free USD for a withdrawal)
+DELEVERAGE_PARAMS = {
+    "usd": 0.0,             # USD to free (the HL withdraw amount)
+    "target_ratio": None,   # margin used / equity after withdraw; None = keep current ratio
+    "dry_run": False,       # True => plan only, send nothing
+}
+
+# Sliced execution for "open"/"close" (execution.py). algo=None => single IOC market order.
+EXEC_PARAMS = {
+    "algo": None,           # "twap" or "pov" (participation-rate)
+    "duration_s": 60.0,     # schedule length
+    "slices": None,         # TWAP child count; None = sized from L2 depth
+    "participation": 0.25,  # max share of in-band book depth per child
+}
+
+# Client order ids / hedged submit (cloids.py). Every order carries a cloid derived from
+# the keeper job (HL_JOB_ID or job=...), so a retried job can find what was already sent.
+ORDER_PARAMS = {
+    "hedge": False,         # re-send on a short timeout (same cloid, action expiry => no double fill)
+    "hedge_after_s": 2.0,   # per-attempt deadline
+    "max_attempts": 3,
+}
+
 
 # =========================
 # ====== CORE LOGIC =======
 # =========================
 
 def _pretty(obj: Any) -> str:
-    return json.dumps(obj, indent=2, sort_keys=False, ensure_ascii=False)
+    """CLI JSON: compact unless pretty=1 / HL_JSON_PRETTY=1 (codec.py)."""
+    return codec.dumps(obj)
 
 
 def _setup(skip_ws: bool = True):
@@ -77,36 +158,17 @@ def _setup(skip_ws: bool = True):
 # Function to extract open positions
 def _extract_open_positions(user_state: Dict[str, Any]) -> List[Dict[str, Any]]:
     """Return only non-zero perp positions from a user_state."""
-    positions = user_state.get("assetPositions", [])
-    open_positions = []
-    for p in positions:
-        pos = p.get("position", {})
-        try:
-            szi = float(pos.get("szi", 0.0))
-        except Exception:
-            szi = 0.0
-        if szi != 0.0:
-            open_positions.append(p)
-    return open_positions
+    return AccountState.from_user_state(user_state).open_positions_raw()
 
 # Function to get leverage by coin
 def _leverage_by_coin(open_positions: List[Dict[str, Any]]) -> Dict[str, Any]:
     """Map coin -> {'szi': float, 'leverage': {...}} for each open position."""
-    out: Dict[str, Any] = {}
-    for p in open_positions:
-        pos = p.get("position", {})
-        coin = pos.get("coin")
-        if not coin:
-            continue
-        try:
-            szi = float(pos.get("szi", 0.0))
-        except Exception:
-            szi = 0.0
-        out[coin] = {
-            "szi": szi,
-            "leverage": pos.get("leverage"),
-        }
-    return out
+    return AccountState.from_user_state({"assetPositions": open_positions}).leverage_by_coin()
+
+# Function to fetch and decode the account once
+def _account_state(info: "Info", address: str, with_orders: bool = False) -> AccountState:
+    oo = info.open_orders(address) if with_orders else None
+    return AccountState.from_user_state(info.user_state(address), oo)
 
 
 # Helper function to get price
@@ -119,14 +181,64 @@ def _mid_px(info: "Info", coin: str) -> float:
 
 # Helper function to determine free cross margin
 def _free_cross_margin(info: "Info", address: str) -> float:
-    us = info.user_state(address)
-    ms = us.get("marginSummary", {}) or {}
-    account_value = float(ms.get("accountValue", 0.0))
-    total_used   = float(ms.get("totalMarginUsed", 0.0))
-    return max(0.0, account_value - total_used)
+    return _account_state(info, address).free_cross_margin
+
+# Build one IOC order request (SDK OrderRequest) carrying `cloid`
+def _ioc(coin: str, is_buy: bool, size: float, limit_px: float, cloid, reduce_only: bool = False) -> Dict[str, Any]:
+    return {"coin": coin, "is_buy": is_buy, "sz": float(size), "limit_px": limit_px,
+            "order_type": {"limit": {"tif": "Ioc"}}, "reduce_only": reduce_only, "cloid": cloid}
+
+# Same request Exchange.market_open/market_close would send, priced up front
+def _market_ioc(exchange, coin: str, is_buy: bool, size: float, slippage_frac: float, cloid,
+                px: float | None = None, reduce_only: bool = False) -> Dict[str, Any]:
+    """px=None fetches the mid now, so a hedged send never waits on all_mids after its deadline is set."""
+    return _ioc(coin, is_buy, size, exchange._slippage_price(coin, is_buy, float(slippage_frac), px), cloid,
+                reduce_only)
+
+# Send one order request, idempotently and optionally hedged
+def _send_order(info: "Info", exchange, address: str, order: Dict[str, Any], lookup_first: bool = False) -> Any:
+    """
+    hedge=1: cloids.hedged_submit (short per-attempt expiry, lookup-by-cloid, re-send).
+    Otherwise a single send. When the job id is replayable (or `lookup_first`), the cloid
+    is looked up first, so a retried keeper job reports the earlier order instead of
+    sending a second one.
+    """
+    if ORDER_PARAMS.get("hedge"):
+        h = cloids.hedged_submit(order, exchange, info, address,
+                                 float(ORDER_PARAMS.get("hedge_after_s", 2.0)),
+                                 int(ORDER_PARAMS.get("max_attempts", 3)),
+                                 check_first=True if lookup_first else None)
+        res = h["result"]
+        if isinstance(res, dict):
+            res = {**res, "hedge": {k: h[k] for k in ("attempts", "recovered", "latencyMs")}}
+        return res
+    if lookup_first or cloids.is_replayable():
+        found = cloids.lookup(info, address, order["cloid"])
+        if found is not None:
+            return cloids.as_response(found, info, address)
+    return exchange.order(order["coin"], order["is_buy"], order["sz"], order["limit_px"], order["order_type"],
+                          reduce_only=order["reduce_only"], cloid=order["cloid"])
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+# Execution record for one order path (exec_log.py): arrival mid, decision/send/ack times, fills
+def _log_exec(kind: str, coin: str, is_buy: bool, size: float, mid: float | None, slippage_frac: float | None,
+              decided_ms: int, sent_ms: int, res: Any, cloid: str | None = None, reduce_only: bool = False,
+              sliced: bool = False, fills: Dict[str, Any] | None = None) -> None:
+    ack_ms = _now_ms()
+    try:  # the order is already out: logging must never turn its result into an exception
+        import exec_log
+        if sliced:
+            exec_log.record_sliced(kind, res, decided_ms, sent_ms, ack_ms, cloid)
+        else:
+            exec_log.record(kind, coin, is_buy, size, mid, slippage_frac, decided_ms, sent_ms, ack_ms, res,
+                            cloid=cloid, reduce_only=reduce_only, fills=fills)
+    except Exception as e:
+        print(f"[exec_log] record failed: {type(e).__name__}: {e}", file=sys.stderr)
 
 # Function to get summary of account
-def get_account_summary() -> Dict[str, Any]:
+def get_account_summary(address: str | None = None, info: "Info" | None = None) -> Dict[str, Any]:
     """
     Returns a dictionary with:
       - marginSummary subset
@@ -135,8 +247,10 @@ def get_account_summary() -> Dict[str, Any]:
       - open perp positions
       - leverageByCoin
       - mids sample
+    Long-running callers (summary_service.py) pass their own address/info to skip setup().
     """
-    address, info, _ = _setup(skip_ws=True)
+    if address is None or info is None:
+        address, info, _ = _setup(skip_ws=True)
     result: Dict[str, Any] = {"address": address}
 
     # margin summary
@@ -148,14 +262,17 @@ def get_account_summary() -> Dict[str, Any]:
     result["spotBalances"] = spot_user_state.get("balances", [])
 
     # open orders
-    result["openOrders"] = info.open_orders(address)
+    open_orders = info.open_orders(address)
+    result["openOrders"] = open_orders
+
+    # decode once; positions/leverage below are read from the parsed state
+    state = AccountState.from_user_state(user_state, open_orders)
 
     # open positions (non-zero szi)
-    open_positions = _extract_open_positions(user_state)
-    result["openPositions"] = open_positions
+    result["openPositions"] = state.open_positions_raw()
 
     # leverage per coin
-    result["leverageByCoin"] = _leverage_by_coin(open_positions)
+    result["leverageByCoin"] = state.leverage_by_coin()
 
     # mids snapshot (subset to keep output readable)
     try:
@@ -168,15 +285,54 @@ def get_account_summary() -> Dict[str, Any]:
 
     return result
 
+# Function to derive cash/position/total USD from a summary
+def summary_totals(summary: Dict[str, Any]) -> Dict[str, Decimal]:
+    # Parsed once: exact Decimal totals are accumulated while decoding
+    state = AccountState.from_user_state({
+        "marginSummary": summary.get("marginSummary", {}),
+        "assetPositions": summary.get("openPositions") or [],
+    })
+    accountvalue = state.account_value_dec      # total equity (USD)
+    pnl_usd = state.total_unrealized_pnl_dec    # unrealized PnL across all open positions
+
+    return {
+        "cash_usd": accountvalue - pnl_usd,   # USDC without positions (if you closed now)
+        "pos_usd": pnl_usd,                   # USDC from open positions (can be negative)
+        "total_usd": accountvalue,            # USDC including positions
+    }
+
+# Function to project a summary and diff it against a previous snapshot
+def summary_delta(summary: Dict[str, Any], fields: str | None = None, since: str | None = None) -> Dict[str, Any]:
+    """
+    Compact output for pollers: {"id", "view"} or {"id", "since", "unchanged", "delta"}.
+    Full views are kept in a small on-disk ring per address so the next call can
+    pass `since=<id>` (summary_view.DiskRing).
+    """
+    full = summary_view.normalize(summary)
+    ring = summary_view.DiskRing(str(summary.get("address") or "default"))
+    out = summary_view.render(full, fields, ring.get(since), since)
+    ring.put(out["id"], full)
+    return out
+
+
+# Function to render the summary exactly as the CLI prints it
+def format_summary(summary: Dict[str, Any]) -> str:
+    totals = summary_totals(summary)
+    lines = ["", "Account Summary", _pretty(summary)]
+    for k in ("cash_usd", "pos_usd", "total_usd"):
+        lines.append(f"{k}: {totals[k]}")
+    return "\n".join(lines)
+
 # Function to set the leverage
-def set_leverage(coin: str, leverage: int, margin_mode: str = "cross") -> Dict[str, Any]:
+def set_leverage(coin: str, leverage: int, margin_mode: str = "cross", exchange=None) -> Dict[str, Any]:
     """
     Call the SDK's update_leverage with the correct signature:
         update_leverage(leverage: int, name: str, is_cross: bool = True)
     (Some builds expose updateLeverage with the same positional order.)
     """
     is_cross = str(margin_mode).lower() == "cross"
-    _, _, exchange = _setup(skip_ws=True)
+    if exchange is None:
+        _, _, exchange = _setup(skip_ws=True)
     lev = int(leverage)
 
     attempts = []
@@ -218,6 +374,22 @@ def set_leverage(coin: str, leverage: int, margin_mode: str = "cross") -> Dict[s
     }
 
 
+# Run a parent order through the sliced execution engine
+def _execute_sliced(info, exchange, coin: str, is_buy: bool, size: float, slippage_frac: float,
+                    exec_params: Dict[str, Any], reduce_only: bool, cloid_parts: tuple = ()) -> Dict[str, Any]:
+    from execution import ExecutionEngine
+    engine = ExecutionEngine(info, exchange)
+    return engine.execute(
+        coin, is_buy, size,
+        algo=exec_params.get("algo") or "twap",
+        duration_s=float(exec_params.get("duration_s", 60.0)),
+        slices=exec_params.get("slices"),
+        participation=float(exec_params.get("participation", 0.25)),
+        slippage_frac=slippage_frac,
+        reduce_only=reduce_only,
+        cloid_parts=cloid_parts or ("exec", coin, "buy" if is_buy else "sell", size, reduce_only),
+    )
+
 # Open a new position
 def open_market(
     coin: str,
@@ -227,10 +399,18 @@ def open_market(
     leverage: int | None = None,
     margin_mode: str = "cross",
     strict: bool = False,   # if True, abort when leverage/size isn't feasible (cross)
+    exec_params: Dict[str, Any] | None = None,
+    stress_mode: str | None = None,
+    stress_limits: Dict[str, float] | None = None,
 ) -> Dict[str, Any]:
     """
     Market open a position.
 
+    stress_mode (stress.py, whole account incl. the new order over correlated shocks):
+      - "check":  attach the report only
+      - "reject": do not send if the resulting book fails the limits and doesn't reduce risk
+      - "resize": shrink the size to the largest one that passes or reduces risk (nothing sent if 0)
+
     Cross mode:
       - If leverage is provided, compute the minimum feasible leverage for the requested
         size given current free margin and auto-bump to it (or fail if strict=True).
@@ -238,11 +418,31 @@ def open_market(
     Isolated:
       - We set the leverage cap before opening; effective leverage may be tuned by
         isolated margin top-ups (not implemented here).
+    With exec_params["algo"] set, the size is worked as TWAP/POV child orders.
     """
+    decided = _now_ms()
     address, info, exchange = _setup(skip_ws=True)
 
     px   = _mid_px(info, coin)
-    free = _free_cross_margin(info, address)
+    state = _account_state(info, address)
+    free = state.free_cross_margin
+    is_buy = side.lower() in ("buy", "long")
+
+    stress_report = None
+    if stress_mode:
+        import order_book
+        import stress
+        stress_report = stress.check_order(info, state, coin, float(size) if is_buy else -float(size), px,
+                                           limits=stress_limits)
+        if not stress_report["ok"] and stress_mode == "reject":
+            return {"error": "STRESS_LIMITS_EXCEEDED", "coin": coin, "size": float(size), "price": px,
+                    "stress": stress_report}
+        if not stress_report["ok"] and stress_mode == "resize":
+            resized = order_book.round_sz(info, coin, stress_report["maxSafeSize"])
+            if resized <= 0:
+                return {"error": "STRESS_LIMITS_EXCEEDED", "coin": coin, "size": float(size), "price": px,
+                        "stress": stress_report}
+            size = resized
 
     lev_to_set = int(leverage) if leverage is not None else None
     min_feasible_lev = None
@@ -264,17 +464,24 @@ def open_market(
 
     lev_result = None
     if lev_to_set is not None:
-        lev_result = set_leverage(coin, lev_to_set, margin_mode)
-
-    is_buy = side.lower() in ("buy", "long")
-    res = exchange.market_open(coin, is_buy, float(size), None, float(slippage_frac))
+        lev_result = set_leverage(coin, lev_to_set, margin_mode, exchange=exchange)
+
+    cloid = cloids.make_cloid("open", coin, "buy" if is_buy else "sell", float(size))
+    sliced = bool(exec_params and exec_params.get("algo"))
+    sent = _now_ms()
+    if sliced:
+        res = _execute_sliced(info, exchange, coin, is_buy, float(size), float(slippage_frac),
+                              exec_params, reduce_only=False, cloid_parts=("open", coin, is_buy, float(size)))
+    else:
+        res = _send_order(info, exchange, address,
+                          _market_ioc(exchange, coin, is_buy, float(size), float(slippage_frac), cloid))
+    _log_exec("open", coin, is_buy, float(size), px, float(slippage_frac), decided, sent, res,
+              cloids.cloid_str("open", coin, "buy" if is_buy else "sell", float(size)), sliced=sliced)
 
     # Read back ground truth
-    us_after = info.user_state(address)
-    pos_after = next((p for p in us_after.get("assetPositions", [])
-                      if p.get("position", {}).get("coin") == coin), None)
-    szi_after = float(pos_after.get("position", {}).get("szi", 0.0)) if pos_after else 0.0
-    lev_after = pos_after.get("position", {}).get("leverage") if pos_after else None
+    pos_after = _account_state(info, address).position(coin)
+    szi_after = pos_after.szi if pos_after else 0.0
+    lev_after = pos_after.raw.get("position", {}).get("leverage") if pos_after else None
 
     return {
         "action": "open",
@@ -290,34 +497,170 @@ def open_market(
         "slippage_frac": slippage_frac,
         "leverageAttempt": lev_result,
         "postFill": {"szi": szi_after, "leverage": lev_after},
+        "cloid": cloids.cloid_str("open", coin, "buy" if is_buy else "sell", float(size)),
+        "stress": stress_report,
+        "result": res,
+    }
+
+# Fast path, phase 1: everything that can run before the margin is there
+def prepare_open(
+    coin: str,
+    side: str,
+    size: float | None,
+    slippage_frac: float = 0.01,
+    leverage: int | None = None,
+    margin_mode: str = "cross",
+    notional_usd: float | None = None,
+) -> Dict[str, Any]:
+    """
+    Setup, mid, lot-rounded size and the leverage cap, done ahead of time
+    (e.g. while a deposit is being credited). Pass the result to fire_open().
+    Size is `size` coin units, or `notional_usd` / mid when size is None.
+    """
+    import order_book
+    address, info, exchange = _setup(skip_ws=True)
+    px = _mid_px(info, coin)
+    if size is None:
+        if not notional_usd:
+            raise ValueError("prepare_open needs size or notional_usd")
+        size = order_book.round_sz(info, coin, float(notional_usd) / px)
+    ctx: Dict[str, Any] = {
+        "address": address, "info": info, "exchange": exchange,
+        "coin": coin, "is_buy": side.lower() in ("buy", "long"), "size": float(size),
+        "notional_usd": notional_usd, "slippage_frac": float(slippage_frac),
+        "leverage": int(leverage) if leverage is not None else None, "margin_mode": margin_mode,
+        "mid": px, "applied_leverage": None, "leverage_attempt": None,
+    }
+    if ctx["leverage"] is not None:
+        ctx["leverage_attempt"] = set_leverage(coin, ctx["leverage"], margin_mode, exchange=exchange)
+        ctx["applied_leverage"] = ctx["leverage"]
+    return ctx
+
+
+# Fast path, phase 2: send the prepared open
+def fire_open(ctx: Dict[str, Any], free_margin: float | None = None, mid: float | None = None,
+              exec_params: Dict[str, Any] | None = None, decision: Dict[str, Any] | None = None,
+              on_decided: Callable[[Dict[str, Any]], None] | None = None) -> Dict[str, Any]:
+    """
+    Send the open prepared by prepare_open(). `mid` and `free_margin` can come
+    from data the caller just polled, so normally only the order request is left.
+    Cross leverage is bumped only if the prepared cap is no longer feasible.
+
+    on_decided({"size", "cloid", "price", "sliced"}) runs before anything is sent
+    (deposit_HL journals it). Passing that dict back as `decision` after a restart
+    pins size and cloid: a notional= open is not re-sized from a new mid, and the
+    order is looked up by that cloid and only sent if HL has never seen it.
+    """
+    import order_book
+    decided = _now_ms()
+    info, exchange, coin = ctx["info"], ctx["exchange"], ctx["coin"]
+    px = float(mid) if mid else ctx["mid"]
+    size, is_buy = ctx["size"], ctx["is_buy"]
+    if decision:
+        size = float(decision["size"])
+    elif ctx.get("notional_usd") and mid:
+        size = order_book.round_sz(info, coin, float(ctx["notional_usd"]) / px)
+
+    min_feasible_lev = None
+    bump = None
+    if ctx["leverage"] is not None and str(ctx["margin_mode"]).lower() == "cross":
+        free = float(free_margin) if free_margin is not None else _free_cross_margin(info, ctx["address"])
+        min_feasible_lev = int(math.ceil(size * px / max(free, 1e-9))) if free > 0 else 10**9
+        if min_feasible_lev > (ctx["applied_leverage"] or 0):
+            bump = set_leverage(coin, min_feasible_lev, ctx["margin_mode"], exchange=exchange)
+            ctx["applied_leverage"] = min_feasible_lev
+
+    parts = ("open", coin, "buy" if is_buy else "sell", float(size))
+    cloid_s = decision["cloid"] if decision else cloids.cloid_str(*parts)
+    sliced = bool(decision["sliced"]) if decision else bool(exec_params and exec_params.get("algo"))
+    if on_decided is not None and not decision:
+        on_decided({"size": size, "cloid": cloid_s, "price": px, "sliced": sliced})
+    if sliced and decision:
+        # child cloids are not looked up by the engine: re-running the schedule could fill twice
+        sent = _now_ms()
+        res = {"status": "err", "response": "sliced open already started before the restart; not re-sent "
+                                            "(check the position)"}
+    elif sliced:
+        sent = _now_ms()
+        res = _execute_sliced(info, exchange, coin, is_buy, size, ctx["slippage_frac"],
+                              exec_params, reduce_only=False, cloid_parts=("open", coin, is_buy, float(size)))
+    else:
+        from hyperliquid.utils.types import Cloid
+        cloid = Cloid.from_str(cloid_s)
+        limit_px = order_book.limit_px_for(info, coin, is_buy, px, ctx["slippage_frac"])
+        sent = _now_ms()
+        res = _send_order(info, exchange, ctx["address"], _ioc(coin, is_buy, size, limit_px, cloid),
+                          lookup_first=bool(decision))
+    if not (sliced and decision):
+        _log_exec("open", coin, is_buy, size, px, ctx["slippage_frac"], decided, sent, res, cloid_s, sliced=sliced)
+
+    pos_after = _account_state(info, ctx["address"]).position(coin)
+    return {
+        "action": "open",
+        "coin": coin,
+        "side": "buy" if is_buy else "sell",
+        "size": size,
+        "price": px,
+        "preparedPrice": ctx["mid"],
+        "freeCrossMargin": free_margin,
+        "requestedLeverage": ctx["leverage"],
+        "minFeasibleLeverage": min_feasible_lev,
+        "appliedLeverage": ctx["applied_leverage"],
+        "margin_mode": ctx["margin_mode"],
+        "slippage_frac": ctx["slippage_frac"],
+        "leverageAttempt": ctx["leverage_attempt"],
+        "leverageBump": bump,
+        "postFill": {
+            "szi": pos_after.szi if pos_after else 0.0,
+            "leverage": pos_after.raw.get("position", {}).get("leverage") if pos_after else None,
+        },
+        "cloid": cloid_s,
+        "resumed": bool(decision),
         "result": res,
     }
 
 # Close a position
 def close_market(coin: str) -> Dict[str, Any]:
     """Reduce-only market close for the coin's current position."""
-    _, _, exchange = _setup(skip_ws=True)
-    res = exchange.market_close(coin)
-    return {"action": "close", "coin": coin, "result": res}
+    decided = _now_ms()
+    address, info, exchange = _setup(skip_ws=True)
+    cloid = cloids.make_cloid("close", coin, "full")
+    szi = _get_pos_szi(info, address, coin)
+    mid = _mid_px(info, coin) if szi else None
+    sent = _now_ms()
+    # priced from the mid just read (arrival), like market_close(px=mid); no position -> nothing sent
+    res = _send_order(info, exchange, address,
+                      _market_ioc(exchange, coin, szi < 0, abs(szi), exchange.DEFAULT_SLIPPAGE, cloid, px=mid,
+                                  reduce_only=True)) if szi else None
+    if szi:
+        _log_exec("close", coin, szi < 0, abs(szi), mid, exchange.DEFAULT_SLIPPAGE, decided, sent, res,
+                  cloids.cloid_str("close", coin, "full"), reduce_only=True)
+    return {"action": "close", "coin": coin, "cloid": cloids.cloid_str("close", coin, "full"), "result": res}
 
 def _get_pos_szi(info: "Info", address: str, coin: str) -> float:
-    us = info.user_state(address)
-    for ap in us.get("assetPositions", []):
-        pos = ap.get("position", {})
-        if pos.get("coin") == coin:
-            try:
-                return float(pos.get("szi", 0.0))
-            except Exception:
-                return 0.0
-    return 0.0
+    return _account_state(info, address).szi(coin)
 
-def _market_open_reduce_only(exchange, coin: str, is_buy: bool, size: float, slippage_frac: float):
+def _market_open_reduce_only(exchange, coin: str, is_buy: bool, size: float, slippage_frac: float,
+                             info: "Info" | None = None, address: str | None = None, cloid=None,
+                             mid: float | None = None):
     """
     Try common SDK variants for reduce-only market order.
+    With info/address/cloid, first sends an explicit reduce-only IOC carrying the cloid.
     Falls back to plain market_open if reduce-only flag isn't supported.
     """
     attempts = []
 
+    if info is not None and address and cloid is not None:
+        import order_book
+        try:
+            limit_px = order_book.limit_px_for(info, coin, is_buy, mid or _mid_px(info, coin), float(slippage_frac))
+            res = _send_order(info, exchange, address, _ioc(coin, is_buy, size, limit_px, cloid, reduce_only=True))
+            return {"ok": True, "fn": "order", "args": [coin, is_buy, float(size), limit_px, "Ioc", True],
+                    "cloid": cloids.cloid_hex(cloid),
+                    "response": res}
+        except Exception as e:
+            attempts.append({"ok": False, "fn": "order", "errorType": type(e).__name__, "errorRepr": repr(e)})
+
     def _try(name, *args):
         try:
             fn = getattr(exchange, name)
@@ -341,16 +684,22 @@ def _market_open_reduce_only(exchange, coin: str, is_buy: bool, size: float, sli
                 return r
     return {"ok": False, "attempts": attempts, "error": "no_matching_market_open_variant"}
 
-def close_market_partial(coin: str, pct: float | None, size: float | None, slippage_frac: float = 0.01) -> Dict[str, Any]:
+def close_market_partial(coin: str, pct: float | None, size: float | None, slippage_frac: float = 0.01,
+                         exec_params: Dict[str, Any] | None = None) -> Dict[str, Any]:
     """
     Partially close a position:
       - If `size` is provided (coin units), that takes precedence.
       - Else if `pct` (0..100) is provided, closes that percentage.
       - Else falls back to full close.
     Always clamps to not overshoot current abs(szi).
+    With exec_params["algo"] set, the reduce is worked as reduce-only TWAP/POV child orders.
     """
+    sliced = bool(exec_params and exec_params.get("algo"))
+    decided = _now_ms()
     address, info, exchange = _setup(skip_ws=True)
     szi = _get_pos_szi(info, address, coin)
+    # cloid from the REQUEST (not the live size), so a retried job maps to the same order
+    req = ("close", coin, f"size={size}" if size is not None else (f"pct={pct}" if pct is not None else "full"))
 
     if szi == 0.0:
         return {"action": "close", "coin": coin, "status": "no_position"}
@@ -364,10 +713,20 @@ def close_market_partial(coin: str, pct: float | None, size: float | None, slipp
         if pct <= 0:
             return {"action": "close", "coin": coin, "status": "pct<=0_noop"}
         target = abs_szi * float(pct) / 100.0
+    elif sliced:
+        target = abs_szi
     else:
         # full close if neither given
-        res = exchange.market_close(coin)
-        return {"action": "close_full", "coin": coin, "requested": "full", "result": res}
+        cloid = cloids.make_cloid(*req)
+        mid = _mid_px(info, coin)
+        sent = _now_ms()
+        res = _send_order(info, exchange, address,
+                          _market_ioc(exchange, coin, szi < 0, abs_szi, exchange.DEFAULT_SLIPPAGE, cloid, px=mid,
+                                      reduce_only=True))
+        _log_exec("close", coin, szi < 0, abs_szi, mid, exchange.DEFAULT_SLIPPAGE, decided, sent, res,
+                  cloids.cloid_str(*req), reduce_only=True)
+        return {"action": "close_full", "coin": coin, "requested": "full", "cloid": cloids.cloid_str(*req),
+                "result": res}
 
     # Clamp to current position so we never flip
     target = max(0.0, min(target, abs_szi))
@@ -376,10 +735,21 @@ def close_market_partial(coin: str, pct: float | None, size: float | None, slipp
 
     # Opposite side of current position
     is_buy = (szi < 0)  # if short, buy to reduce; if long, sell to reduce
-    attempt = _market_open_reduce_only(exchange, coin, is_buy, target, slippage_frac)
+    if sliced:
+        sent = _now_ms()
+        attempt = _execute_sliced(info, exchange, coin, is_buy, target, float(slippage_frac),
+                                  exec_params, reduce_only=True, cloid_parts=req)
+        _log_exec("close_partial", coin, is_buy, target, None, None, decided, sent, attempt,
+                  cloids.cloid_str(*req), reduce_only=True, sliced=True)
+    else:
+        mid = _mid_px(info, coin)
+        sent = _now_ms()
+        attempt = _market_open_reduce_only(exchange, coin, is_buy, target, slippage_frac,
+                                           info=info, address=address, cloid=cloids.make_cloid(*req), mid=mid)
+        _log_exec("close_partial", coin, is_buy, target, mid, float(slippage_frac), decided, sent,
+                  attempt.get("response"), cloids.cloid_str(*req), reduce_only=True)
 
     # Read back position
-    us_after = info.user_state(address)
     new_szi = _get_pos_szi(info, address, coin)
 
     return {
@@ -396,20 +766,104 @@ def close_market_partial(coin: str, pct: float | None, size: float | None, slipp
     }
 
 
+# Free margin for a withdrawal
+def deleverage_for_withdraw(usd: float, target_ratio: float | None = None,
+                            slippage_frac: float = 0.01, dry_run: bool = False) -> Dict[str, Any]:
+    """
+    Plan the minimal pro-rata reduce across ALL open positions (deleverage.py)
+    that frees `usd` while keeping the hedge ratio and target margin ratio,
+    then send it as one reduce-only batch (unless dry_run).
+    """
+    from deleverage import plan_deleverage, execute_plan
+    decided = _now_ms()
+    address, info, exchange = _setup(skip_ws=True)
+    state = _account_state(info, address)
+    plan = plan_deleverage(state, info.all_mids(), usd, target_ratio, info=info)
+    out: Dict[str, Any] = {"action": "deleverage", "dryRun": dry_run, "plan": plan}
+    if dry_run or plan.get("error") or not plan.get("reduces"):
+        return out
+    sent = _now_ms()
+    out["execution"] = execute_plan(info, exchange, plan, slippage_frac, address=address)
+    legs = {rd["coin"]: rd for rd in plan["reduces"]}
+    for leg in out["execution"].get("fills") or []:
+        rd = legs[leg["coin"]]
+        _log_exec("deleverage", leg["coin"], rd["side"] == "buy", leg["requested"], rd["mid"], slippage_frac,
+                  decided, sent, None, leg.get("cloid"), reduce_only=True,
+                  fills={"filledSz": leg.get("sz") or 0.0, "avgPx": leg.get("px") if leg.get("sz") else None,
+                         "oids": [leg["oid"]] if leg.get("oid") is not None else [],
+                         "error": str(leg["error"])[:300] if leg.get("error") else None})
+    after = _account_state(info, address)
+    out["postFill"] = {
+        "szi": {rd["coin"]: after.szi(rd["coin"]) for rd in plan["reduces"]},
+        "freeCrossMargin": after.free_cross_margin,
+        "withdrawable": after.withdrawable,
+    }
+    return out
+
+
+# Order status by client order id
+def lookup_order(cloid: str | None) -> Dict[str, Any]:
+    if not cloid:
+        return {"action": "lookup", "error": "cloid=0x... required"}
+    from hyperliquid.utils.types import Cloid
+    address, info, _ = _setup(skip_ws=True)
+    found = cloids.lookup(info, address, Cloid.from_str(cloid))
+    return {"action": "lookup", "cloid": cloid, "found": found is not None, "order": found}
+
+
+# Function to estimate fills before trading
+def quote_market(coins, side: str = "buy", size: float | None = None, notional_usd: float | None = None,
+                 slippage_frac: float = 0.01, max_age_s: float | None = None, info=None) -> Dict[str, Any]:
+    """
+    Expected average fill, impact (bps vs mid) and the max size inside `slippage_frac` for a
+    taker order on each coin. Books come from a host-wide short-TTL cache and are fetched
+    concurrently for the coins that miss it. No order is placed.
+    """
+    import order_book
+    global _BOOKS
+    if isinstance(coins, str):
+        coins = [c.strip() for c in coins.split(",") if c.strip()]
+    is_buy = side.lower() in ("buy", "long")
+    if info is None:
+        import market_data
+        info = market_data._info()
+    if _BOOKS is None or _BOOKS.info is not info:
+        _BOOKS = order_book.shared_cache(info)
+
+    t0 = time.perf_counter()
+    books = _BOOKS.get_many(coins, max_age_s)
+    quotes: Dict[str, Any] = {}
+    for coin in coins:
+        book = books[coin]
+        sz = size
+        if sz is None and notional_usd and book.mid:
+            sz = float(notional_usd) / book.mid
+        q = order_book.quote(book, is_buy, sz, float(slippage_frac))
+        q["maxSize"] = order_book.round_sz(info, coin, q["maxSize"])
+        q["maxSizeAvg"] = order_book.round_sz(info, coin, q["maxSizeAvg"])
+        q["maxNotionalUsd"] = q["maxSize"] * book.mid if book.mid else 0.0
+        quotes[coin] = q
+    return {"action": "quote", "side": "buy" if is_buy else "sell", "slippageFrac": float(slippage_frac),
+            "latencyMs": round((time.perf_counter() - t0) * 1000, 2), "quotes": quotes}
+
+
 # Cancel orders
 def cancel_resting_orders(coin: str) -> Dict[str, Any]:
-    """Cancel all resting orders for a specific coin for the configured address."""
+    """
+    Cancel all resting orders for a specific coin for the configured address.
+    With agent wallets configured, the cancels are signed and sent in parallel (agent_pool.py).
+    """
+    import agent_pool
     address, info, exchange = _setup(skip_ws=True)
-    oo = info.open_orders(address)
-    targets: List[Dict[str, Any]] = [o for o in oo if o.get("coin") == coin]
+    state = AccountState.from_user_state({}, info.open_orders(address))
+    targets = state.orders_for(coin)
     out: List[Dict[str, Any]] = []
-    for o in targets:
-        oid = o.get("oid")
-        try:
-            cres = exchange.cancel(coin, oid)
-            out.append({"oid": oid, "status": "cancelled", "result": cres})
-        except Exception as e:
-            out.append({"oid": oid, "status": "error", "error": str(e)})
+    results = agent_pool.parallel(exchange, [("cancel", (coin, o.oid), {}) for o in targets])
+    for o, cres in zip(targets, results):
+        if isinstance(cres, Exception):
+            out.append({"oid": o.oid, "status": "error", "error": str(cres)})
+        else:
+            out.append({"oid": o.oid, "status": "cancelled", "result": cres})
     return {"action": "cancel", "coin": coin, "cancelResults": out, "found": len(targets)}
 
 
@@ -421,10 +875,20 @@ def _apply_kv_overrides(pairs: list[str]) -> None:
     """
     Apply simple key=value overrides from the command line to the config vars.
     Supported keys:
-      - For open: coin, side, size, slippage/slippage_frac, leverage, margin/margin_mode, strict
+      - For open: coin, side, size, slippage/slippage_frac, leverage, margin/margin_mode, strict, notional,
+        stress (check|reject|resize), stress_prob, stress_move
       - For close/cancel: coin, pct/close_pct, close_size, close_slippage(_frac)
+      - Sliced execution (open/close): algo, duration, slices, participation
+      - For deleverage: usd, target_ratio, dry_run, close_slippage(_frac)
+      - Client order ids (all orders): job, hedge, hedge_after, max_attempts; lookup: cloid
+      - For summary: fields, since
+      - For screen: top, sort, min_oi, min_vol, max_basis, corr_fetch
+      - For quote: coin/coins (comma-separated), side, size | notional, slippage, max_age
+      - For report: hours, coin, kind, fees, buckets
+      - Output: pretty (indented JSON; default compact)
     """
-    global OPEN_PARAMS, CLOSE_COIN, CANCEL_COIN, CLOSE_PCT, CLOSE_SIZE, CLOSE_SLIPPAGE_FRAC
+    global OPEN_PARAMS, CLOSE_COIN, CANCEL_COIN, CLOSE_PCT, CLOSE_SIZE, CLOSE_SLIPPAGE_FRAC, LOOKUP_CLOID
+    global SUMMARY_FIELDS, SUMMARY_SINCE
 
     for raw in pairs:
         if "=" not in raw:
@@ -435,19 +899,61 @@ def _apply_kv_overrides(pairs: list[str]) -> None:
 
         if k in ("coin", "side"):
             OPEN_PARAMS[k] = v
+            QUOTE_PARAMS["coins" if k == "coin" else "side"] = v
             if k == "coin":
                 CLOSE_COIN = v
                 CANCEL_COIN = v
+                REPORT_PARAMS["coin"] = v
+
+        elif k in ("coins",):
+            QUOTE_PARAMS["coins"] = v
 
         elif k in ("size",):
             try:
                 OPEN_PARAMS["size"] = float(v)
+                QUOTE_PARAMS["size"] = float(v)
             except ValueError:
                 pass
 
+        elif k in ("stress",):
+            OPEN_PARAMS["stress"] = v.lower() if v.lower() in ("check", "reject", "resize") else None
+
+        elif k in ("stress_prob", "stress_move"):
+            try:
+                key = "max_liq_prob" if k == "stress_prob" else "min_liq_move"
+                OPEN_PARAMS["stress_limits"] = {**OPEN_PARAMS.get("stress_limits", {}), key: float(v)}
+            except ValueError:
+                pass
+
+        elif k in ("notional", "notional_usd"):
+            try:
+                OPEN_PARAMS["notional_usd"] = float(v)
+            except ValueError:
+                OPEN_PARAMS["notional_usd"] = None
+            QUOTE_PARAMS["notional_usd"] = OPEN_PARAMS["notional_usd"]
+
         elif k in ("slippage", "slippage_frac"):
             try:
                 OPEN_PARAMS["slippage_frac"] = float(v)
+                QUOTE_PARAMS["slippage_frac"] = float(v)
+            except ValueError:
+                pass
+
+        elif k in ("hours",):
+            try:
+                REPORT_PARAMS["hours"] = float(v)
+            except ValueError:
+                pass
+
+        elif k in ("kind", "buckets"):
+            REPORT_PARAMS[k] = v or None
+
+        elif k in ("fees",):
+            REPORT_PARAMS["fees"] = v.lower() in ("1", "true", "yes", "y", "on")
+
+        elif k in ("max_age", "max_age_s"):
+            try:
+                QUOTE_PARAMS["max_age_s"] = float(v)
             except ValueError:
                 pass
 
@@ -482,6 +988,91 @@ def _apply_kv_overrides(pairs: list[str]) -> None:
             except ValueError:
                 pass
 
+        # ---- deleverage knobs ----
+        elif k in ("usd", "withdraw_usd"):
+            try:
+                DELEVERAGE_PARAMS["usd"] = float(v)
+            except ValueError:
+                pass
+
+        elif k in ("target_ratio", "ratio"):
+            try:
+                DELEVERAGE_PARAMS["target_ratio"] = float(v)
+            except ValueError:
+                DELEVERAGE_PARAMS["target_ratio"] = None
+
+        elif k in ("dry_run", "dry"):
+            DELEVERAGE_PARAMS["dry_run"] = v.lower() in ("1", "true", "yes", "y", "on")
+
+        # ---- sliced execution knobs ----
+        elif k in ("algo",):
+            EXEC_PARAMS["algo"] = v.lower() if v.lower() in ("twap", "pov") else None
+
+        elif k in ("duration", "duration_s"):
+            try:
+                EXEC_PARAMS["duration_s"] = float(v)
+            except ValueError:
+                pass
+
+        elif k in ("slices",):
+            try:
+                EXEC_PARAMS["slices"] = int(v)
+            except ValueError:
+                EXEC_PARAMS["slices"] = None
+
+        elif k in ("participation", "pov"):
+            try:
+                EXEC_PARAMS["participation"] = float(v)
+            except ValueError:
+                pass
+
+        # ---- client order id knobs ----
+        elif k in ("job", "job_id"):
+            cloids.set_job(v)
+
+        elif k in ("hedge",):
+            ORDER_PARAMS["hedge"] = v.lower() in ("1", "true", "yes", "y", "on")
+
+        elif k in ("hedge_after", "hedge_after_s"):
+            try:
+                ORDER_PARAMS["hedge_after_s"] = float(v)
+            except ValueError:
+                pass
+
+        elif k in ("max_attempts", "attempts"):
+            try:
+                ORDER_PARAMS["max_attempts"] = int(v)
+            except ValueError:
+                pass
+
+        elif k in ("cloid",):
+            LOOKUP_CLOID = v
+
+        elif k in ("top", "corr_fetch"):
+            try:
+                SCREEN_PARAMS[k] = int(v)
+            except ValueError:
+                pass
+
+        elif k in ("sort",):
+            SCREEN_PARAMS["sort"] = v
+
+        elif k in ("min_oi", "min_oi_usd", "min_vol", "min_vol_usd", "max_basis", "max_abs_basis"):
+            key = {"min_oi": "min_oi_usd", "min_vol": "min_vol_usd", "max_basis": "max_abs_basis"}.get(k, k)
+            try:
+                SCREEN_PARAMS[key] = float(v)
+            except ValueError:
+                pass
+
+        elif k in ("fields",):
+            SUMMARY_FIELDS = v or None
+
+        elif k in ("since",):
+            SUMMARY_SINCE = v or None
+
+        elif k in ("pretty",):
+            codec.PRETTY = v.lower() in ("1", "true", "yes", "y", "on")
+
 
 
 def _resolve_action_from_argv(default_action: str) -> str:
@@ -490,7 +1081,8 @@ def _resolve_action_from_argv(default_action: str) -> str:
     """
     if len(sys.argv) >= 2:
         action = sys.argv[1].lower()
-        if action in ("summary", "open", "close", "cancel"):
+        if action in ("summary", "open", "close", "cancel", "deleverage", "lookup", "screen", "quote",
+                      "report"):
             if len(sys.argv) > 2:
                 _apply_kv_overrides(sys.argv[2:])
             return action
@@ -506,33 +1098,10 @@ def main():
 
     if action == "summary":
         summary = get_account_summary()
-        print("\nAccount Summary")
-        print(_pretty(summary))  # keep this as the last print for summary
-
-        def num(x):
-            return Decimal(str(x)) if x is not None else Decimal(0)
-
-        # Get account value
-        # Convert ALL numeric-looking fields with num()
-        ms = summary.get("marginSummary", {})
-        accountvalue = num(ms.get("accountValue"))          # total equity (USD)
-       
-        # Sum unrealized PnL across all open positions
-        pnl_usd = sum(
-            (num(item.get("position", {}).get("unrealizedPnl"))
-            for item in (summary.get("openPositions") or [])),
-            start=Decimal(0)
-        )
-       
-        cash_usd  = accountvalue - pnl_usd   # USDC without positions (if you closed now)
-        pos_usd   = pnl_usd                # USDC from open positions (can be negative)
-        total_usd = accountvalue             # USDC including positions
-
-        print("cash_usd:", cash_usd)
-        print("pos_usd:", pos_usd)
-        print("total_usd:", total_usd)
-
-
+        if SUMMARY_FIELDS is None and SUMMARY_SINCE is None:
+            print(format_summary(summary))
+        else:
+            print(codec.dumps(summary_delta(summary, SUMMARY_FIELDS, SUMMARY_SINCE), pretty=False))
 
     elif action == "open":
         coin = OPEN_PARAMS["coin"]
@@ -542,14 +1111,15 @@ def main():
         leverage = OPEN_PARAMS.get("leverage")
         margin_mode = OPEN_PARAMS.get("margin_mode", "cross")
         strict = bool(OPEN_PARAMS.get("strict", False))
-        result = open_market(coin, side, size, slippage, leverage, margin_mode, strict)
+        result = open_market(coin, side, size, slippage, leverage, margin_mode, strict, EXEC_PARAMS,
+                             OPEN_PARAMS.get("stress"), OPEN_PARAMS.get("stress_limits"))
         print("\nOpen Market Result")
         print(_pretty(result))
 
     elif action == "close":
         # If CLOSE_PCT or CLOSE_SIZE is specified, do partial close. Otherwise full.
-        if (CLOSE_PCT is not None) or (CLOSE_SIZE is not None):
-            result = close_market_partial(CLOSE_COIN, CLOSE_PCT, CLOSE_SIZE, CLOSE_SLIPPAGE_FRAC)
+        if (CLOSE_PCT is not None) or (CLOSE_SIZE is not None) or EXEC_PARAMS.get("algo"):
+            result = close_market_partial(CLOSE_COIN, CLOSE_PCT, CLOSE_SIZE, CLOSE_SLIPPAGE_FRAC, EXEC_PARAMS)
         else:
             result = close_market(CLOSE_COIN)
         print("\nClose Market Result")
@@ -559,9 +1129,46 @@ def main():
         print("\nCancel Orders Result")
         print(_pretty(result))
 
+    elif action == "deleverage":
+        result = deleverage_for_withdraw(
+            float(DELEVERAGE_PARAMS["usd"]),
+            DELEVERAGE_PARAMS.get("target_ratio"),
+            CLOSE_SLIPPAGE_FRAC,
+            bool(DELEVERAGE_PARAMS.get("dry_run", False)),
+        )
+        print("\nDeleverage Result")
+        print(_pretty(result))
+
+    elif action == "lookup":
+        result = lookup_order(LOOKUP_CLOID)
+        print("\nLookup Result")
+        print(_pretty(result))
+
+    elif action == "screen":
+        import screener
+        result = screener.screen(**SCREEN_PARAMS)
+        print("\nScreen Result")
+        print(_pretty(result))
+
+    elif action == "quote":
+        result = quote_market(**QUOTE_PARAMS)
+        print("\nQuote Result")
+        print(_pretty(result))
+
+    elif action == "report":
+        import exec_log
+        if REPORT_PARAMS.get("fees"):
+            address, info, _ = _setup(skip_ws=True)
+            exec_log.sync_fees(info, address)
+        buckets = [float(b) for b in (REPORT_PARAMS.get("buckets") or "").split(",") if b.strip()]
+        result = exec_log.report(REPORT_PARAMS.get("hours"), REPORT_PARAMS.get("coin"), REPORT_PARAMS.get("kind"),
+                                 buckets or exec_log.DEFAULT_BUCKETS_USD)
+        print("\nExecution Report")
+        print(_pretty(result))
+
     else:
-        print(f"Unknown ACTION: {action}. Valid: 'summary', 'open', 'close', 'cancel'.")
+        print(f"Unknown ACTION: {action}. Valid: 'summary', 'open', 'close', 'cancel', 'deleverage', 'lookup', 'screen', 'quote', 'report'.")
 
 
 if __name__ == "__main__":
-    main()
+    profiling.run(main)
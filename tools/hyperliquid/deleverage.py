@@ -0,0 +1,153 @@
+"""
+deleverage.py — plan (and optionally execute) the minimal reduce needed to free USD on HL.
+
+Given the parsed account (account_state.AccountState), live mids and a USD
+amount to withdraw, every open position is reduced by the SAME fraction f, so
+the long/short hedge ratio is kept. f is the smallest value that satisfies
+both constraints after the withdrawal of W:
+
+  withdrawable:  E - φ·f·N - (1 - f)·M  >=  W
+  margin ratio:  (1 - f)·M  <=  r · (E - W - φ·f·N)
+
+  E = account value, M = Σ per-position marginUsed, N = Σ notional,
+  φ = taker fee rate, r = target margin ratio (default: current M / E).
+
+Sizes are rounded UP to each coin's lot and clamped to |szi|. Execution sends
+all reduces in ONE bulk_orders call (reduce-only IOC limits bounded by slippage).
+"""
+
+from __future__ import annotations
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+import cloids
+import order_book
+from account_state import AccountState
+from execution import parse_fills
+
+DEFAULT_TAKER_FEE = 0.00045   # HL base-tier perp taker fee
+
+
+def plan_deleverage(
+    state: AccountState,
+    mids: Dict[str, Any],
+    withdraw_usd: float,
+    target_ratio: Optional[float] = None,
+    fee_rate: float = DEFAULT_TAKER_FEE,
+    info=None,
+) -> Dict[str, Any]:
+    """Pure planning step: no requests unless `info` is given (for lot sizes)."""
+    positions = [p for p in state.positions if p.coin]
+    E = float(state.account_value)
+    W = max(0.0, float(withdraw_usd))
+    out: Dict[str, Any] = {"withdrawUsd": W, "accountValue": E, "feeRate": fee_rate}
+    if W > E:
+        return {**out, "error": "WITHDRAW_EXCEEDS_ACCOUNT_VALUE"}
+
+    if not positions:
+        free = state.free_cross_margin
+        return {**out, "fraction": 0.0, "reduces": [], "marginUsed": 0.0,
+                "freeAfter": free, "feasible": free >= W}
+
+    coins = [p.coin for p in positions]
+    szi = np.array([p.szi for p in positions], dtype=float)
+    px = np.array([float(mids.get(c, 0.0) or 0.0) for c in coins], dtype=float)
+    px = np.where(px > 0, px, np.array([p.entry_px for p in positions], dtype=float))
+    margin = np.array([p.margin_used for p in positions], dtype=float)
+
+    notional = np.abs(szi) * px
+    M = float(margin.sum())
+    N = float(notional.sum())
+    r = float(target_ratio) if target_ratio is not None else (M / E if E > 0 else 0.0)
+
+    # Smallest f in [0, 1] meeting both constraints (denominators > 0 for any sane fee)
+    need_cash = (M - (E - W)) / max(M - fee_rate * N, 1e-12)
+    need_ratio = (M - r * (E - W)) / max(M - r * fee_rate * N, 1e-12)
+    f = float(np.clip(max(need_cash, need_ratio, 0.0), 0.0, 1.0))
+
+    reduce_sz = f * np.abs(szi)
+    if info is not None and f > 0:
+        reduce_sz = np.array([order_book.round_sz(info, c, s, up=True) for c, s in zip(coins, reduce_sz)])
+        min_sz = np.array([order_book.min_order_sz(info, c, p) if p > 0 else 0.0 for c, p in zip(coins, px)])
+        # below HL's $10 minimum: bump to the minimum, or take the whole position if that's smaller
+        reduce_sz = np.where((reduce_sz > 0) & (reduce_sz < min_sz), np.minimum(min_sz, np.abs(szi)), reduce_sz)
+    reduce_sz = np.minimum(reduce_sz, np.abs(szi))
+
+    frac_i = np.divide(reduce_sz, np.abs(szi), out=np.zeros_like(reduce_sz), where=np.abs(szi) > 0)
+    freed = frac_i * margin
+    fees = reduce_sz * px * fee_rate
+    M_after = M - float(freed.sum())
+    E_after = E - W - float(fees.sum())
+
+    reduces: List[Dict[str, Any]] = []
+    for i, c in enumerate(coins):
+        if reduce_sz[i] <= 0:
+            continue
+        reduces.append({
+            "coin": c,
+            "szi": float(szi[i]),
+            "side": "buy" if szi[i] < 0 else "sell",
+            "size": float(reduce_sz[i]),
+            "notionalUsd": float(reduce_sz[i] * px[i]),
+            "marginFreed": float(freed[i]),
+            "mid": float(px[i]),
+        })
+
+    return {
+        **out,
+        "targetRatio": r,
+        "currentRatio": M / E if E > 0 else None,
+        "marginUsed": M,
+        "notional": N,
+        "fraction": f,
+        "reduces": reduces,
+        "marginUsedAfter": M_after,
+        "ratioAfter": M_after / E_after if E_after > 0 else None,
+        "freeAfter": E - float(fees.sum()) - M_after,
+        "feasible": (E - float(fees.sum()) - M_after) >= W - 1e-9,
+    }
+
+
+def execute_plan(info, exchange, plan: Dict[str, Any], slippage_frac: float = 0.01,
+                 address: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Send every planned reduce as one reduce-only IOC batch.
+    With `address` and a replayable job id, legs whose cloid already exists are skipped.
+    """
+    reduces = plan.get("reduces") or []
+    if not reduces:
+        return {"sent": 0, "fills": []}
+    orders = []
+    for rd in reduces:
+        is_buy = rd["side"] == "buy"
+        orders.append({
+            "coin": rd["coin"],
+            "is_buy": is_buy,
+            "sz": rd["size"],
+            "limit_px": order_book.limit_px_for(info, rd["coin"], is_buy, rd["mid"], slippage_frac),
+            "order_type": {"limit": {"tif": "Ioc"}},
+            "reduce_only": True,
+            "cloid": cloids.make_cloid("deleverage", plan.get("withdrawUsd"), rd["coin"]),
+        })
+    skipped = []
+    if address and cloids.is_replayable():
+        fresh = []
+        for o in orders:
+            found = cloids.lookup(info, address, o["cloid"])
+            if found is None:
+                fresh.append(o)
+            else:
+                skipped.append({"coin": o["coin"], "cloid": cloids.cloid_hex(o["cloid"]), **found})
+        orders = fresh
+    if not orders:
+        return {"sent": 0, "fills": [], "alreadySent": skipped}
+    res = exchange.bulk_orders(orders)
+    fills = parse_fills(res)
+    return {
+        "sent": len(orders),
+        "alreadySent": skipped,
+        "fills": [{"coin": o["coin"], "requested": o["sz"], "cloid": cloids.cloid_hex(o["cloid"]), **f}
+                  for o, f in zip(orders, fills)],
+        "result": res,
+    }
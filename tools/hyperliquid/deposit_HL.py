@@ -1,14 +1,21 @@
 # tools/hyperliquid/deposit_hl.py
+import profiling  # first: --profile also times the imports below
 import os, sys, time, json, requests
 from decimal import Decimal, getcontext
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
 
 from dotenv import load_dotenv
 from web3 import Web3
 from eth_account import Account
 
+import codec
+import journal
+import rate_limiter
+import receipt_watcher
+
 # Script that deposits USDC in HL perps account
 # Also checks for credit of the USDC
 
@@ -48,27 +55,34 @@ def to_wei_dec(amount_str: str, decimals: int) -> int:
         raise ValueError("amount must be > 0")
     return int(q * (10 ** decimals))
 
+def _hex(b) -> str:
+    h = b.hex() if isinstance(b, (bytes, bytearray)) else str(b)
+    return h if h.startswith("0x") else "0x" + h
+
 def mask_key(pk: str) -> str:
     if not pk or len(pk) < 6:
         return "****"
     return pk[:6] + "…" + pk[-4:]
 
-def post_info(payload: dict) -> dict:
+def post_info(payload: dict, schema=None):
+    """POST /info; with `schema` the body is decoded straight into that codec struct."""
+    rate_limiter.acquire(rate_limiter.request_weight("/info", payload))
     r = requests.post(INFO_URL, headers={"content-type": "application/json"}, json=payload, timeout=15)
+    if r.status_code == 429:
+        rate_limiter.note_throttled()
     r.raise_for_status()
-    return r.json()
+    return codec.response(r, schema)
 
 def get_spot_usdc(addr_hex: str) -> Decimal:
-    data = post_info({"type": "spotClearinghouseState", "user": addr_hex})
-    for b in data.get("balances", []):
-        if b.get("coin") == "USDC":
-            return Decimal(b.get("total", "0"))
+    data = post_info({"type": "spotClearinghouseState", "user": addr_hex}, codec.SpotClearinghouseState)
+    for b in data.balances or []:
+        if b.coin == "USDC":
+            return Decimal(b.total or "0")
     return Decimal(0)
 
 def get_perp_withdrawable(addr_hex: str) -> Decimal:
-    data = post_info({"type": "clearinghouseState", "user": addr_hex})
-    w = data.get("withdrawable", "0")
-    return Decimal(w)
+    data = post_info({"type": "clearinghouseState", "user": addr_hex}, codec.ClearinghouseState)
+    return Decimal(data.withdrawable or "0")
 
 def sum_ledger_deposits_since(addr_hex: str, start_ms: int) -> Decimal:
     """
@@ -79,11 +93,10 @@ def sum_ledger_deposits_since(addr_hex: str, start_ms: int) -> Decimal:
         "type": "userNonFundingLedgerUpdates",
         "user": addr_hex,
         "startTime": int(start_ms)
-    })
+    }, codec.LedgerUpdates)
     tot = Decimal(0)
     for row in data or []:
-        delta = row.get("delta") or {}
-        usdc = delta.get("usdc")
+        usdc = row.delta.usdc if row.delta is not None else None
         if usdc:
             try:
                 tot += Decimal(usdc)
@@ -93,15 +106,23 @@ def sum_ledger_deposits_since(addr_hex: str, start_ms: int) -> Decimal:
 
 def wait_for_hl_credit(addr_hex: str, amount_human: str,
                        poll_ms: int = 6000, timeout_s: int = 600,
-                       start_time_ms: Optional[int] = None) -> None:
+                       start_time_ms: Optional[int] = None,
+                       on_poll: Optional[Callable[[], None]] = None,
+                       baseline: Optional[Tuple[Decimal, Decimal]] = None) -> Dict[str, Any]:
     """
     Waits until either Spot USDC or Perps withdrawable increases ~ by amount_human.
     Falls back to ledger check on timeout.
+    on_poll runs once per poll (used by --then-open to keep its mid fresh).
+    baseline: (spot, perps withdrawable) from before the transfer; read now if omitted.
+    Returns the last observed balances.
     """
     expected = Decimal(amount_human)
     min_delta = expected * Decimal("0.98")  # allow ~2% variance for fees/FX
-    spot0 = get_spot_usdc(addr_hex)
-    perp0 = get_perp_withdrawable(addr_hex)
+    if baseline is not None:
+        spot0, perp0 = baseline
+    else:
+        spot0 = get_spot_usdc(addr_hex)
+        perp0 = get_perp_withdrawable(addr_hex)
     t0 = time.time()
     print(f"HL spot USDC before: {spot0}, perps withdrawable before: {perp0}")
 
@@ -113,7 +134,9 @@ def wait_for_hl_credit(addr_hex: str, amount_human: str,
         print(f"HL spot: {spot} (Δ {d_spot}), perps withdrawable: {perp} (Δ {d_perp})")
         if d_spot >= min_delta or d_perp >= min_delta:
             print("🎉 Deposit credited on Hyperliquid.")
-            return
+            return {"spot": spot, "perpWithdrawable": perp, "source": "balances"}
+        if on_poll is not None:
+            on_poll()
         sleep(poll_ms)
 
     # final fallback: ledger delta
@@ -122,14 +145,81 @@ def wait_for_hl_credit(addr_hex: str, amount_human: str,
         print(f"Ledger USDC delta since start: {credited}")
         if credited >= min_delta:
             print("✅ Deposit present in ledger; balances likely lagging.")
-            return
+            return {"spot": None, "perpWithdrawable": None, "source": "ledger"}
     raise TimeoutError("Timed out waiting for Hyperliquid credit.")
 
+# ---------- deposit-then-open ----------
+class ThenOpen:
+    """
+    --then-open: prepare a create_orders open (imports, setup, size, leverage cap)
+    in the background while the deposit confirms and credits, keep the mid fresh
+    on every credit poll, and send the order as soon as credit lands.
+    """
+
+    def __init__(self, kv_args):
+        self.kv_args = kv_args
+        self.ctx: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.mid: Optional[float] = None
+        self._thread = threading.Thread(target=self._prepare, name="then-open", daemon=True)
+
+    def start(self) -> "ThenOpen":
+        self._thread.start()
+        return self
+
+    def _prepare(self) -> None:
+        try:
+            import create_orders as co
+            self.co = co
+            co._apply_kv_overrides(self.kv_args)
+            p = co.OPEN_PARAMS
+            size_given = any(a.split("=", 1)[0].strip().lower() == "size" for a in self.kv_args)
+            self.params = dict(coin=p["coin"], side=p["side"],
+                               size=float(p["size"]) if size_given or not p.get("notional_usd") else None,
+                               slippage_frac=float(p.get("slippage_frac", 0.01)), leverage=p.get("leverage"),
+                               margin_mode=p.get("margin_mode", "cross"), notional_usd=p.get("notional_usd"))
+            t0 = time.time()
+            self.ctx = co.prepare_open(**self.params)
+            self.mid = self.ctx["mid"]
+            print(f"  ⚡ open prepared in {time.time() - t0:.2f}s: {self.params['side']} {self.ctx['size']} "
+                  f"{self.params['coin']} @~{self.mid} (leverage cap {self.ctx['applied_leverage']})")
+        except Exception as e:
+            # e.g. a brand-new account has no equity yet, so setup() refuses; retried after credit
+            self.error = f"{type(e).__name__}: {e}"
+            print(f"  ⚠ open pre-compute failed ({self.error}); will prepare after credit.")
+
+    def refresh_mid(self) -> None:
+        if self.ctx is None:
+            return
+        try:
+            self.mid = self.co._mid_px(self.ctx["info"], self.ctx["coin"])
+        except Exception:
+            pass
+
+    def fire(self, credit: Dict[str, Any], decision: Optional[Dict[str, Any]] = None,
+             on_decided=None) -> Dict[str, Any]:
+        """Send the open. `decision` / `on_decided`: see create_orders.fire_open (journaled size + cloid)."""
+        self._thread.join()
+        t0 = time.time()
+        if self.ctx is None:
+            if not hasattr(self, "params"):
+                raise RuntimeError(f"open could not be prepared: {self.error}")
+            self.ctx = self.co.prepare_open(**self.params)
+            self.mid = None
+        perp = credit.get("perpWithdrawable")
+        self.refresh_mid()   # one all_mids call: price the IOC at credit time, not at prepare time
+        res = self.co.fire_open(self.ctx, free_margin=float(perp) if perp is not None else None,
+                                mid=self.mid, exec_params=self.co.EXEC_PARAMS, decision=decision,
+                                on_decided=on_decided)
+        res["creditToOrderMs"] = round((time.time() - t0) * 1000, 1)
+        return res
+
+
 # ---------- main ----------
 def main():
-    # CLI: deposit_hl.py <amountUSDC> [--pk 0x...] [--no-wait]
+    # CLI: deposit_hl.py <amountUSDC> [--pk 0x...] [--no-wait] [--job id] [--then-open coin=.. side=.. size=..|notional=.. leverage=..]
     if len(sys.argv) < 2:
-        die("Usage: python deposit_hl.py <amountUSDC> [--pk 0xPRIVATE_KEY] [--no-wait]")
+        die("Usage: python deposit_hl.py <amountUSDC> [--pk 0xPRIVATE_KEY] [--no-wait] [--job ID] [--then-open key=value ...]")
 
     amount_human = sys.argv[1]
     pk_cli = None
@@ -141,6 +231,14 @@ def main():
             die("Provide a value after --pk")
     if "--no-wait" in sys.argv:
         no_wait = True
+    job = journal.job_from_args(sys.argv)
+    if job:
+        os.environ["HL_JOB_ID"] = job   # the --then-open cloids derive from the same job
+    then_open = None
+    if "--then-open" in sys.argv:
+        if no_wait:
+            die("--then-open needs the credit wait; drop --no-wait")
+        then_open = [a for a in sys.argv[sys.argv.index("--then-open") + 1:] if "=" in a and not a.startswith("--")]
 
     if not ARB_RPC:
         die("ARB_RPC (or ARBITRUM_ALCHEMY_MAINNET) is not set in env")
@@ -160,6 +258,10 @@ def main():
     print(f"  Amount: {amount_human} USDC")
     print(f"  PK: {mask_key(PK)}")
     print(f"  Wait for credit: {'no' if no_wait else 'yes'}")
+    opener = None
+    if then_open is not None:
+        print(f"  Then open: {' '.join(then_open)}")
+        opener = ThenOpen(then_open).start()   # overlaps SDK import/setup with the on-chain tx
 
     # web3 setup
     w3 = Web3(Web3.HTTPProvider(ARB_RPC, request_kwargs={"timeout": 30}))
@@ -173,73 +275,119 @@ def main():
     print(f"  From: {from_addr}")
     print(f"  HL User: {user_addr}")
 
-    # gas & balances
-    eth_bal = w3.eth.get_balance(from_addr)
-    print(f"  ETH (gas) balance: {Web3.from_wei(eth_bal, 'ether')} ETH")
-    if eth_bal == 0:
-        die("No ETH for gas on Arbitrum")
-
-    usdc = w3.eth.contract(address=USDC_ARB, abi=ERC20_ABI)
-    dec = usdc.functions.decimals().call()
-    amount_raw = to_wei_dec(amount_human, dec)
-    usdc_bal = usdc.functions.balanceOf(from_addr).call()
-    print(f"  USDC balance: {Decimal(usdc_bal) / (10 ** dec)}")
-    if usdc_bal < amount_raw:
-        die("Insufficient USDC balance")
-
-   # --- build & send tx (EIP-1559, type 2) ---
-    nonce = w3.eth.get_transaction_count(from_addr)
-
-    # estimate gas (pad a bit)
-    gas_est = usdc.functions.transfer(HL_BRIDGE2, amount_raw).estimate_gas({"from": from_addr})
-    gas = int(gas_est * 1.2)
-
-    # fee params
-    latest = w3.eth.get_block("latest")
-    base = int(latest.get("baseFeePerGas") or 0)
-
-    # priority tip: Arbitrum accepts 0, but add a tiny tip to be safe
+    # journal: a restarted job continues from its last completed phase (journal.py)
     try:
-        priority = int(w3.eth.max_priority_fee)  # web3.py v6 (int)
-    except Exception:
-        priority = int(0.01 * 1e9)  # 0.01 gwei
-
-    # headroom so base can rise a few blocks while pending
-    max_fee = int(base * 2 + priority)   # bump to *3 if you still see errors
-
-    tx = usdc.functions.transfer(HL_BRIDGE2, amount_raw).build_transaction({
-        "from": from_addr,
-        "nonce": nonce,
-        "chainId": CHAIN_ID,
-        "gas": gas,
-        "type": 2,
-        "maxFeePerGas": max_fee,
-        "maxPriorityFeePerGas": priority,
-    })
-
-    signed = acct.sign_transaction(tx)
-    raw = getattr(signed, "raw_transaction", None) or getattr(signed, "rawTransaction", None)
-    txh = w3.eth.send_raw_transaction(raw)
-    print("  🔗 sent:", txh.hex())
-
-    rcpt = w3.eth.wait_for_transaction_receipt(txh, timeout=180)
-    print(f"  ✅ confirmed in block {rcpt.blockNumber}, status={rcpt.status}")
-    if rcpt.status != 1:
-        die("Deposit tx reverted")
+        flow = journal.begin("deposit", job, amount=amount_human, from_addr=from_addr, user=user_addr)
+    except journal.JournalMismatch as e:
+        die(str(e))
+    if flow.resumed:
+        print(f"  ↻ resuming job {flow.job} at phase '{flow.phase}'")
+    if flow.phase == "done":
+        print("✅ Already completed:", codec.dumps(flow.data.get("summary"), pretty=False))
+        return
+
+    if not flow.reached("signed"):
+        # gas & balances
+        eth_bal = w3.eth.get_balance(from_addr)
+        print(f"  ETH (gas) balance: {Web3.from_wei(eth_bal, 'ether')} ETH")
+        if eth_bal == 0:
+            die("No ETH for gas on Arbitrum")
+
+        usdc = w3.eth.contract(address=USDC_ARB, abi=ERC20_ABI)
+        dec = usdc.functions.decimals().call()
+        amount_raw = to_wei_dec(amount_human, dec)
+        usdc_bal = usdc.functions.balanceOf(from_addr).call()
+        print(f"  USDC balance: {Decimal(usdc_bal) / (10 ** dec)}")
+        if usdc_bal < amount_raw:
+            die("Insufficient USDC balance")
+
+       # --- build & sign tx (EIP-1559, type 2) ---
+        nonce = w3.eth.get_transaction_count(from_addr)
+
+        # estimate gas (pad a bit)
+        gas_est = usdc.functions.transfer(HL_BRIDGE2, amount_raw).estimate_gas({"from": from_addr})
+        gas = int(gas_est * 1.2)
+
+        # fee params
+        latest = w3.eth.get_block("latest")
+        base = int(latest.get("baseFeePerGas") or 0)
+
+        # priority tip: Arbitrum accepts 0, but add a tiny tip to be safe
+        try:
+            priority = int(w3.eth.max_priority_fee)  # web3.py v6 (int)
+        except Exception:
+            priority = int(0.01 * 1e9)  # 0.01 gwei
+
+        # headroom so base can rise a few blocks while pending
+        max_fee = int(base * 2 + priority)   # bump to *3 if you still see errors
+
+        tx = usdc.functions.transfer(HL_BRIDGE2, amount_raw).build_transaction({
+            "from": from_addr,
+            "nonce": nonce,
+            "chainId": CHAIN_ID,
+            "gas": gas,
+            "type": 2,
+            "maxFeePerGas": max_fee,
+            "maxPriorityFeePerGas": priority,
+        })
+
+        signed = acct.sign_transaction(tx)
+        raw = getattr(signed, "raw_transaction", None) or getattr(signed, "rawTransaction", None)
+        # credit baselines + ledger start, taken BEFORE the transfer can land
+        spot0, perp0 = get_spot_usdc(user_addr), get_perp_withdrawable(user_addr)
+        flow.mark("signed", raw_tx=raw.hex(), tx_hash=_hex(signed.hash), nonce=nonce,
+                  start_ms=int(time.time() * 1000) - 5000, spot0=str(spot0), perp0=str(perp0))
+
+    if not flow.reached("sent"):
+        # same signed tx (same nonce) on a resume: it can only ever be mined once
+        try:
+            w3.eth.send_raw_transaction(bytes.fromhex(flow.get("raw_tx").removeprefix("0x")))
+        except Exception as e:
+            if not flow.resumed:
+                raise
+            print(f"  ↻ re-broadcast not accepted ({e}); waiting on the original tx")
+        flow.mark("sent")
+        print("  🔗 sent:", flow.get("tx_hash"))
+
+    if not flow.reached("confirmed"):
+        rcpt = receipt_watcher.wait_for_receipt(w3, flow.get("tx_hash"), timeout=180)
+        print(f"  ✅ confirmed in block {rcpt.blockNumber}, status={rcpt.status}")
+        if rcpt.status != 1:
+            flow.mark("failed", block=rcpt.blockNumber, status=rcpt.status)
+            die("Deposit tx reverted")
+        flow.mark("confirmed", block=rcpt.blockNumber)
 
     if no_wait:
+        flow.mark("done", summary={"txHash": flow.get("tx_hash"), "credited": None})
         print("✅ Deposit sent. Skipping HL credit wait (--no-wait).")
         return
 
-    # record start time BEFORE/AROUND sending for ledger fallback
-    start_ms = int(time.time() * 1000) - 5000
-
-    print("⏳ Waiting for Hyperliquid credit (Spot or Perps)…")
-    wait_for_hl_credit(user_addr, amount_human, poll_ms=6000, timeout_s=600, start_time_ms=start_ms)
+    if not flow.reached("credited"):
+        print("⏳ Waiting for Hyperliquid credit (Spot or Perps)…")
+        credit = wait_for_hl_credit(user_addr, amount_human, poll_ms=6000, timeout_s=600,
+                                    start_time_ms=int(flow.get("start_ms")),
+                                    on_poll=opener.refresh_mid if opener else None,
+                                    baseline=(Decimal(flow.get("spot0")), Decimal(flow.get("perp0"))))
+        flow.mark("credited", credit=credit)
+    credit = flow.get("credit") or {}
+
+    result = flow.get("open")
+    if opener is not None and not flow.reached("opened"):
+        # size + cloid are journaled before the send; a re-fire reuses them and looks that cloid up first,
+        # so an order sent before a crash is found, not doubled (a notional= open is not re-sized)
+        decision = flow.get("open_decision")
+        if decision:
+            print(f"↻ Open already decided before the restart: {decision['size']} (cloid {decision['cloid']})")
+        result = opener.fire(credit, decision=decision, on_decided=lambda d: flow.save(open_decision=d))
+        flow.mark("opened", open={"cloid": result.get("cloid"), "size": result.get("size"),
+                                  "price": result.get("price"), "postFill": result.get("postFill")})
+        print("\nOpen Market Result")
+        print(codec.dumps(result))
+    flow.mark("done", summary={"txHash": flow.get("tx_hash"), "credit": credit, "open": flow.get("open")})
     print("🎉 Done.")
 
 if __name__ == "__main__":
     try:
-        main()
+        profiling.run(main)
     except Exception as e:
         die(str(e))
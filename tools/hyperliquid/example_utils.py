@@ -1,3 +1,4 @@
+import functools
 import json
 import os
 
@@ -7,8 +8,14 @@ from eth_account.signers.local import LocalAccount
 from hyperliquid.exchange import Exchange
 from hyperliquid.info import Info
 
+import agent_pool
+import nonces
+import rate_limiter
+
 
 def setup(base_url=None, skip_ws=False, perp_dexs=None):
+    rate_limiter.install_sdk_hook()
+    nonces.install_sdk_hook()
     config_path = os.path.join(os.path.dirname(__file__), "config.json")
     with open(config_path) as f:
         config = json.load(f)
@@ -28,11 +35,17 @@ def setup(base_url=None, skip_ws=False, perp_dexs=None):
         url = info.base_url.split(".", 1)[1]
         error_string = f"No accountValue:\nIf you think this is a mistake, make sure that {address} has a balance on {url}.\nIf address shown is your API wallet address, update the config to specify the address of your account, not the address of the API wallet."
         raise Exception(error_string)
-    exchange = Exchange(account, base_url, account_address=address, perp_dexs=perp_dexs)
+    # config "agents": approved API wallets, dispatched round-robin (agent_pool.py)
+    agent_keys = [a["secret_key"] for a in config.get("agents") or [] if a.get("secret_key")]
+    if agent_keys:
+        print(f"Running with {len(agent_keys)} agent wallet(s)")
+    exchange = agent_pool.build(account, address, base_url, agent_keys, perp_dexs=perp_dexs, exchange_cls=Exchange)
     return address, info, exchange
 
 
+@functools.lru_cache(maxsize=1)
 def setup_multi_sig_wallets():
+    """Authorized multi-sig user wallets from config.json, loaded once per process (multi_sig.py)."""
     config_path = os.path.join(os.path.dirname(__file__), "config.json")
     with open(config_path) as f:
         config = json.load(f)
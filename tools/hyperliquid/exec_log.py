@@ -0,0 +1,300 @@
+"""
+exec_log.py — execution-quality records and the latency / slippage report.
+
+Every order path in create_orders.py (open, the deposit fast-path open, close,
+partial close, sliced parents, deleverage legs) and the watchdog's emergency
+reduces append one record per order to an append-only JSON-lines file
+(HL_EXEC_LOG, default backend/data/hl_executions.jsonl):
+
+  kind, coin, side, size, reduceOnly, algo, cloid, oids, error
+  arrivalMid      the mid the order was priced from (`price` in the results)
+  slippageFrac    the budget it was sent with
+  decidedMs       when the order path started (decision)
+  sentMs / ackMs  around the /exchange round trip (lookups / hedged re-sends included)
+  filledSz / avgPx
+  recovered       result came from a cloid lookup; avgPx is then read from the
+                  account's fills, or None (left out of slippage) if they can't be read
+
+Fees are not in order responses. `report fees=1` pulls userFillsByTime once and
+appends `{"type": "fee", "oid", "fee"}` records, which later reports join by oid.
+
+report() loads the file into NumPy columns and aggregates with group indices
+(np.unique / bincount / one lexsort for per-group percentiles), by coin, by
+notional bucket and by both:
+
+  sendToAckMs / decisionToAckMs   p50 / p90 / p99 and a latency histogram
+  slippageBps                     avgPx vs arrival mid, adverse positive
+  budgetUsed                      slippageBps / (slippageFrac * 1e4)
+  fillRatio, feeBps, notionalUsd
+
+  python create_orders.py report hours=24
+  python create_orders.py report coin=ETH buckets=1000,10000,100000 fees=1
+"""
+
+from __future__ import annotations
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+import codec
+
+LATENCY_EDGES_MS = (0, 25, 50, 100, 200, 400, 800, 1600, 3200, 6400)
+DEFAULT_BUCKETS_USD = (1_000.0, 10_000.0, 100_000.0)
+PCTS = (50, 90, 99)
+
+
+def log_path() -> Path:
+    p = os.getenv("HL_EXEC_LOG")
+    return Path(p) if p else Path(__file__).resolve().parents[2] / "backend" / "data" / "hl_executions.jsonl"
+
+
+def now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+# =========================
+# ========= WRITE =========
+# =========================
+
+def _append(rows: Iterable[Dict[str, Any]]) -> None:
+    data = b"".join(codec.dumpb(r) + b"\n" for r in rows)
+    if not data:
+        return
+    path = log_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    from rate_limiter import file_lock
+    with open(path, "ab") as f, file_lock(f):   # one write per batch; concurrent writers never interleave
+        f.write(data)
+        f.flush()
+
+
+def _fills(res: Any) -> Dict[str, Any]:
+    from execution import parse_fills
+    fills = parse_fills(res)
+    sz = sum(f.get("sz") or 0.0 for f in fills)
+    priced = all(f.get("px") is not None for f in fills if f.get("sz"))
+    notional = sum((f.get("sz") or 0.0) * (f.get("px") or 0.0) for f in fills)
+    errors = [f["error"] for f in fills if "error" in f]
+    return {
+        "filledSz": sz,
+        "avgPx": notional / sz if sz > 0 and priced else None,
+        "recovered": bool(isinstance(res, dict) and res.get("recoveredByCloid")),
+        "oids": [f["oid"] for f in fills if f.get("oid") is not None],
+        "error": (errors[0] if isinstance(errors[0], str) else codec.dumps(errors[0], pretty=False)[:300])
+                 if errors else None,
+    }
+
+
+def record(kind: str, coin: str, is_buy: bool, size: float, arrival_mid: Optional[float],
+           slippage_frac: Optional[float], decided_ms: int, sent_ms: int, ack_ms: int,
+           res: Any = None, cloid: Optional[str] = None, reduce_only: bool = False,
+           fills: Optional[Dict[str, Any]] = None, **extra: Any) -> None:
+    """
+    Append one execution record. `res` is the /exchange order response (fills are read
+    from it) unless `fills` ({filledSz, avgPx, oids, error}) is given. Never raises:
+    a failed write is reported on stderr and the order path carries on.
+    """
+    try:
+        row = {
+            "ts": ack_ms, "kind": kind, "coin": coin, "side": "buy" if is_buy else "sell",
+            "size": float(size), "reduceOnly": bool(reduce_only),
+            "arrivalMid": float(arrival_mid) if arrival_mid else None,
+            "slippageFrac": float(slippage_frac) if slippage_frac is not None else None,
+            "decidedMs": int(decided_ms), "sentMs": int(sent_ms), "ackMs": int(ack_ms),
+            "cloid": cloid, "job": os.getenv("HL_JOB_ID"),
+            **(fills if fills is not None else _fills(res)),
+            **extra,
+        }
+        _append([row])
+    except Exception as e:
+        print(f"[exec_log] record failed: {type(e).__name__}: {e}", file=sys.stderr)
+
+
+def record_sliced(kind: str, report: Dict[str, Any], decided_ms: int, sent_ms: int, ack_ms: int,
+                  cloid: Optional[str] = None) -> None:
+    """One parent record for an execution.ExecutionEngine run (children are in its report). Never raises."""
+    try:
+        oids = [f["oid"] for ch in report.get("children") or [] for f in ch.get("fills") or [] if f.get("oid")]
+    except Exception as e:
+        print(f"[exec_log] record failed: {type(e).__name__}: {e}", file=sys.stderr)
+        return
+    record(kind, report.get("coin"), report.get("side") == "buy", report.get("requested") or 0.0,
+           report.get("arrivalMid"), (report.get("slippageBudgetBps") or 0.0) / 1e4,
+           decided_ms, sent_ms, ack_ms, cloid=cloid, reduce_only=bool(report.get("reduceOnly")),
+           fills={"filledSz": report.get("filled") or 0.0, "avgPx": report.get("avgFillPx"), "oids": oids,
+                  "error": None},
+           algo=report.get("algo"), children=len(report.get("children") or []))
+
+
+# =========================
+# ========= READ ==========
+# =========================
+
+def load(since_ms: Optional[int] = None) -> Dict[str, Any]:
+    """{"execs": execution records, "fees": {oid: fee}} from the log. Torn / foreign lines are skipped."""
+    execs: List[Dict[str, Any]] = []
+    fees: Dict[Any, float] = {}
+    try:
+        raw = log_path().read_bytes()
+    except OSError:
+        return {"execs": execs, "fees": fees}
+    for line in raw.splitlines():
+        if not line.strip():
+            continue
+        try:
+            r = codec.loads(line)
+        except ValueError:
+            continue
+        if r.get("type") == "fee":
+            fees[r.get("oid")] = fees.get(r.get("oid"), 0.0) + float(r.get("fee") or 0.0)
+        elif since_ms is None or int(r.get("ts") or 0) >= since_ms:
+            execs.append(r)
+    return {"execs": execs, "fees": fees}
+
+
+def sync_fees(info, address: str, since_ms: Optional[int] = None) -> int:
+    """Append fee records for logged oids that have none yet (one userFillsByTime call). Returns how many."""
+    data = load(since_ms)
+    want = {oid for r in data["execs"] for oid in r.get("oids") or []} - set(data["fees"])
+    if not want:
+        return 0
+    start = min(int(r.get("sentMs") or r.get("ts") or 0) for r in data["execs"] if set(r.get("oids") or []) & want)
+    per_oid: Dict[Any, float] = {}
+    for f in info.user_fills_by_time(address, start - 60_000) or []:
+        if f.get("oid") in want:
+            per_oid[f["oid"]] = per_oid.get(f["oid"], 0.0) + float(f.get("fee") or 0.0)
+    _append({"type": "fee", "oid": oid, "fee": fee, "ts": now_ms()} for oid, fee in per_oid.items())
+    return len(per_oid)
+
+
+# =========================
+# ======== REPORT =========
+# =========================
+
+def _columns(execs: List[Dict[str, Any]], fees: Dict[Any, float]) -> Dict[str, np.ndarray]:
+    def col(key: str) -> np.ndarray:
+        return np.array([r.get(key) if r.get(key) is not None else np.nan for r in execs], dtype=float)
+
+    size, filled, avg, mid = col("size"), col("filledSz"), col("avgPx"), col("arrivalMid")
+    sign = np.array([1.0 if r.get("side") == "buy" else -1.0 for r in execs])
+
+    def _fee(r: Dict[str, Any]) -> float:
+        hits = [fees[o] for o in r.get("oids") or [] if o in fees]
+        return sum(hits) if hits else np.nan
+
+    fee = np.array([_fee(r) for r in execs], dtype=float)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        slip = sign * (avg / mid - 1.0) * 1e4
+        notional = np.where(np.isfinite(avg), filled * avg, size * mid)
+        return {
+            "coin": np.array([str(r.get("coin")) for r in execs], dtype=object),
+            "kind": np.array([str(r.get("kind")) for r in execs], dtype=object),
+            "notional": notional,
+            "fillRatio": np.where(size > 0, filled / size, np.nan),
+            "slippageBps": slip,
+            "budgetUsed": slip / (col("slippageFrac") * 1e4),
+            "sendToAckMs": col("ackMs") - col("sentMs"),
+            "decisionToAckMs": col("ackMs") - col("decidedMs"),
+            "feeBps": fee / (filled * avg) * 1e4,
+            "error": np.array([bool(r.get("error")) for r in execs]),
+        }
+
+
+def _group_pcts(values: np.ndarray, gid: np.ndarray, ngroups: int, pcts: Sequence[int]) -> np.ndarray:
+    """(ngroups, len(pcts)) percentiles of `values` per group, NaNs ignored, without a per-group loop."""
+    ok = np.isfinite(values)
+    v, g = values[ok], gid[ok]
+    out = np.full((ngroups, len(pcts)), np.nan)
+    if not len(v):
+        return out
+    order = np.lexsort((v, g))
+    v, g = v[order], g[order]
+    n = np.bincount(g, minlength=ngroups)
+    start = np.concatenate(([0], np.cumsum(n)[:-1]))
+    has = n > 0
+    for j, q in enumerate(pcts):                       # linear interpolation, like np.percentile
+        pos = (n[has] - 1) * (q / 100.0)
+        lo = np.floor(pos).astype(int)
+        hi = np.minimum(lo + 1, n[has] - 1)
+        frac = pos - lo
+        base = start[has]
+        out[has, j] = v[base + lo] * (1 - frac) + v[base + hi] * frac
+    return out
+
+
+def _group_mean(values: np.ndarray, gid: np.ndarray, ngroups: int) -> np.ndarray:
+    ok = np.isfinite(values)
+    s = np.bincount(gid[ok], weights=values[ok], minlength=ngroups)
+    c = np.bincount(gid[ok], minlength=ngroups)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(c > 0, s / np.maximum(c, 1), np.nan)
+
+
+def _num(x: float, nd: int = 2) -> Optional[float]:
+    return None if not np.isfinite(x) else round(float(x), nd)
+
+
+def _aggregate(cols: Dict[str, np.ndarray], keys: np.ndarray) -> Dict[str, Dict[str, Any]]:
+    labels, gid = np.unique(keys, return_inverse=True)
+    k = len(labels)
+    n = np.bincount(gid, minlength=k)
+    pct = {m: _group_pcts(cols[m], gid, k, PCTS) for m in ("slippageBps", "sendToAckMs", "decisionToAckMs",
+                                                            "budgetUsed")}
+    mean = {m: _group_mean(cols[m], gid, k) for m in ("slippageBps", "fillRatio", "feeBps")}
+    notional = np.bincount(gid, weights=np.nan_to_num(cols["notional"]), minlength=k)
+    errors = np.bincount(gid, weights=cols["error"].astype(float), minlength=k)
+    out: Dict[str, Dict[str, Any]] = {}
+    for i, label in enumerate(labels):
+        out[str(label)] = {
+            "n": int(n[i]),
+            "errors": int(errors[i]),
+            "notionalUsd": _num(notional[i]),
+            "fillRatio": _num(mean["fillRatio"][i], 4),
+            "slippageBps": {"mean": _num(mean["slippageBps"][i]),
+                            **{f"p{q}": _num(pct["slippageBps"][i, j]) for j, q in enumerate(PCTS)}},
+            "budgetUsedP90": _num(pct["budgetUsed"][i, 1], 3),
+            "sendToAckMs": {f"p{q}": _num(pct["sendToAckMs"][i, j], 1) for j, q in enumerate(PCTS)},
+            "decisionToAckMs": {f"p{q}": _num(pct["decisionToAckMs"][i, j], 1) for j, q in enumerate(PCTS)},
+            "feeBps": _num(mean["feeBps"][i]),
+        }
+    return out
+
+
+def _bucket_labels(notional: np.ndarray, edges: Sequence[float]) -> np.ndarray:
+    names = [f"<{edges[0]:g}"] + [f"{a:g}-{b:g}" for a, b in zip(edges[:-1], edges[1:])] + [f">={edges[-1]:g}"]
+    idx = np.searchsorted(np.asarray(edges, dtype=float), np.nan_to_num(notional), side="right")
+    return np.array(names, dtype=object)[idx]
+
+
+def report(hours: Optional[float] = None, coin: Optional[str] = None, kind: Optional[str] = None,
+           buckets: Sequence[float] = DEFAULT_BUCKETS_USD) -> Dict[str, Any]:
+    """Latency histograms and slippage / impact statistics by coin, notional bucket and both."""
+    t0 = time.perf_counter()
+    since = now_ms() - int(float(hours) * 3_600_000) if hours else None
+    data = load(since)
+    execs = [r for r in data["execs"] if (not coin or r.get("coin") == coin) and (not kind or r.get("kind") == kind)]
+    out: Dict[str, Any] = {"action": "report", "log": str(log_path()), "records": len(execs),
+                           "sinceMs": since, "coin": coin, "kind": kind}
+    if not execs:
+        return out
+    cols = _columns(execs, data["fees"])
+    edges = sorted(float(b) for b in buckets) or list(DEFAULT_BUCKETS_USD)
+    size_bucket = _bucket_labels(cols["notional"], edges)
+
+    lat = cols["sendToAckMs"]
+    hist, _ = np.histogram(lat[np.isfinite(lat)], bins=list(LATENCY_EDGES_MS) + [np.inf])
+    out.update({
+        "overall": _aggregate(cols, np.full(len(execs), "all", dtype=object))["all"],
+        "latencyHistogramMs": {"edges": list(LATENCY_EDGES_MS), "counts": hist.tolist()},
+        "byCoin": _aggregate(cols, cols["coin"]),
+        "bySize": _aggregate(cols, size_bucket),
+        "byCoinSize": _aggregate(cols, cols["coin"] + "|" + size_bucket),
+        "byKind": _aggregate(cols, cols["kind"]),
+        "feesKnown": int(np.isfinite(cols["feeBps"]).sum()),
+        "latencyMs": round((time.perf_counter() - t0) * 1000, 2),
+    })
+    return out
@@ -0,0 +1,192 @@
+"""
+execution.py — sliced (TWAP / participation-rate) execution for large HL orders.
+
+A parent order is split into IOC child orders. Each child is sized from the
+cached L2 depth inside the slippage band (order_book.BookCache), so one slice
+never walks deeper than `participation` of the visible liquidity.
+
+  algo="twap"  fixed schedule: `slices` children evenly spread over `duration_s`
+               (slices=None -> enough slices that each fits the depth cap)
+  algo="pov"   every interval, send `participation` x current band depth
+               until done or `duration_s` runs out
+
+Fills are tracked in memory from the order responses. When the schedule ends,
+the residual is swept with one final IOC (complete=True). The report compares
+the achieved average price against the arrival mid.
+"""
+
+from __future__ import annotations
+import math
+import time
+from typing import Any, Dict, List, Optional
+
+import cloids
+import order_book
+from order_book import BookCache
+
+MAX_SLICES = 60
+
+
+# Function to read fills out of an order response
+def parse_fills(res: Any) -> List[Dict[str, Any]]:
+    """
+    Flatten an /exchange order response into [{"sz", "px", "oid"}] or [{"error"}].
+    Resting (unfilled) IOC statuses come back as sz=0.
+    """
+    if not isinstance(res, dict) or res.get("status") != "ok":
+        return [{"error": res}]
+    data = (res.get("response") or {}).get("data") or {}
+    out: List[Dict[str, Any]] = []
+    for st in data.get("statuses") or []:
+        if "filled" in st:
+            f = st["filled"]
+            px = f.get("avgPx")     # None for an order recovered by cloid whose fills could not be read
+            out.append({"sz": float(f.get("totalSz", 0.0)), "px": float(px) if px is not None else None,
+                        "oid": f.get("oid")})
+        elif "error" in st:
+            out.append({"error": st["error"]})
+        else:
+            out.append({"sz": 0.0, "px": None, "oid": (st.get("resting") or {}).get("oid")})
+    return out
+
+
+class ExecutionEngine:
+    """Runs one parent order at a time against a shared BookCache."""
+
+    def __init__(self, info, exchange, books: Optional[BookCache] = None):
+        self.info = info
+        self.exchange = exchange
+        self.books = books or BookCache(info, ttl_s=1.0)
+
+    def _send_child(self, coin: str, is_buy: bool, sz: float, limit_px: float, reduce_only: bool,
+                    cloid=None) -> Any:
+        return self.exchange.order(coin, is_buy, sz, limit_px, {"limit": {"tif": "Ioc"}}, reduce_only=reduce_only,
+                                   cloid=cloid)
+
+    def plan_slices(self, coin: str, is_buy: bool, size: float, participation: float,
+                    slippage_frac: float, slices: Optional[int] = None) -> Dict[str, Any]:
+        """Slice count/size for a TWAP from the current book (no orders sent)."""
+        book = self.books.get(coin)
+        ref = book.mid
+        if not ref:
+            raise RuntimeError(f"Empty L2 book for {coin}")
+        depth = order_book.depth_within(book, is_buy, slippage_frac, ref)
+        cap = participation * depth
+        min_sz = order_book.min_order_sz(self.info, coin, ref)
+        if slices is None:
+            slices = math.ceil(size / cap) if cap > 0 else MAX_SLICES
+        max_by_min = max(1, int(size // min_sz)) if min_sz > 0 else MAX_SLICES
+        n = max(1, min(int(slices), MAX_SLICES, max_by_min))
+        return {"slices": n, "sliceSize": size / n, "bandDepth": depth, "depthCap": cap,
+                "minOrderSize": min_sz, "arrivalMid": ref}
+
+    def execute(
+        self,
+        coin: str,
+        is_buy: bool,
+        size: float,
+        algo: str = "twap",
+        duration_s: float = 60.0,
+        slices: Optional[int] = None,
+        participation: float = 0.25,
+        slippage_frac: float = 0.01,
+        reduce_only: bool = False,
+        complete: bool = True,
+        cloid_parts: tuple = (),
+    ) -> Dict[str, Any]:
+        algo = (algo or "twap").lower()
+        if algo not in ("twap", "pov"):
+            raise ValueError(f"Unknown algo {algo!r} (expected 'twap' or 'pov')")
+        size = abs(float(size))
+        participation = min(1.0, max(0.01, float(participation)))
+
+        self.books.invalidate(coin)
+        plan = self.plan_slices(coin, is_buy, size, participation, slippage_frac,
+                                slices if algo == "twap" else None)
+        arrival = plan["arrivalMid"]
+        n = plan["slices"] if algo == "twap" else MAX_SLICES
+        interval = max(0.0, float(duration_s)) / n
+        max_age = min(self.books.ttl_s, max(interval / 2, 0.2))   # per call: the cache is shared (quote, ...)
+
+        t0 = time.time()
+        remaining = size
+        filled_sz = 0.0
+        filled_notional = 0.0
+        children: List[Dict[str, Any]] = []
+
+        def _child(target: float, ref_px: float, final: bool) -> None:
+            nonlocal remaining, filled_sz, filled_notional
+            sz = order_book.round_sz(self.info, coin, min(target, remaining))
+            if sz <= 0:
+                return
+            limit_px = order_book.limit_px_for(self.info, coin, is_buy, ref_px, slippage_frac)
+            cloid = cloids.make_cloid(*cloid_parts, "child", len(children)) if cloid_parts else None
+            sent_at = time.time()
+            try:
+                res = self._send_child(coin, is_buy, sz, limit_px, reduce_only, cloid)
+                fills = parse_fills(res)
+            except Exception as e:
+                res, fills = None, [{"error": f"{type(e).__name__}: {e}"}]
+            got = sum(f.get("sz", 0.0) for f in fills)
+            for f in fills:
+                if f.get("sz"):
+                    filled_notional += f["sz"] * f["px"]
+            filled_sz += got
+            remaining = max(0.0, remaining - got)
+            children.append({
+                "t": round(sent_at - t0, 3), "sz": sz, "limitPx": limit_px, "refMid": ref_px,
+                "filled": got, "fills": fills, "final": final,
+                "cloid": cloids.cloid_hex(cloid) if cloid is not None else None,
+            })
+
+        for k in range(n):
+            if remaining <= 0:
+                break
+            due = t0 + k * interval
+            now = time.time()
+            if due > now:
+                time.sleep(due - now)
+            if time.time() - t0 > duration_s and k > 0:
+                break
+            book = self.books.get(coin, max_age_s=max_age)
+            ref = book.mid or arrival
+            cap = participation * order_book.depth_within(book, is_buy, slippage_frac, ref)
+            if algo == "twap":
+                target = remaining / (n - k)
+                if cap > 0:
+                    target = min(target, cap)
+            else:
+                target = cap
+            min_sz = order_book.min_order_sz(self.info, coin, ref)
+            if target < min_sz:
+                if remaining - target < min_sz or remaining <= min_sz:
+                    target = remaining  # tail: finish instead of leaving dust
+                elif cap <= 0:
+                    continue            # no liquidity inside the band right now
+                else:
+                    target = min_sz
+            _child(target, ref, final=False)
+
+        if complete and remaining > 0:
+            book = self.books.get(coin, max_age_s=0)
+            _child(remaining, book.mid or arrival, final=True)
+
+        avg_px = filled_notional / filled_sz if filled_sz > 0 else None
+        sign = 1.0 if is_buy else -1.0
+        slip_bps = (sign * (avg_px - arrival) / arrival * 1e4) if avg_px else None
+        return {
+            "algo": algo,
+            "coin": coin,
+            "side": "buy" if is_buy else "sell",
+            "reduceOnly": reduce_only,
+            "requested": size,
+            "filled": filled_sz,
+            "remaining": remaining,
+            "arrivalMid": arrival,
+            "avgFillPx": avg_px,
+            "slippageBpsVsArrival": slip_bps,   # positive = paid versus arrival mid
+            "slippageBudgetBps": slippage_frac * 1e4,
+            "elapsedS": round(time.time() - t0, 3),
+            "plan": plan,
+            "children": children,
+        }
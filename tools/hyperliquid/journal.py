@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+journal.py — crash-resumable phase journal for the funds-moving flows.
+
+deposit_HL.py and withdraw_HL.py record every phase of a run in a small SQLite
+database (WAL, synchronous=FULL) before moving on:
+
+  deposit:   started -> signed -> sent -> confirmed -> credited -> opened -> done
+  withdraw:  started -> signed -> sent -> credited -> done
+  withdraw_batch: started -> planned -> sent -> credited -> done
+             (each group's signed payload is saved before its POST, its outcome after)
+
+"signed" stores what is needed to finish without creating a second transfer:
+the raw signed Arbitrum tx (tx hash, nonce) or the signed withdraw3 payload,
+plus start_ms and the balance baselines the credit wait compares against.
+Re-broadcasting the same signed tx/payload can never move funds twice (same
+nonce), so a restarted run continues from the last completed phase.
+
+"failed" (e.g. a reverted deposit tx, so no funds moved) restarts the flow
+from the beginning.
+
+A run is identified by its job id: HL_JOB_ID (set by the keeper, e.g.
+"deposit:<vault tx>") or --job. Without one, each run gets a fresh id and
+nothing is resumed.
+
+Examples:
+  python journal.py list                       # unfinished flows
+  python journal.py list all=1 kind=deposit
+  python journal.py show job=deposit:0xabc...
+
+Env: HL_JOURNAL (default backend/data/hl_journal.sqlite)
+"""
+
+from __future__ import annotations
+import profiling  # first: --profile also times the imports below
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import codec
+
+PHASES = {
+    "deposit": ("started", "signed", "sent", "confirmed", "credited", "opened", "done"),
+    "withdraw": ("started", "signed", "sent", "credited", "done"),
+    "withdraw_batch": ("started", "planned", "sent", "credited", "done"),
+}
+TERMINAL = ("done", "failed")
+
+_local = threading.local()
+
+
+class JournalMismatch(ValueError):
+    """The job id is already journaled with different parameters (amount, destination, ...)."""
+
+
+def _db_path() -> Path:
+    p = os.getenv("HL_JOURNAL")
+    return Path(p) if p else Path(__file__).resolve().parents[2] / "backend" / "data" / "hl_journal.sqlite"
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def _conn() -> sqlite3.Connection:
+    path = _db_path()
+    conn = getattr(_local, "conn", None)
+    if conn is not None and getattr(_local, "path", None) == path:
+        return conn
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(path), timeout=30, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=FULL")      # a recorded phase survives power loss
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS flows (
+            job TEXT PRIMARY KEY, kind TEXT NOT NULL, phase TEXT NOT NULL,
+            params TEXT NOT NULL, data TEXT NOT NULL, created_ms INTEGER, updated_ms INTEGER
+        );
+        CREATE TABLE IF NOT EXISTS phases (
+            job TEXT NOT NULL, phase TEXT NOT NULL, ts_ms INTEGER NOT NULL, data TEXT
+        );
+        CREATE INDEX IF NOT EXISTS flows_phase ON flows(phase);
+    """)
+    _local.conn, _local.path = conn, path
+    return conn
+
+
+def job_from_args(argv: List[str]) -> Optional[str]:
+    """--job <id> / --job=<id>, else HL_JOB_ID."""
+    for i, a in enumerate(argv):
+        if a.startswith("--job="):
+            return a.split("=", 1)[1] or None
+        if a == "--job" and i + 1 < len(argv):
+            return argv[i + 1]
+    return os.getenv("HL_JOB_ID") or None
+
+
+class Flow:
+    """One journaled run. `data` accumulates whatever the phases recorded."""
+
+    def __init__(self, kind: str, job: str, phase: str, params: Dict[str, Any], data: Dict[str, Any],
+                 resumed: bool):
+        self.kind = kind
+        self.job = job
+        self.phase = phase
+        self.params = params
+        self.data = data
+        self.resumed = resumed
+
+    def reached(self, phase: str) -> bool:
+        if self.phase == "failed":
+            return False
+        order = PHASES[self.kind]
+        return order.index(self.phase) >= order.index(phase)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.data.get(key, default)
+
+    def save(self, **data: Any) -> None:
+        """Merge `data` without changing the phase (progress inside a phase)."""
+        self._write(self.phase, data)
+
+    def mark(self, phase: str, **data: Any) -> None:
+        """Record that `phase` completed (with what it produced). Durable on return."""
+        if phase not in TERMINAL and phase not in PHASES[self.kind]:
+            raise ValueError(f"unknown {self.kind} phase {phase!r}")
+        self._write(phase, data)
+
+    def _write(self, phase: str, data: Dict[str, Any]) -> None:
+        self.data.update(data)
+        now = _now_ms()
+        blob = json.dumps(self.data, default=str)
+        c = _conn()
+        c.execute("BEGIN IMMEDIATE")
+        try:
+            c.execute("UPDATE flows SET phase=?, data=?, updated_ms=? WHERE job=?", (phase, blob, now, self.job))
+            if phase != self.phase or data:
+                c.execute("INSERT INTO phases(job, phase, ts_ms, data) VALUES (?,?,?,?)",
+                          (self.job, phase, now, json.dumps(data, default=str)))
+            c.execute("COMMIT")
+        except Exception:
+            c.execute("ROLLBACK")
+            raise
+        self.phase = phase
+
+
+def begin(kind: str, job: Optional[str], **params: Any) -> Flow:
+    """
+    The journaled flow for `job`, created at "started" if new. An existing flow
+    with other `params` raises JournalMismatch (a job id must not be reused for
+    a different transfer).
+    """
+    if kind not in PHASES:
+        raise ValueError(f"unknown flow kind {kind!r}")
+    job = job or f"adhoc-{kind}-{uuid.uuid4().hex}"
+    p = json.loads(json.dumps(params, default=str))
+    c = _conn()
+    c.execute("BEGIN IMMEDIATE")
+    try:
+        row = c.execute("SELECT kind, phase, params, data FROM flows WHERE job=?", (job,)).fetchone()
+        if row is None:
+            now = _now_ms()
+            c.execute("INSERT INTO flows(job, kind, phase, params, data, created_ms, updated_ms) VALUES (?,?,?,?,?,?,?)",
+                      (job, kind, "started", json.dumps(p), "{}", now, now))
+            c.execute("INSERT INTO phases(job, phase, ts_ms, data) VALUES (?,?,?,?)",
+                      (job, "started", now, json.dumps(p)))
+            c.execute("COMMIT")
+            return Flow(kind, job, "started", p, {}, resumed=False)
+        c.execute("COMMIT")
+    except Exception:
+        c.execute("ROLLBACK")
+        raise
+    old_kind, phase, old_params, data = row[0], row[1], json.loads(row[2]), json.loads(row[3])
+    if old_kind != kind or old_params != p:
+        raise JournalMismatch(f"job {job} is journaled as {old_kind} {old_params}, not {kind} {p}")
+    return Flow(kind, job, phase, p, data, resumed=True)
+
+
+def flows(kind: Optional[str] = None, unfinished: bool = True) -> List[Dict[str, Any]]:
+    q = "SELECT job, kind, phase, params, created_ms, updated_ms FROM flows"
+    cond, args = [], []
+    if kind:
+        cond.append("kind=?")
+        args.append(kind)
+    if unfinished:
+        cond.append("phase NOT IN ('done','failed')")
+    if cond:
+        q += " WHERE " + " AND ".join(cond)
+    q += " ORDER BY updated_ms DESC"
+    return [{"job": r[0], "kind": r[1], "phase": r[2], "params": json.loads(r[3]), "createdMs": r[4],
+             "updatedMs": r[5]} for r in _conn().execute(q, args)]
+
+
+def history(job: str) -> Dict[str, Any]:
+    c = _conn()
+    row = c.execute("SELECT kind, phase, params, data FROM flows WHERE job=?", (job,)).fetchone()
+    if row is None:
+        return {}
+    steps = [{"phase": r[0], "ts": r[1], "data": json.loads(r[2] or "{}")}
+             for r in c.execute("SELECT phase, ts_ms, data FROM phases WHERE job=? ORDER BY rowid", (job,))]
+    return {"job": job, "kind": row[0], "phase": row[1], "params": json.loads(row[2]),
+            "data": json.loads(row[3]), "history": steps}
+
+
+def main():
+    args = sys.argv[1:]
+    kv = dict(a.split("=", 1) for a in args if "=" in a)
+    cmd = args[0] if args and "=" not in args[0] else "list"
+    if cmd == "list":
+        out: Any = flows(kv.get("kind"), unfinished=kv.get("all") not in ("1", "true"))
+    elif cmd == "show" and kv.get("job"):
+        out = history(kv["job"])
+    else:
+        raise SystemExit("Usage: python journal.py list [kind=deposit|withdraw|withdraw_batch] [all=1] | show job=<id>")
+    print(codec.dumps(out))
+
+
+if __name__ == "__main__":
+    profiling.run(main)
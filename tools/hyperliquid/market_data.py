@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+market_data.py — local columnar archive of HL candles, funding rates and sampled mids.
+
+Every series is one (append-mostly) file of little-endian float64 rows with a fixed
+column layout. Reading is an np.memmap reshaped to (rows, cols). No parsing
+happens, slices are views, and only the pages actually touched become resident.
+
+  <HL_ARCHIVE_DIR>/<COIN>/candles_<interval>.f64   t, o, h, l, c, v, n
+  <HL_ARCHIVE_DIR>/<COIN>/funding.f64              t, rate, premium
+  <HL_ARCHIVE_DIR>/<COIN>/mids.f64                 t, mid
+
+Timestamps are epoch ms and strictly increasing within a file. Updates are
+incremental: only intervals after the last stored row are fetched, and only
+closed candles are written. If the file starts later than `days` ago (an
+earlier, shorter download), the missing head is fetched and the file rewritten
+with it first. `update` prints the coverage each series ends up with.
+
+Examples:
+  python market_data.py update coins=BTC,SOL intervals=1h,1d days=365
+  python market_data.py mids coins=BTC,SOL every=5
+  python market_data.py info coins=BTC,SOL
+
+Reader:
+  import market_data as md
+  c = md.candles("BTC", "1h", start_ms=..., end_ms=...)   # (N, 7) read-only view
+  close = c[:, md.CANDLE_COLS.index("c")]
+"""
+
+from __future__ import annotations
+import profiling  # first: --profile also times the imports below
+import os
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+import codec
+
+CANDLE_COLS = ("t", "o", "h", "l", "c", "v", "n")
+FUNDING_COLS = ("t", "rate", "premium")
+MID_COLS = ("t", "mid")
+INTERVAL_MS = {"1m": 60_000, "5m": 300_000, "15m": 900_000, "1h": 3_600_000, "4h": 14_400_000, "1d": 86_400_000}
+DTYPE = np.dtype("<f8")
+
+
+def archive_dir() -> Path:
+    d = os.getenv("HL_ARCHIVE_DIR")
+    return Path(d) if d else Path(__file__).resolve().parents[2] / "backend" / "data" / "hl_archive"
+
+
+def _path(coin: str, series: str) -> Path:
+    return archive_dir() / coin.upper() / f"{series}.f64"
+
+
+# =========================
+# ======== READER =========
+# =========================
+
+def _open(path: Path, ncols: int) -> np.ndarray:
+    if not path.exists() or path.stat().st_size < ncols * DTYPE.itemsize:
+        return np.empty((0, ncols), dtype=DTYPE)
+    rows = path.stat().st_size // (ncols * DTYPE.itemsize)   # ignore a torn trailing row
+    return np.memmap(path, dtype=DTYPE, mode="r", shape=(rows, ncols))
+
+
+def _slice(arr: np.ndarray, start_ms: Optional[int], end_ms: Optional[int]) -> np.ndarray:
+    if len(arr) == 0:
+        return arr
+    t = arr[:, 0]
+    lo = int(np.searchsorted(t, start_ms, side="left")) if start_ms is not None else 0
+    hi = int(np.searchsorted(t, end_ms, side="left")) if end_ms is not None else len(arr)
+    return arr[lo:hi]
+
+
+def candles(coin: str, interval: str, start_ms: Optional[int] = None, end_ms: Optional[int] = None) -> np.ndarray:
+    """Read-only (N, 7) view of candles with start_ms <= t < end_ms."""
+    return _slice(_open(_path(coin, f"candles_{interval}"), len(CANDLE_COLS)), start_ms, end_ms)
+
+
+def funding(coin: str, start_ms: Optional[int] = None, end_ms: Optional[int] = None) -> np.ndarray:
+    """Read-only (N, 3) view of hourly funding prints."""
+    return _slice(_open(_path(coin, "funding"), len(FUNDING_COLS)), start_ms, end_ms)
+
+
+def mids(coin: str, start_ms: Optional[int] = None, end_ms: Optional[int] = None) -> np.ndarray:
+    """Read-only (N, 2) view of sampled mids."""
+    return _slice(_open(_path(coin, "mids"), len(MID_COLS)), start_ms, end_ms)
+
+
+# =========================
+# ======== WRITER =========
+# =========================
+
+@contextmanager
+def _writer_lock(path: Path) -> Iterator[None]:
+    """Exclusive writer lock for one series, held on a <series>.lock sidecar so prepend() can replace the file."""
+    from rate_limiter import file_lock
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path.with_suffix(".lock"), "ab") as lk, file_lock(lk):
+        yield
+
+
+@contextmanager
+def _appender(path: Path, ncols: int) -> Iterator:
+    """Exclusive append handle; trims a torn trailing row left by a crashed writer."""
+    with _writer_lock(path), open(path, "ab") as f:
+        row_bytes = ncols * DTYPE.itemsize
+        size = f.seek(0, os.SEEK_END)
+        if size % row_bytes:
+            f.truncate(size - size % row_bytes)
+        yield f
+        f.flush()
+
+
+def _last_t(path: Path, ncols: int) -> Optional[int]:
+    arr = _open(path, ncols)
+    return int(arr[-1, 0]) if len(arr) else None
+
+
+def _first_t(path: Path, ncols: int) -> Optional[int]:
+    arr = _open(path, ncols)
+    return int(arr[0, 0]) if len(arr) else None
+
+
+def append(path: Path, rows: np.ndarray) -> int:
+    """Append rows whose t is beyond the last stored row. Returns rows written."""
+    rows = np.ascontiguousarray(rows, dtype=DTYPE)
+    if rows.ndim != 2 or len(rows) == 0:
+        return 0
+    with _appender(path, rows.shape[1]) as f:
+        last = _last_t(path, rows.shape[1])
+        if last is not None:
+            rows = rows[rows[:, 0] > last]
+        if len(rows):
+            f.write(rows.tobytes())
+    return len(rows)
+
+
+def prepend(path: Path, rows: np.ndarray) -> int:
+    """
+    Insert rows older than the first stored row (backfill). The series is
+    rewritten to a temp file and swapped in, so open readers keep their old
+    view. Returns rows written.
+    """
+    rows = np.ascontiguousarray(rows, dtype=DTYPE)
+    if rows.ndim != 2 or len(rows) == 0:
+        return 0
+    ncols = rows.shape[1]
+    with _writer_lock(path):
+        old = _open(path, ncols)
+        if len(old):
+            rows = rows[rows[:, 0] < old[0, 0]]
+        if not len(rows):
+            return 0
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "wb") as f:
+            f.write(rows.tobytes())
+            f.write(np.ascontiguousarray(old).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        del old
+        os.replace(tmp, path)
+    return len(rows)
+
+
+# =========================
+# ====== DOWNLOADER =======
+# =========================
+
+def _info():
+    from hyperliquid.info import Info
+    from hyperliquid.utils import constants
+    import rate_limiter
+    rate_limiter.install_sdk_hook()
+    return Info(constants.MAINNET_API_URL, skip_ws=True)
+
+
+def fetch_candles(info, coin: str, interval: str, start_ms: int, end_ms: int) -> np.ndarray:
+    """(N, 7) candle rows, paginated (HL returns at most 5000 candles per call)."""
+    step = INTERVAL_MS[interval]
+    rows: List[List[float]] = []
+    cursor = start_ms
+    while cursor < end_ms:
+        batch = info.candles_snapshot(coin, interval, cursor, end_ms) or []
+        if not batch:
+            break
+        for c in batch:
+            rows.append([c["t"], float(c["o"]), float(c["h"]), float(c["l"]), float(c["c"]),
+                         float(c["v"]), float(c.get("n", 0))])
+        nxt = int(batch[-1]["t"]) + step
+        if nxt <= cursor:
+            break
+        cursor = nxt
+    arr = np.array(rows, dtype=DTYPE).reshape(-1, len(CANDLE_COLS))
+    _, idx = np.unique(arr[:, 0], return_index=True)
+    return arr[idx]
+
+
+def fetch_funding(info, coin: str, start_ms: int, end_ms: int) -> np.ndarray:
+    """(N, 3) funding rows (hourly), paginated (500 per call)."""
+    rows: List[List[float]] = []
+    cursor = start_ms
+    while cursor < end_ms:
+        batch = info.funding_history(coin, cursor, end_ms) or []
+        if not batch:
+            break
+        rows.extend([[r["time"], float(r["fundingRate"]), float(r.get("premium") or 0.0)] for r in batch])
+        nxt = int(batch[-1]["time"]) + 1
+        if nxt <= cursor:
+            break
+        cursor = nxt
+    arr = np.array(rows, dtype=DTYPE).reshape(-1, len(FUNDING_COLS))
+    _, idx = np.unique(arr[:, 0], return_index=True)
+    return arr[idx]
+
+
+def update_candles(info, coin: str, interval: str, days: float = 365.0, now_ms: Optional[int] = None) -> int:
+    """Backfill candles back to now - days if the archive starts later, then append new closed bars."""
+    now_ms = now_ms or int(time.time() * 1000)
+    step = INTERVAL_MS[interval]
+    path = _path(coin, f"candles_{interval}")
+    want_from = now_ms - int(days * 86_400_000)
+    closed_before = now_ms - now_ms % step          # the current bar is still moving
+    n = 0
+    first = _first_t(path, len(CANDLE_COLS))
+    if first is not None and first - want_from >= step:
+        n += prepend(path, fetch_candles(info, coin, interval, want_from, first))
+    last = _last_t(path, len(CANDLE_COLS))
+    start = last + step if last is not None else want_from
+    if start < closed_before:
+        rows = fetch_candles(info, coin, interval, start, closed_before)
+        n += append(path, rows[rows[:, 0] < closed_before])
+    return n
+
+
+def update_funding(info, coin: str, days: float = 365.0, now_ms: Optional[int] = None) -> int:
+    """Same as update_candles for the hourly funding series."""
+    now_ms = now_ms or int(time.time() * 1000)
+    path = _path(coin, "funding")
+    want_from = now_ms - int(days * 86_400_000)
+    n = 0
+    first = _first_t(path, len(FUNDING_COLS))
+    if first is not None and first - want_from >= INTERVAL_MS["1h"]:
+        n += prepend(path, fetch_funding(info, coin, want_from, first))
+    last = _last_t(path, len(FUNDING_COLS))
+    start = last + 1 if last is not None else want_from
+    if start < now_ms:
+        n += append(path, fetch_funding(info, coin, start, now_ms))
+    return n
+
+
+def update(coins: List[str], intervals: List[str], days: float = 365.0, info=None) -> Dict[str, Dict[str, int]]:
+    """Bring the archive up to date for every coin; returns rows appended per series."""
+    info = info or _info()
+    out: Dict[str, Dict[str, int]] = {}
+    for coin in coins:
+        res = {f"candles_{iv}": update_candles(info, coin, iv, days) for iv in intervals}
+        res["funding"] = update_funding(info, coin, days)
+        out[coin] = res
+    return out
+
+
+def sample_mids(coins: List[str], every_s: float = 5.0, info=None, iterations: Optional[int] = None) -> None:
+    """Append one mid per coin every `every_s` seconds (coins=['*'] archives every listed coin)."""
+    info = info or _info()
+    n = 0
+    while iterations is None or n < iterations:
+        t0 = time.time()
+        try:
+            allm = info.all_mids()
+        except Exception as e:
+            print(f"[market_data] all_mids failed: {e}", file=sys.stderr)
+            allm = {}
+        ts = float(int(t0 * 1000))
+        for coin in (list(allm) if coins == ["*"] else coins):
+            px = allm.get(coin)
+            if px is not None and not coin.startswith("@"):
+                append(_path(coin, "mids"), np.array([[ts, float(px)]]))
+        n += 1
+        time.sleep(max(0.0, every_s - (time.time() - t0)))
+
+
+def describe(coin: str) -> Dict[str, Dict[str, object]]:
+    out: Dict[str, Dict[str, object]] = {}
+    d = archive_dir() / coin.upper()
+    for p in sorted(d.glob("*.f64")) if d.exists() else []:
+        ncols = len(CANDLE_COLS) if p.stem.startswith("candles_") else (
+            len(FUNDING_COLS) if p.stem == "funding" else len(MID_COLS))
+        arr = _open(p, ncols)
+        out[p.stem] = {"rows": int(len(arr)), "bytes": p.stat().st_size,
+                       "firstMs": int(arr[0, 0]) if len(arr) else None,
+                       "lastMs": int(arr[-1, 0]) if len(arr) else None}
+    return out
+
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    cmd = args[0] if args else "info"
+    kv = dict(a.split("=", 1) for a in args[1:] if "=" in a)
+    coins = [c.strip() for c in kv.get("coins", "BTC,SOL").split(",") if c.strip()]
+    if cmd == "update":
+        intervals = [i.strip() for i in kv.get("intervals", "1h").split(",") if i.strip()]
+        bad = [i for i in intervals if i not in INTERVAL_MS]
+        if bad:
+            raise SystemExit(f"Unknown interval(s) {bad}; expected one of {list(INTERVAL_MS)}")
+        res = update(coins, intervals, float(kv.get("days", 365)))
+        print(codec.dumps({"archive": str(archive_dir()), "appended": res,
+                           "coverage": {c: describe(c) for c in coins}}))
+    elif cmd == "mids":
+        try:
+            sample_mids(coins, float(kv.get("every", 5)))
+        except KeyboardInterrupt:
+            pass
+    elif cmd == "info":
+        print(codec.dumps({"archive": str(archive_dir()), "coins": {c: describe(c) for c in coins}}))
+    else:
+        raise SystemExit("Usage: market_data.py update|mids|info coins=BTC,SOL [intervals=1h] [days=365] [every=5]")
+
+
+if __name__ == "__main__":
+    profiling.run(main)
@@ -0,0 +1,133 @@
+"""
+multi_sig.py — one-round signature collection for multi-sig (treasury) actions.
+
+A multi-sig action needs one inner signature per authorized user plus the outer
+signer's envelope. Signing them one by one with the SDK helpers also re-hashes
+the action (msgpack + keccak + EIP-712 encoding) for every wallet, although
+that part does not depend on the wallet. Here:
+
+  - the authorized wallets from config.json are loaded once per process
+    (example_utils.setup_multi_sig_wallets is cached)
+  - the typed-data message is encoded ONCE per action
+  - only the ECDSA step runs per wallet, concurrently on a thread pool, or on a
+    process pool (keys loaded once per worker) when the signing backend is
+    pure Python and there are many signers
+  - sign + exchange.multi_sig() are assembled in one call: submit()
+
+Usage:
+  ms = multi_sig.MultiSig(exchange, multi_sig_user="0x...")
+  ms.submit({"type": "order", "orders": [...], "grouping": "na"})          # L1 action
+  ms.submit_user_signed({"type": "usdSend", "destination": "0x...", "amount": "5", "time": ts},
+                        USD_SEND_SIGN_TYPES, "HyperliquidTransaction:UsdSend")
+"""
+
+from __future__ import annotations
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence
+
+from eth_account import Account
+from eth_account.messages import encode_typed_data
+from eth_utils import to_hex
+from hyperliquid.utils.constants import MAINNET_API_URL
+from hyperliquid.utils.signing import (
+    action_hash,
+    add_multi_sig_fields,
+    add_multi_sig_types,
+    construct_phantom_agent,
+    l1_payload,
+    user_signed_payload,
+)
+
+import example_utils
+import nonces
+
+SIGNATURE_CHAIN_ID = "0x66eee"
+
+_pools: Dict[Any, Executor] = {}
+_worker_wallets: List[Any] = []
+
+
+def _sig(signed) -> Dict[str, Any]:
+    return {"r": to_hex(signed["r"]), "s": to_hex(signed["s"]), "v": signed["v"]}
+
+
+def _init_worker(keys: Sequence[bytes]) -> None:
+    global _worker_wallets
+    _worker_wallets = [Account.from_key(k) for k in keys]
+
+
+def _sign_in_worker(i: int, message) -> Dict[str, Any]:
+    return _sig(_worker_wallets[i].sign_message(message))
+
+
+class MultiSig:
+    """Signs actions for `multi_sig_user` with every authorized wallet; `exchange` is the outer signer."""
+
+    def __init__(self, exchange, multi_sig_user: str, wallets: Optional[Sequence] = None,
+                 processes: bool = False, workers: Optional[int] = None):
+        self.exchange = exchange
+        self.multi_sig_user = multi_sig_user.lower()
+        self.wallets = list(wallets) if wallets is not None else example_utils.setup_multi_sig_wallets()
+        if not self.wallets:
+            raise ValueError("no authorized multi-sig wallets configured")
+        self.outer_signer = exchange.wallet.address.lower()
+        self.is_mainnet = exchange.base_url == MAINNET_API_URL
+        self.processes = processes
+        self.workers = workers or min(len(self.wallets), os.cpu_count() or 4)
+
+    # ---- signing ----
+    def _pool(self) -> Executor:
+        key = ("proc" if self.processes else "thread", tuple(w.address for w in self.wallets), self.workers)
+        pool = _pools.get(key)
+        if pool is None:
+            if self.processes:
+                pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                           initargs=([bytes(w.key) for w in self.wallets],))
+            else:
+                pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="multisig")
+            _pools[key] = pool
+        return pool
+
+    def _sign_all(self, message) -> List[Dict[str, Any]]:
+        """One signature per authorized wallet over an already-encoded message, in wallet order."""
+        if len(self.wallets) == 1:
+            return [_sig(self.wallets[0].sign_message(message))]
+        pool = self._pool()
+        if self.processes:
+            futs = [pool.submit(_sign_in_worker, i, message) for i in range(len(self.wallets))]
+        else:
+            futs = [pool.submit(lambda w=w: _sig(w.sign_message(message))) for w in self.wallets]
+        return [f.result() for f in futs]
+
+    def sign_l1(self, action: Dict[str, Any], nonce: int, vault_address: Optional[str] = None,
+                expires_after: Optional[int] = None) -> List[Dict[str, Any]]:
+        envelope = [self.multi_sig_user, self.outer_signer, action]
+        h = action_hash(envelope, vault_address, nonce, expires_after)
+        message = encode_typed_data(full_message=l1_payload(construct_phantom_agent(h, self.is_mainnet)))
+        return self._sign_all(message)
+
+    def sign_user_signed(self, action: Dict[str, Any], sign_types: List[Dict[str, str]],
+                         primary_type: str) -> List[Dict[str, Any]]:
+        """`action` must already carry signatureChainId / hyperliquidChain (see submit_user_signed)."""
+        envelope = add_multi_sig_fields(action, self.multi_sig_user, self.outer_signer)
+        data = user_signed_payload(primary_type, add_multi_sig_types(sign_types), envelope)
+        return self._sign_all(encode_typed_data(full_message=data))
+
+    # ---- sign + send ----
+    def submit(self, action: Dict[str, Any], nonce: Optional[int] = None,
+               vault_address: Optional[str] = None) -> Any:
+        """Sign an L1 action (order, cancel, updateLeverage, ...) with all wallets and send it."""
+        nonce = nonce or nonces.next_nonce(self.outer_signer)
+        expires_after = getattr(self.exchange, "expires_after", None)
+        sigs = self.sign_l1(action, nonce, vault_address, expires_after)
+        return self.exchange.multi_sig(self.multi_sig_user, action, sigs, nonce, vault_address)
+
+    def submit_user_signed(self, action: Dict[str, Any], sign_types: List[Dict[str, str]], primary_type: str,
+                           nonce: Optional[int] = None) -> Any:
+        """Sign a user-signed action (usdSend, spotSend, withdraw3, ...) with all wallets and send it."""
+        action = {**action, "signatureChainId": SIGNATURE_CHAIN_ID,
+                  "hyperliquidChain": "Mainnet" if self.is_mainnet else "Testnet"}
+        nonce = nonce or int(action.get("time") or action.get("nonce") or 0) or nonces.next_nonce(self.outer_signer)
+        sigs = self.sign_user_signed(action, sign_types, primary_type)
+        return self.exchange.multi_sig(self.multi_sig_user, action, sigs, nonce)
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+nav.py — one-shot, concurrent NAV breakdown across the vault wallets.
+
+Everything is fetched at once on a thread pool:
+  - HL perps clearinghouseState and spotClearinghouseState for every wallet
+  - HL allMids (values WBTC / ETH / spot tokens)
+  - Arbitrum: ETH, USDC and WBTC balances of every wallet in ONE Multicall3
+    aggregate3 eth_call, which also returns the block number and timestamp
+So a refresh costs about one round trip (the slowest of the requests), not
+one process per source.
+
+Examples:
+  python nav.py                                   # wallets from WALLET_RECIPIENT_A / WALLET_RECIPIENT_B
+  python nav.py wallets=A:0xabc...,B:0xdef...
+  python nav.py pretty=1                          # indented JSON (default compact, see codec.py)
+
+Env: ARB_RPC / ARBITRUM_ALCHEMY_MAINNET, USDC_ADDRESS, WBTC_ADDRESS (Arbitrum defaults below).
+"""
+
+from __future__ import annotations
+import profiling  # first: --profile also times the imports below
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import requests
+from dotenv import load_dotenv
+from web3 import Web3
+
+import codec
+import rate_limiter
+from account_state import AccountState
+
+load_dotenv(dotenv_path=Path(__file__).resolve().parents[2] / ".env")
+
+INFO_URL = "https://api.hyperliquid.xyz/info"
+ARB_RPC = os.getenv("ARB_RPC") or os.getenv("ARBITRUM_ALCHEMY_MAINNET")
+MULTICALL3 = Web3.to_checksum_address("0xcA11bde05779ba9813Ee2C6e6E62bBa3Da7F7Ea3")
+TOKENS = {
+    "USDC": Web3.to_checksum_address(os.getenv("USDC_ADDRESS") or "0xaf88d065e77c8cC2239327C5EDb3A432268e5831"),
+    "WBTC": Web3.to_checksum_address(os.getenv("WBTC_ADDRESS") or "0x2f2a2543B76A4166549F7aaB2e75Bef0aefC5B0f"),
+}
+PRICE_COIN = {"USDC": None, "WBTC": "BTC", "ETH": "ETH"}   # None => $1
+
+MULTICALL_ABI = json.loads("""
+[
+  {"inputs":[{"components":[{"internalType":"address","name":"target","type":"address"},{"internalType":"bool","name":"allowFailure","type":"bool"},{"internalType":"bytes","name":"callData","type":"bytes"}],"internalType":"struct Multicall3.Call3[]","name":"calls","type":"tuple[]"}],"name":"aggregate3","outputs":[{"components":[{"internalType":"bool","name":"success","type":"bool"},{"internalType":"bytes","name":"returnData","type":"bytes"}],"internalType":"struct Multicall3.Result[]","name":"returnData","type":"tuple[]"}],"stateMutability":"payable","type":"function"}
+]
+""")
+SEL_BALANCE_OF = bytes.fromhex("70a08231")
+SEL_DECIMALS = bytes.fromhex("313ce567")
+SEL_ETH_BALANCE = bytes.fromhex("4d2301cc")
+SEL_BLOCK_NUMBER = bytes.fromhex("42cbb15c")
+SEL_BLOCK_TS = bytes.fromhex("0f28c97d")
+
+_session = requests.Session()
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def post_info(payload: dict) -> Any:
+    rate_limiter.acquire(rate_limiter.request_weight("/info", payload))
+    r = _session.post(INFO_URL, headers={"content-type": "application/json"}, json=payload, timeout=15)
+    if r.status_code == 429:
+        rate_limiter.note_throttled()
+    r.raise_for_status()
+    return codec.response(r)
+
+
+# =========================
+# ======= FETCHERS ========
+# =========================
+
+def hl_perps(address: str) -> Dict[str, Any]:
+    st = AccountState.from_user_state(post_info({"type": "clearinghouseState", "user": address}))
+    return {
+        "fetchedAt": _now_ms(),
+        "accountValue": st.account_value,
+        "totalMarginUsed": st.total_margin_used,
+        "withdrawable": st.withdrawable,
+        "positionValue": sum(p.position_value for p in st.positions),
+        "unrealizedPnl": st.total_unrealized_pnl,
+        "positions": {p.coin: p.szi for p in st.positions},
+    }
+
+
+def hl_spot(address: str) -> Dict[str, Any]:
+    data = post_info({"type": "spotClearinghouseState", "user": address})
+    bal = {b.get("coin"): float(b.get("total", 0) or 0) for b in data.get("balances", []) if float(b.get("total", 0) or 0)}
+    return {"fetchedAt": _now_ms(), "balances": bal}
+
+
+def hl_mids() -> Dict[str, float]:
+    return {k: float(v) for k, v in (post_info({"type": "allMids"}) or {}).items()}
+
+
+def _word(addr: str) -> bytes:
+    return bytes(12) + bytes.fromhex(addr[2:])
+
+
+def arb_balances(w3: Web3, wallets: Dict[str, str]) -> Dict[str, Any]:
+    """ETH + ERC-20 balances of every wallet, token decimals, block number/time: one eth_call."""
+    mc = w3.eth.contract(address=MULTICALL3, abi=MULTICALL_ABI)
+    calls: List[Tuple[str, bool, bytes]] = [(MULTICALL3, False, SEL_BLOCK_NUMBER), (MULTICALL3, False, SEL_BLOCK_TS)]
+    keys: List[Tuple[str, str]] = []
+    for sym, tok in TOKENS.items():
+        calls.append((tok, True, SEL_DECIMALS))
+        keys.append(("decimals", sym))
+    for label, addr in wallets.items():
+        calls.append((MULTICALL3, True, SEL_ETH_BALANCE + _word(addr)))
+        keys.append((label, "ETH"))
+        for sym, tok in TOKENS.items():
+            calls.append((tok, True, SEL_BALANCE_OF + _word(addr)))
+            keys.append((label, sym))
+
+    res = mc.functions.aggregate3(calls).call()
+    block = int.from_bytes(res[0][1], "big")
+    block_ts = int.from_bytes(res[1][1], "big")
+    raw: Dict[Tuple[str, str], int | None] = {}
+    for (label, sym), (ok, data) in zip(keys, res[2:]):
+        raw[(label, sym)] = int.from_bytes(data, "big") if ok and data else None
+
+    decimals = {sym: raw.get(("decimals", sym)) or 0 for sym in TOKENS}
+    decimals["ETH"] = 18
+    out: Dict[str, Dict[str, float | None]] = {}
+    for label in wallets:
+        out[label] = {}
+        for sym in ("ETH", *TOKENS):
+            v = raw.get((label, sym))
+            out[label][sym] = float(Decimal(v) / (Decimal(10) ** decimals[sym])) if v is not None else None
+    return {"fetchedAt": _now_ms(), "block": block, "blockTime": block_ts, "balances": out}
+
+
+# =========================
+# ========= NAV ===========
+# =========================
+
+def compute_nav(wallets: Dict[str, str], w3: Web3 | None = None) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    started = _now_ms()
+    jobs: Dict[str, Any] = {}
+    with ThreadPoolExecutor(max_workers=2 * len(wallets) + 2, thread_name_prefix="nav") as pool:
+        jobs["mids"] = pool.submit(hl_mids)
+        if w3 is not None:
+            jobs["arb"] = pool.submit(arb_balances, w3, wallets)
+        for label, addr in wallets.items():
+            jobs[f"perps:{label}"] = pool.submit(hl_perps, addr)
+            jobs[f"spot:{label}"] = pool.submit(hl_spot, addr)
+
+        results: Dict[str, Any] = {}
+        errors: Dict[str, str] = {}
+        for k, fut in jobs.items():
+            try:
+                results[k] = fut.result()
+            except Exception as e:
+                errors[k] = f"{type(e).__name__}: {e}"
+
+    mids = results.get("mids") or {}
+
+    def _px(sym: str) -> float | None:
+        coin = PRICE_COIN.get(sym, sym)
+        return 1.0 if coin is None else mids.get(coin)
+
+    hl: Dict[str, Any] = {}
+    tot = {"hlEquityUsd": 0.0, "hlSpotUsd": 0.0, "arbUsd": 0.0}
+    for label, addr in wallets.items():
+        perps = results.get(f"perps:{label}")
+        spot = results.get(f"spot:{label}")
+        spot_usd = 0.0
+        if spot:
+            for coin, amt in spot["balances"].items():
+                px = _px(coin)
+                spot_usd += amt * px if px is not None else 0.0
+        hl[label] = {"address": addr, "perps": perps, "spot": spot, "spotUsd": spot_usd}
+        tot["hlEquityUsd"] += perps["accountValue"] if perps else 0.0
+        tot["hlSpotUsd"] += spot_usd
+
+    arb = results.get("arb")
+    if arb:
+        for label, bals in arb["balances"].items():
+            usd = sum((amt or 0.0) * (_px(sym) or 0.0) for sym, amt in bals.items())
+            arb["balances"][label] = {**bals, "usd": usd}
+            tot["arbUsd"] += usd
+
+    tot["navUsd"] = tot["hlEquityUsd"] + tot["hlSpotUsd"] + tot["arbUsd"]
+    return {
+        "ts": _now_ms(),
+        "startedAt": started,
+        "latencyMs": round((time.perf_counter() - t0) * 1000, 1),
+        "complete": not errors,
+        "prices": {sym: _px(sym) for sym in ("USDC", "WBTC", "ETH")},
+        "hl": hl,
+        "arbitrum": arb,
+        "totals": tot,
+        "errors": errors,
+    }
+
+
+def _wallets_from(arg: str | None) -> Dict[str, str]:
+    if arg:
+        pairs = [p.split(":", 1) if ":" in p else (f"W{i}", p) for i, p in enumerate(arg.split(","))]
+        return {lbl.strip(): Web3.to_checksum_address(a.strip()) for lbl, a in pairs}
+    out = {}
+    for label, env in (("A", "WALLET_RECIPIENT_A"), ("B", "WALLET_RECIPIENT_B")):
+        if os.getenv(env):
+            out[label] = Web3.to_checksum_address(os.getenv(env))
+    return out
+
+
+def main():
+    kv = dict(a.split("=", 1) for a in sys.argv[1:] if "=" in a and not a.startswith("--"))
+    wallets = _wallets_from(kv.get("wallets"))
+    if not wallets:
+        raise SystemExit("No wallets: pass wallets=A:0x...,B:0x... or set WALLET_RECIPIENT_A/B")
+    w3 = None
+    if ARB_RPC:
+        w3 = Web3(Web3.HTTPProvider(ARB_RPC, request_kwargs={"timeout": 15}))
+    else:
+        print("[nav] ARB_RPC not set; skipping Arbitrum balances", file=sys.stderr)
+    if "pretty" in kv:
+        codec.PRETTY = kv["pretty"].lower() in ("1", "true", "yes", "y", "on")
+    nav = compute_nav(wallets, w3)
+    print(codec.dumps(nav))
+
+
+if __name__ == "__main__":
+    profiling.run(main)
@@ -0,0 +1,89 @@
+"""
+nonces.py — host-wide monotonic nonce allocator, one sequence per signer.
+
+HL nonces are millisecond timestamps. Per signer, each must be unique and
+larger than the smallest of that signer's 100 most recent nonces, and it must
+lie within (T - 2d, T + 1d). Two processes signing for the same key in the same
+millisecond would collide. So every allocation goes through a small
+file-locked state file (rate_limiter.locked_json):
+
+  nonce = max(now_ms, last[signer] + 1)
+
+Allocation is a lock plus a few bytes of I/O (tens of µs). Processes never
+wait on each other's HTTP requests, only on that critical section.
+
+install_sdk_hook() makes the SDK's Exchange draw its nonces here. The signer
+is the wallet of the Exchange making the call (bind_signer), or "default".
+
+Env: HL_NONCE_STATE (default <tmp>/hl_nonces.json)
+"""
+
+from __future__ import annotations
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from rate_limiter import locked_json
+
+_local = threading.local()
+_STALE_MS = 3 * 86_400_000     # forget signers idle for longer than HL's nonce window
+
+
+def _state_path() -> str:
+    return os.getenv("HL_NONCE_STATE") or os.path.join(tempfile.gettempdir(), "hl_nonces.json")
+
+
+def next_nonce(signer: Optional[str] = None) -> int:
+    """Strictly increasing ms nonce for `signer`, unique across every process on the host."""
+    key = (signer or "default").lower()
+    with locked_json(_state_path()) as st:
+        now = int(time.time() * 1000)
+        last = st.get("last") or {}
+        nonce = max(now, int(last.get(key, 0)) + 1)
+        last[key] = nonce
+        st["last"] = {k: v for k, v in last.items() if now - int(v) < _STALE_MS}
+    return nonce
+
+
+def next_slot(name: str, n: int) -> int:
+    """Host-wide round-robin counter in [0, n): spreads concurrent processes over a pool."""
+    if n <= 1:
+        return 0
+    with locked_json(_state_path()) as st:
+        rr = st.get("rr") or {}
+        i = int(rr.get(name, -1)) + 1
+        rr[name] = i % n
+        st["rr"] = rr
+    return i % n
+
+
+@contextmanager
+def bind_signer(signer: Optional[str]) -> Iterator[None]:
+    """Nonces drawn by the SDK on this thread belong to `signer` until exit."""
+    prev = getattr(_local, "signer", None)
+    _local.signer = signer
+    try:
+        yield
+    finally:
+        _local.signer = prev
+
+
+def current_signer() -> Optional[str]:
+    return getattr(_local, "signer", None)
+
+
+def install_sdk_hook() -> None:
+    """Replace the SDK's get_timestamp_ms (the nonce source in Exchange) with next_nonce()."""
+    import hyperliquid.exchange as hl_exchange
+
+    if getattr(hl_exchange.get_timestamp_ms, "_hl_nonce", False):
+        return
+
+    def get_timestamp_ms() -> int:
+        return next_nonce(current_signer())
+
+    get_timestamp_ms._hl_nonce = True  # type: ignore[attr-defined]
+    hl_exchange.get_timestamp_ms = get_timestamp_ms
@@ -0,0 +1,289 @@
+"""
+order_book.py — cached L2 books and book-walking math for Hyperliquid perps.
+
+BookCache keeps the last `l2_snapshot` per coin for a short TTL, so a sliced
+execution (execution.py) can size every child from book depth without
+re-fetching the book for each decision. With `shared_path` the snapshots are
+also kept in a file-locked cache, so separate CLI processes (create_orders.py
+quote, spawned per keeper decision) share one fetch per coin per TTL.
+
+quote() is the pre-trade estimate: expected average fill, impact and the
+largest size that stays inside a slippage budget, from one snapshot.
+
+Also holds the tick/lot rounding rules HL enforces on orders:
+  - size: at most szDecimals decimals
+  - price: at most 5 significant figures and (6 - szDecimals) decimals
+"""
+
+from __future__ import annotations
+import math
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+MIN_ORDER_NOTIONAL_USD = 10.0   # HL rejects orders below $10 notional
+
+
+class Book:
+    """One L2 snapshot. bids descending, asks ascending; each level is (px, sz)."""
+
+    __slots__ = ("coin", "bids", "asks", "time", "fetched_at")
+
+    def __init__(self, coin: str, bids: List[Tuple[float, float]], asks: List[Tuple[float, float]],
+                 ts: Optional[int] = None):
+        self.coin = coin
+        self.bids = bids
+        self.asks = asks
+        self.time = ts
+        self.fetched_at = time.time()
+
+    @classmethod
+    def from_snapshot(cls, coin: str, snap: Dict[str, Any], fetched_at: Optional[float] = None) -> "Book":
+        levels = snap.get("levels") or [[], []]
+        bids = [(float(l["px"]), float(l["sz"])) for l in (levels[0] if len(levels) > 0 else [])]
+        asks = [(float(l["px"]), float(l["sz"])) for l in (levels[1] if len(levels) > 1 else [])]
+        book = cls(coin, bids, asks, snap.get("time"))
+        if fetched_at is not None:
+            book.fetched_at = fetched_at
+        return book
+
+    def to_snapshot(self) -> Dict[str, Any]:
+        """The l2Book shape again (for the shared cache)."""
+        return {"coin": self.coin, "time": self.time,
+                "levels": [[{"px": px, "sz": sz} for px, sz in self.bids],
+                           [{"px": px, "sz": sz} for px, sz in self.asks]]}
+
+    @property
+    def best_bid(self) -> Optional[float]:
+        return self.bids[0][0] if self.bids else None
+
+    @property
+    def best_ask(self) -> Optional[float]:
+        return self.asks[0][0] if self.asks else None
+
+    @property
+    def mid(self) -> Optional[float]:
+        if self.bids and self.asks:
+            return (self.bids[0][0] + self.asks[0][0]) / 2.0
+        return self.best_bid or self.best_ask
+
+    def side(self, is_buy: bool) -> List[Tuple[float, float]]:
+        """Levels a taker consumes: asks for a buy, bids for a sell."""
+        return self.asks if is_buy else self.bids
+
+
+# Function to walk the book for a taker order
+def walk(book: Book, is_buy: bool, size: float) -> Dict[str, Any]:
+    """
+    Expected fill of a `size` taker order against the snapshot.
+    Returns avgPx, filled size, worstPx (last level touched) and whether the book was exhausted.
+    """
+    remaining = abs(float(size))
+    cost = 0.0
+    worst = None
+    for px, sz in book.side(is_buy):
+        if remaining <= 0:
+            break
+        take = min(sz, remaining)
+        cost += take * px
+        remaining -= take
+        worst = px
+    filled = abs(float(size)) - remaining
+    return {
+        "avgPx": cost / filled if filled > 0 else None,
+        "filled": filled,
+        "worstPx": worst,
+        "exhausted": remaining > 1e-12,
+    }
+
+
+# Function to measure liquidity inside a price band
+def depth_within(book: Book, is_buy: bool, slippage_frac: float, ref_px: Optional[float] = None) -> float:
+    """Total size resting between the touch and ref_px * (1 ± slippage_frac)."""
+    ref = ref_px if ref_px is not None else book.mid
+    if not ref:
+        return 0.0
+    bound = ref * (1 + slippage_frac) if is_buy else ref * (1 - slippage_frac)
+    total = 0.0
+    for px, sz in book.side(is_buy):
+        if (is_buy and px > bound) or (not is_buy and px < bound):
+            break
+        total += sz
+    return total
+
+
+def quote(book: Book, is_buy: bool, size: Optional[float] = None, slippage_frac: float = 0.01,
+          ref_px: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Pre-trade estimate for a taker order against one snapshot (nothing is sent).
+
+      maxSize     size an IOC limited at ref * (1 ± slippage_frac) fills completely:
+                  all depth up to that price (what open/close with the same slippage get)
+      maxSizeAvg  largest size whose AVERAGE fill stays within slippage_frac of ref
+                  (a wider limit, e.g. a sliced order, can go this deep)
+      for `size`: avgPx, impactBps (average vs ref, adverse positive), worstPx,
+                  filled / exhausted, and fillsAtLimit (size <= maxSize)
+    """
+    ref = ref_px if ref_px is not None else book.mid
+    lv = np.asarray(book.side(is_buy), dtype=float).reshape(-1, 2)
+    px, sz = lv[:, 0], lv[:, 1]
+    cum_sz = np.cumsum(sz)
+    cum_cost = np.cumsum(px * sz)
+    sign = 1.0 if is_buy else -1.0
+    out: Dict[str, Any] = {
+        "mid": book.mid, "ref": ref, "bestBid": book.best_bid, "bestAsk": book.best_ask,
+        "spreadBps": ((book.best_ask - book.best_bid) / book.mid * 1e4
+                      if book.best_bid and book.best_ask and book.mid else None),
+        "levels": int(len(px)), "bookDepth": float(cum_sz[-1]) if len(px) else 0.0,
+        "bookAgeMs": int((time.time() - book.fetched_at) * 1000),
+    }
+    if not ref or not len(px):
+        return {**out, "maxSize": 0.0, "maxSizeAvg": 0.0}
+
+    bound = ref * (1 + sign * slippage_frac)
+    in_band = sign * (px - bound) <= 1e-12                       # prefix: levels are sorted
+    out["maxSize"] = float(sz[in_band].sum())
+
+    # average fill after each full level; the first level that breaks the budget is taken partially
+    avg = cum_cost / cum_sz
+    over = np.flatnonzero(sign * (avg - bound) > 1e-12)
+    if len(over) == 0:
+        out["maxSizeAvg"] = float(cum_sz[-1])
+    else:
+        k = int(over[0])
+        s0 = float(cum_sz[k - 1]) if k > 0 else 0.0
+        c0 = float(cum_cost[k - 1]) if k > 0 else 0.0
+        out["maxSizeAvg"] = s0 + max(0.0, (bound * s0 - c0) / (px[k] - bound))
+
+    if size is not None and size > 0:
+        want = float(size)
+        k = min(int(np.searchsorted(cum_sz, want - 1e-12)), len(px) - 1)
+        filled = min(want, float(cum_sz[-1]))
+        s0 = float(cum_sz[k - 1]) if k > 0 else 0.0
+        c0 = float(cum_cost[k - 1]) if k > 0 else 0.0
+        avg_px = (c0 + (filled - s0) * px[k]) / filled
+        out.update({
+            "size": want,
+            "avgPx": float(avg_px),
+            "impactBps": float(sign * (avg_px / ref - 1.0) * 1e4),
+            "worstPx": float(px[k]),
+            "worstBps": float(sign * (px[k] / ref - 1.0) * 1e4),
+            "filled": filled,
+            "exhausted": want > float(cum_sz[-1]) + 1e-12,
+            "fillsAtLimit": want <= out["maxSize"] + 1e-12,
+            "notionalUsd": float(filled * avg_px),
+        })
+    return out
+
+
+def _shared_path() -> str:
+    return os.getenv("HL_BOOK_CACHE") or os.path.join(tempfile.gettempdir(), "hl_books.json")
+
+
+class BookCache:
+    """
+    Per-coin L2 snapshots with a short TTL (thread-safe). `shared_path` adds a
+    file-locked cache shared by every process on the host (rate_limiter.locked_json).
+    """
+
+    def __init__(self, info, ttl_s: float = 1.0, shared_path: Optional[str] = None):
+        self.info = info
+        self.ttl_s = ttl_s
+        self.shared_path = shared_path
+        self._books: Dict[str, Book] = {}
+        self._lock = threading.Lock()
+
+    def _from_shared(self, coins: Iterable[str], ttl: float) -> Dict[str, Book]:
+        from rate_limiter import locked_json
+        now = time.time()
+        with locked_json(self.shared_path) as st:
+            for c in [c for c, e in st.items() if now - float(e.get("ts", 0)) > 60]:
+                st.pop(c, None)                     # forget coins nobody asked for in a minute
+            hits = {c: st[c] for c in coins if c in st and now - float(st[c]["ts"]) < ttl}
+        return {c: Book.from_snapshot(c, e["snap"], float(e["ts"])) for c, e in hits.items()}
+
+    def _to_shared(self, books: Dict[str, Book]) -> None:
+        from rate_limiter import locked_json
+        with locked_json(self.shared_path) as st:
+            for c, b in books.items():
+                st[c] = {"ts": b.fetched_at, "snap": b.to_snapshot()}
+
+    def get(self, coin: str, max_age_s: Optional[float] = None) -> Book:
+        return self.get_many([coin], max_age_s)[coin]
+
+    def get_many(self, coins: Iterable[str], max_age_s: Optional[float] = None,
+                 workers: int = 8) -> Dict[str, Book]:
+        """Books for every coin: memory, then the shared cache, then one concurrent fetch of the rest."""
+        ttl = self.ttl_s if max_age_s is None else max_age_s
+        coins = list(dict.fromkeys(coins))
+        now = time.time()
+        with self._lock:
+            out = {c: self._books[c] for c in coins if c in self._books and now - self._books[c].fetched_at < ttl}
+        missing = [c for c in coins if c not in out]
+        if missing and self.shared_path:
+            out.update(self._from_shared(missing, ttl))
+            missing = [c for c in coins if c not in out]
+        fetched: Dict[str, Book] = {}
+        if len(missing) == 1:
+            fetched[missing[0]] = Book.from_snapshot(missing[0], self.info.l2_snapshot(missing[0]))
+        elif missing:
+            with ThreadPoolExecutor(max_workers=min(workers, len(missing)), thread_name_prefix="l2") as pool:
+                for c, snap in zip(missing, pool.map(self.info.l2_snapshot, missing)):
+                    fetched[c] = Book.from_snapshot(c, snap)
+        if fetched and self.shared_path:
+            self._to_shared(fetched)
+        out.update(fetched)
+        with self._lock:
+            self._books.update(out)
+        return {c: out[c] for c in coins}
+
+    def invalidate(self, coin: Optional[str] = None) -> None:
+        with self._lock:
+            if coin is None:
+                self._books.clear()
+            else:
+                self._books.pop(coin, None)
+
+
+def shared_cache(info, ttl_s: Optional[float] = None) -> BookCache:
+    """BookCache backed by HL_BOOK_CACHE (default <tmp>/hl_books.json), TTL HL_BOOK_TTL (default 2s)."""
+    ttl = float(os.getenv("HL_BOOK_TTL") or 2.0) if ttl_s is None else ttl_s
+    return BookCache(info, ttl_s=ttl, shared_path=_shared_path())
+
+
+# =========================
+# ===== TICK / LOT ========
+# =========================
+
+def sz_decimals(info, coin: str) -> int:
+    """szDecimals from the SDK's meta cache (falls back to 4)."""
+    try:
+        return int(info.asset_to_sz_decimals[info.name_to_asset(coin)])
+    except Exception:
+        return 4
+
+
+def round_sz(info, coin: str, sz: float, up: bool = False) -> float:
+    dec = sz_decimals(info, coin)
+    q = 10 ** dec
+    v = math.ceil(sz * q - 1e-9) if up else math.floor(sz * q + 1e-9)
+    return v / q
+
+
+def round_px(info, coin: str, px: float) -> float:
+    return round(float(f"{px:.5g}"), max(0, 6 - sz_decimals(info, coin)))
+
+
+def limit_px_for(info, coin: str, is_buy: bool, ref_px: float, slippage_frac: float) -> float:
+    """Aggressive IOC limit price bounded by slippage_frac around ref_px."""
+    px = ref_px * (1 + slippage_frac) if is_buy else ref_px * (1 - slippage_frac)
+    return round_px(info, coin, px)
+
+
+def min_order_sz(info, coin: str, px: float) -> float:
+    return round_sz(info, coin, MIN_ORDER_NOTIONAL_USD * 1.01 / px, up=True)
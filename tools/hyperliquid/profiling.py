@@ -0,0 +1,225 @@
+"""
+profiling.py — opt-in CPU profiling for the tools/hyperliquid entry points.
+
+Every script imports this module *first* and runs its main() through run().
+Nothing happens unless the command line carries a profile flag:
+
+  python create_orders.py summary --profile               # same as --profile=cprofile
+  python create_orders.py summary --profile=cprofile      # deterministic, <name>.pstats
+  python withdraw_HL.py 25 --profile=sampling             # stack sampler, <name>.speedscope.json
+
+The flag is removed from sys.argv at import time, so the scripts' own argument
+parsing never sees it. Both modes also write <name>.imports.txt, an import-time
+breakdown in the same layout as `python -X importtime`.
+
+Artifacts go to LOG_DIR (default: backend/logs, next to the keeper/server logs).
+HL_PROFILE_INTERVAL_MS tunes the sampler period (default 2 ms).
+"""
+
+from __future__ import annotations
+import builtins
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+MODES = ("cprofile", "sampling")
+
+
+def _pop_profile_flag(argv: List[str]) -> Optional[str]:
+    """Strip --profile[=mode] from argv and return the requested mode (or None)."""
+    mode = None
+    keep = []
+    for a in argv:
+        if a == "--profile":
+            mode = "cprofile"
+        elif a.startswith("--profile="):
+            mode = a.split("=", 1)[1].strip().lower() or "cprofile"
+        else:
+            keep.append(a)
+    if mode is not None and mode not in MODES:
+        print(f"[profile] unknown mode {mode!r}, expected one of {MODES}; using cprofile", file=sys.stderr)
+        mode = "cprofile"
+    argv[:] = keep
+    return mode
+
+
+MODE: Optional[str] = _pop_profile_flag(sys.argv)
+
+
+def _log_dir() -> Path:
+    d = os.getenv("LOG_DIR")
+    path = Path(d) if d else Path(__file__).resolve().parents[2] / "backend" / "logs"
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def _artifact_base() -> Path:
+    script = Path(sys.argv[0]).stem if sys.argv and sys.argv[0] else "python"
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    return _log_dir() / f"{script}-{stamp}-{os.getpid()}.profile"
+
+
+# =========================
+# ===== IMPORT TIMES ======
+# =========================
+
+# (depth, name, self_us, cumulative_us) in completion order, like -X importtime
+_import_rows: List[Tuple[int, str, int, int]] = []
+_import_stack: List[List[float]] = []   # per active import: [child_seconds]
+_orig_import = builtins.__import__
+
+
+def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+    if level == 0 and name in sys.modules:
+        return _orig_import(name, globals, locals, fromlist, level)
+    _import_stack.append([0.0])
+    t0 = time.perf_counter()
+    try:
+        return _orig_import(name, globals, locals, fromlist, level)
+    finally:
+        total = time.perf_counter() - t0
+        children = _import_stack.pop()[0]
+        if _import_stack:
+            _import_stack[-1][0] += total
+        label = ("." * level) + name if level else name
+        _import_rows.append((len(_import_stack), label, int((total - children) * 1e6), int(total * 1e6)))
+
+
+def _write_import_report(path: Path) -> None:
+    lines = ["import time: self [us] | cumulative | imported package"]
+    for depth, name, self_us, cum_us in _import_rows:
+        lines.append(f"import time: {self_us:>9} | {cum_us:>10} | {'  ' * depth}{name}")
+    top = sorted((r for r in _import_rows if r[0] == 0), key=lambda r: r[3], reverse=True)
+    lines.append("")
+    lines.append("top-level imports by cumulative time:")
+    for _, name, _, cum_us in top[:20]:
+        lines.append(f"  {cum_us / 1000:>9.1f} ms  {name}")
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+if MODE:
+    builtins.__import__ = _timed_import
+
+
+# =========================
+# ======= SAMPLER =========
+# =========================
+
+class _StackSampler:
+    """Samples one thread's Python stack on a timer and exports speedscope JSON."""
+
+    def __init__(self, thread_id: int, interval_s: float):
+        self.thread_id = thread_id
+        self.interval_s = interval_s
+        self.frames: List[Dict[str, Any]] = []
+        self.frame_index: Dict[Tuple[str, str, int], int] = {}
+        self.samples: List[List[int]] = []
+        self.weights: List[float] = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="hl-profile-sampler", daemon=True)
+
+    def _frame_id(self, code) -> int:
+        key = (code.co_name, code.co_filename, code.co_firstlineno)
+        idx = self.frame_index.get(key)
+        if idx is None:
+            idx = len(self.frames)
+            self.frame_index[key] = idx
+            self.frames.append({"name": code.co_name, "file": code.co_filename, "line": code.co_firstlineno})
+        return idx
+
+    def _loop(self) -> None:
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval_s):
+            frame = sys._current_frames().get(self.thread_id)
+            now = time.perf_counter()
+            if frame is None:
+                last = now
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(self._frame_id(frame.f_code))
+                frame = frame.f_back
+            stack.reverse()  # speedscope wants root -> leaf
+            self.samples.append(stack)
+            self.weights.append(now - last)
+            last = now
+
+    def start(self) -> None:
+        self._t0 = time.perf_counter()
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        self._elapsed = time.perf_counter() - self._t0
+
+    def to_speedscope(self, name: str) -> Dict[str, Any]:
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {"frames": self.frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": name,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": self._elapsed,
+                "samples": self.samples,
+                "weights": self.weights,
+            }],
+            "name": name,
+            "exporter": "tools/hyperliquid/profiling.py",
+        }
+
+
+# =========================
+# ========= RUN ===========
+# =========================
+
+def run(main: Callable[[], Any]) -> Any:
+    """Call main(), wrapped in the profiler selected by --profile (if any)."""
+    if not MODE:
+        return main()
+
+    builtins.__import__ = _orig_import  # stop timing imports done lazily inside main()
+    base = _artifact_base()
+    written = []
+    try:
+        _write_import_report(base.with_suffix(".imports.txt"))
+        written.append(base.with_suffix(".imports.txt"))
+    except OSError as e:
+        print(f"[profile] could not write import report: {e}", file=sys.stderr)
+
+    if MODE == "sampling":
+        interval_ms = float(os.getenv("HL_PROFILE_INTERVAL_MS") or 2)
+        sampler = _StackSampler(threading.get_ident(), interval_ms / 1000.0)
+        sampler.start()
+        try:
+            return main()
+        finally:
+            sampler.stop()
+            out = base.with_suffix(".speedscope.json")
+            out.write_text(json.dumps(sampler.to_speedscope(" ".join(sys.argv))), encoding="utf-8")
+            written.append(out)
+            _report(written)
+
+    import cProfile
+    prof = cProfile.Profile()
+    prof.enable()
+    try:
+        return main()
+    finally:
+        prof.disable()
+        out = base.with_suffix(".pstats")
+        prof.dump_stats(str(out))
+        written.append(out)
+        _report(written)
+
+
+def _report(paths: List[Path]) -> None:
+    # stderr: stdout is parsed as JSON by the keeper/server
+    for p in paths:
+        print(f"[profile] wrote {p}", file=sys.stderr)
@@ -0,0 +1,209 @@
+"""
+rate_limiter.py — host-wide token bucket for api.hyperliquid.xyz.
+
+The keeper pipelines, withdrawChecker and the API server all spawn these
+scripts concurrently. HL limits REST traffic per IP (1200 weight / minute),
+so every process draws from ONE bucket kept in a small file-locked state file.
+
+acquire(weight) reserves tokens and sleeps until the reservation is covered.
+Because callers queue behind each other's reservations, a saturated host
+drains at exactly the refill rate instead of bursting into 429s and backing off.
+
+Knobs (env):
+  HL_RATE_LIMIT=0            disable entirely
+  HL_RATE_WEIGHT_PER_MIN     HL's budget (default 1200)
+  HL_RATE_HEADROOM           fraction of the budget we refill at (default 0.9)
+  HL_RATE_STATE              state file (default <tmp>/hl_rate_limiter.json)
+
+Burst capacity is the unused part of the budget, (1 - headroom) * limit, so
+capacity + one minute of refill never exceeds the per-minute limit.
+"""
+
+from __future__ import annotations
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+import codec
+
+# Info request types that HL weighs at 2 (everything else documented is 20)
+_LIGHT_INFO_TYPES = {"l2Book", "allMids", "clearinghouseState", "orderStatus",
+                     "spotClearinghouseState", "exchangeStatus"}
+_HEAVY_INFO_TYPES = {"userRole": 60}
+
+# Exchange actions whose weight grows with batch length: 1 + floor(n / 40)
+_BATCH_KEYS = ("orders", "cancels", "modifies")
+
+
+def _enabled() -> bool:
+    return (os.getenv("HL_RATE_LIMIT") or "1").strip().lower() not in ("0", "false", "no", "off")
+
+
+def _state_path() -> str:
+    return os.getenv("HL_RATE_STATE") or os.path.join(tempfile.gettempdir(), "hl_rate_limiter.json")
+
+
+def _limits() -> tuple[float, float]:
+    """Return (refill tokens/sec, burst capacity)."""
+    per_min = float(os.getenv("HL_RATE_WEIGHT_PER_MIN") or 1200)
+    headroom = min(1.0, max(0.05, float(os.getenv("HL_RATE_HEADROOM") or 0.9)))
+    rate = per_min * headroom / 60.0
+    capacity = max(20.0, per_min * (1.0 - headroom))  # at least one "heavy" info call
+    return rate, capacity
+
+
+# Helper function to weigh a request like HL does
+def request_weight(url_path: str, payload: Optional[Dict[str, Any]]) -> int:
+    payload = payload or {}
+    if url_path.rstrip("/").endswith("exchange"):
+        action = payload.get("action") or {}
+        n = 0
+        for k in _BATCH_KEYS:
+            if isinstance(action.get(k), list):
+                n = len(action[k])
+                break
+        return 1 + n // 40
+    typ = payload.get("type")
+    if typ in _LIGHT_INFO_TYPES:
+        return 2
+    return _HEAVY_INFO_TYPES.get(typ, 20)
+
+
+# =========================
+# ===== FILE LOCKING ======
+# =========================
+
+@contextmanager
+def locked_json(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Exclusive, cross-process lock on a small JSON state file.
+    Yields the parsed dict; whatever the caller leaves in it is written back.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+    with os.fdopen(fd, "r+b") as f, file_lock(f):
+        f.seek(0)
+        raw = f.read()
+        try:
+            state = codec.loads(raw) if raw else {}
+        except ValueError:
+            state = {}
+        yield state
+        data = codec.dumpb(state)
+        f.seek(0)
+        f.write(data)
+        f.truncate()
+        f.flush()
+
+
+@contextmanager
+def file_lock(f) -> Iterator[None]:
+    """
+    Exclusive, cross-process lock on an open file object (flock; a 1-byte
+    msvcrt lock on Windows). Blocks until acquired.
+    """
+    _lock(f)
+    try:
+        yield
+    finally:
+        _unlock(f)
+
+
+if os.name == "nt":
+    import msvcrt
+
+    def _lock(f) -> None:
+        f.seek(0)
+        while True:
+            try:
+                msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+                return
+            except OSError:
+                time.sleep(0.002)
+
+    def try_lock(f) -> bool:
+        """Non-blocking file_lock(); False if another process holds it. Released by closing `f`."""
+        f.seek(0)
+        try:
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            return False
+
+    def _unlock(f) -> None:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+else:
+    import fcntl
+
+    def _lock(f) -> None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+
+    def try_lock(f) -> bool:
+        """Non-blocking file_lock(); False if another process holds it. Released by closing `f`."""
+        try:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except BlockingIOError:
+            return False
+
+    def _unlock(f) -> None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+# =========================
+# ===== TOKEN BUCKET ======
+# =========================
+
+def acquire(weight: float = 1) -> float:
+    """
+    Reserve `weight` tokens from the host-wide bucket and sleep until they are
+    available. Returns the seconds slept.
+    """
+    if not _enabled() or weight <= 0:
+        return 0.0
+    rate, capacity = _limits()
+    with locked_json(_state_path()) as st:
+        now = time.time()
+        tokens = float(st.get("tokens", capacity))
+        last = float(st.get("ts", now))
+        tokens = min(capacity, tokens + max(0.0, now - last) * rate)
+        tokens -= float(weight)
+        st["tokens"] = tokens
+        st["ts"] = now
+    wait = -tokens / rate if tokens < 0 else 0.0
+    if wait > 0:
+        time.sleep(wait)
+    return wait
+
+
+def note_throttled() -> None:
+    """Called after a 429: empty the bucket so every process on the host slows down together."""
+    if not _enabled():
+        return
+    with locked_json(_state_path()) as st:
+        st["tokens"] = min(0.0, float(st.get("tokens", 0.0)))
+        st["ts"] = time.time()
+
+
+def install_sdk_hook() -> None:
+    """Route every hyperliquid-python SDK request (Info and Exchange) through acquire()."""
+    from hyperliquid.api import API
+
+    if getattr(API.post, "_hl_rate_limited", False):
+        return
+    orig_post = API.post
+
+    def post(self, url_path: str, payload: Any = None) -> Any:
+        acquire(request_weight(url_path, payload))
+        try:
+            return orig_post(self, url_path, payload)
+        except Exception as e:
+            if getattr(e, "status_code", None) == 429:
+                note_throttled()
+            raise
+
+    post._hl_rate_limited = True  # type: ignore[attr-defined]
+    API.post = post
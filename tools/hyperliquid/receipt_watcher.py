@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+receipt_watcher.py — host-wide Arbitrum receipt tracking for the Python tools.
+
+w3.eth.wait_for_transaction_receipt() polls the RPC once per waiting process
+and tx. Here every waiter on the host shares one follower, driven through a
+small file-locked state file (rate_limiter.locked_json):
+
+  - waiters register their tx hashes as pending and read results from the file
+  - at most once per poll interval (host-wide), whichever waiter claims the
+    slot asks for the head (eth_blockNumber). When the head moved, or new
+    hashes were registered, it resolves ALL pending hashes with one batched
+    JSON-RPC request of eth_getTransactionReceipt
+  - a hash stays pending, and is re-checked on every new head, until its
+    receipt is `confirmations` blocks deep. A reorged-out receipt is dropped
+    and re-resolved
+
+So N concurrent deposits/payouts cost one eth_blockNumber per interval plus
+one batch per new head, not N polling loops.
+
+Examples:
+  python receipt_watcher.py 0xabc... 0xdef...
+  python receipt_watcher.py 0xabc... confirmations=3 timeout=300
+
+Env: ARB_RPC / ARBITRUM_ALCHEMY_MAINNET, ARB_CONFIRMATIONS (default 1),
+     ARB_RECEIPT_POLL_S (default 0.5), HL_RECEIPT_STATE (default <tmp>/arb_receipts.json)
+"""
+
+from __future__ import annotations
+import profiling  # first: --profile also times the imports below
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import requests
+from dotenv import load_dotenv
+from web3 import Web3
+from web3.datastructures import AttributeDict
+from web3.exceptions import TimeExhausted, TransactionNotFound
+
+import codec
+from rate_limiter import locked_json
+
+load_dotenv(dotenv_path=Path(__file__).resolve().parents[2] / ".env")
+
+_KEEP_MS = 3_600_000        # forget receipts / abandoned hashes after an hour
+_session = requests.Session()
+
+
+def _state_path() -> str:
+    return os.getenv("HL_RECEIPT_STATE") or os.path.join(tempfile.gettempdir(), "arb_receipts.json")
+
+
+def _default_confirmations() -> int:
+    return max(1, int(os.getenv("ARB_CONFIRMATIONS") or 1))
+
+
+def _default_poll_s() -> float:
+    return max(0.05, float(os.getenv("ARB_RECEIPT_POLL_S") or 0.5))
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def _hex(tx_hash: Any) -> str:
+    h = tx_hash.hex() if isinstance(tx_hash, (bytes, bytearray)) else str(tx_hash)
+    return ("0x" + h[2:] if h[:2].lower() == "0x" else "0x" + h).lower()
+
+
+def _int(v: Any) -> Optional[int]:
+    if v is None:
+        return None
+    return int(v, 16) if isinstance(v, str) else int(v)
+
+
+def _compact(rcpt: Dict[str, Any]) -> Dict[str, Any]:
+    """The receipt fields the tools use, as plain JSON (ints, hex strings)."""
+    def _s(v):
+        return _hex(v) if isinstance(v, (bytes, bytearray)) else v
+    return {
+        "transactionHash": _hex(rcpt.get("transactionHash")),
+        "blockHash": _s(rcpt.get("blockHash")),
+        "blockNumber": _int(rcpt.get("blockNumber")),
+        "status": _int(rcpt.get("status")),
+        "gasUsed": _int(rcpt.get("gasUsed")),
+        "effectiveGasPrice": _int(rcpt.get("effectiveGasPrice")),
+        "from": rcpt.get("from"),
+        "to": rcpt.get("to"),
+        "contractAddress": rcpt.get("contractAddress"),
+        "logCount": len(rcpt.get("logs") or []),
+    }
+
+
+# =========================
+# ========= RPC ===========
+# =========================
+
+def _batch_receipts(w3: Web3, hashes: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+    """eth_getTransactionReceipt for every hash: one HTTP round trip on HTTP providers."""
+    if not hashes:
+        return {}
+    endpoint = getattr(w3.provider, "endpoint_uri", None)
+    if endpoint and str(endpoint).startswith("http"):
+        body = [{"jsonrpc": "2.0", "id": i, "method": "eth_getTransactionReceipt", "params": [h]}
+                for i, h in enumerate(hashes)]
+        r = _session.post(str(endpoint), json=body, timeout=15)
+        r.raise_for_status()
+        res = codec.response(r)
+        if isinstance(res, list):
+            by_id = {item.get("id"): item for item in res}
+            return {h: (by_id.get(i) or {}).get("result") for i, h in enumerate(hashes)}
+    # other providers (ws/ipc) or no batch support: one call each
+    out: Dict[str, Optional[Dict[str, Any]]] = {}
+    for h in hashes:
+        try:
+            out[h] = dict(w3.eth.get_transaction_receipt(h))
+        except TransactionNotFound:
+            out[h] = None
+    return out
+
+
+# =========================
+# ======= FOLLOWER ========
+# =========================
+
+def _claim(poll_s: float) -> Optional[Dict[str, Any]]:
+    """Claim this poll slot host-wide. Returns what the follower step needs, or None."""
+    now = _now_ms()
+    with locked_json(_state_path()) as st:
+        if now < int(st.get("polledAt", 0)) + poll_s * 1000:
+            return None
+        st["polledAt"] = now
+        pending = st.get("pending") or {}
+        return {"pending": list(pending), "head": st.get("head"), "dirty": bool(st.get("dirty"))}
+
+
+def follow_step(w3: Web3, poll_s: Optional[float] = None) -> bool:
+    """
+    One host-wide follower step (no-op if another waiter ran one within poll_s).
+    Returns True when this call did RPC work.
+    """
+    claim = _claim(_default_poll_s() if poll_s is None else poll_s)
+    if claim is None:
+        return False
+    head = int(w3.eth.block_number)
+    if not claim["pending"] or (head == claim["head"] and not claim["dirty"]):
+        with locked_json(_state_path()) as st:
+            st["head"] = head
+        return True
+
+    fetched = _batch_receipts(w3, claim["pending"])
+    now = _now_ms()
+    with locked_json(_state_path()) as st:
+        pending = st.get("pending") or {}
+        receipts = st.get("receipts") or {}
+        st["head"] = head
+        st["dirty"] = any(h not in fetched for h in pending)    # registered while we were fetching
+        for h, raw in fetched.items():
+            entry = pending.get(h)
+            if raw is None:
+                receipts.pop(h, None)               # not mined yet, or reorged out
+                continue
+            rc = _compact(raw)
+            rc["seenAt"] = now
+            receipts[h] = rc
+            if entry is not None and head - rc["blockNumber"] + 1 >= int(entry.get("confirmations", 1)):
+                pending.pop(h, None)
+        st["pending"] = {h: e for h, e in pending.items() if now - int(e.get("since", now)) < _KEEP_MS}
+        st["receipts"] = {h: r for h, r in receipts.items() if now - int(r.get("seenAt", now)) < _KEEP_MS}
+    return True
+
+
+# =========================
+# ========= WAIT ==========
+# =========================
+
+def watch(tx_hashes: Iterable[Any], confirmations: Optional[int] = None) -> List[str]:
+    """Register hashes as pending (idempotent). Returns them normalized."""
+    conf = _default_confirmations() if confirmations is None else max(1, int(confirmations))
+    hashes = [_hex(h) for h in tx_hashes]
+    now = _now_ms()
+    with locked_json(_state_path()) as st:
+        pending = st.get("pending") or {}
+        receipts = st.get("receipts") or {}
+        head = st.get("head")
+        for h in hashes:
+            rc = receipts.get(h)
+            deep = rc is not None and head is not None and head - rc["blockNumber"] + 1 >= conf
+            if deep and h not in pending:
+                continue
+            e = pending.setdefault(h, {"since": now, "confirmations": conf})
+            e["confirmations"] = max(int(e.get("confirmations", 1)), conf)
+            st["dirty"] = True
+        st["pending"] = pending
+    return hashes
+
+
+def _ready(hashes: List[str]) -> Dict[str, Dict[str, Any]]:
+    with locked_json(_state_path()) as st:
+        pending = st.get("pending") or {}
+        receipts = st.get("receipts") or {}
+        head = st.get("head")
+    out = {}
+    for h in hashes:
+        rc = receipts.get(h)
+        if rc is not None and h not in pending:
+            out[h] = AttributeDict({**rc, "confirmations": (head - rc["blockNumber"] + 1) if head else None})
+    return out
+
+
+def wait_for_receipts(
+    w3: Web3,
+    tx_hashes: Iterable[Any],
+    timeout: float = 180,
+    confirmations: Optional[int] = None,
+    poll_s: Optional[float] = None,
+) -> Dict[str, AttributeDict]:
+    """Wait until every hash has a receipt `confirmations` blocks deep. Keys are 0x-hex hashes."""
+    poll = _default_poll_s() if poll_s is None else poll_s
+    hashes = watch(tx_hashes, confirmations)
+    deadline = time.time() + timeout
+    while True:
+        done = _ready(hashes)
+        if len(done) == len(hashes):
+            return done
+        if time.time() >= deadline:
+            missing = [h for h in hashes if h not in done]
+            raise TimeExhausted(f"Transactions {missing} not confirmed after {timeout} seconds")
+        try:
+            if follow_step(w3, poll):
+                continue
+        except Exception as e:
+            # RPC hiccup: the next slot (ours or another waiter's) retries
+            print(f"[receipts] follower step failed: {type(e).__name__}: {e}", file=sys.stderr)
+        time.sleep(min(poll / 2, max(0.0, deadline - time.time())))
+
+
+def wait_for_receipt(w3: Web3, tx_hash: Any, timeout: float = 180, confirmations: Optional[int] = None,
+                     poll_s: Optional[float] = None) -> AttributeDict:
+    """Drop-in for w3.eth.wait_for_transaction_receipt (blockNumber, status, gasUsed, ...)."""
+    h = _hex(tx_hash)
+    return wait_for_receipts(w3, [h], timeout, confirmations, poll_s)[h]
+
+
+def main():
+    kv = dict(a.split("=", 1) for a in sys.argv[1:] if "=" in a and not a.startswith("--"))
+    hashes = [a for a in sys.argv[1:] if "=" not in a and not a.startswith("--")]
+    if not hashes:
+        raise SystemExit("Usage: python receipt_watcher.py <txhash> [<txhash> ...] [confirmations=N] [timeout=S]")
+    rpc = os.getenv("ARB_RPC") or os.getenv("ARBITRUM_ALCHEMY_MAINNET")
+    if not rpc:
+        raise SystemExit("Missing ARB_RPC / ARBITRUM_ALCHEMY_MAINNET")
+    w3 = Web3(Web3.HTTPProvider(rpc, request_kwargs={"timeout": 15}))
+    conf = int(kv["confirmations"]) if "confirmations" in kv else None
+    res = wait_for_receipts(w3, hashes, float(kv.get("timeout", 180)), conf)
+    print(codec.dumps({h: dict(r) for h, r in res.items()}))
+
+
+if __name__ == "__main__":
+    profiling.run(main)
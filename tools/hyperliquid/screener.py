@@ -0,0 +1,239 @@
+"""
+screener.py — funding / basis / liquidity / BTC-correlation screen over every HL perp.
+
+One `metaAndAssetCtxs` request returns the universe and every asset context
+(funding, open interest, mark / oracle / mid, 24h volume). They are decoded into
+NumPy columns and all metrics are computed on whole columns at once:
+
+  fundingAnn   hourly funding * 24 * 365 (what a short earns, per year)
+  oiUsd        openInterest * markPx
+  basis        markPx / oraclePx - 1
+  volUsd       24h notional volume
+  corrBtc      correlation of 1h log returns with BTC (market_data.py archive;
+               the best candidates missing from it are fetched once and cached)
+  score        fundingAnn * max(corrBtc, 0): carry of a short that still hedges BTC
+
+The raw payload is cached for HL_SCREEN_TTL seconds (default 30) in memory and in
+HL_SCREEN_CACHE (default <tmp>/hl_screen.json), so back-to-back CLI calls and the
+rebalance logic share one request.
+
+  python create_orders.py screen top=10 min_oi=5000000 sort=score
+"""
+
+from __future__ import annotations
+import math
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+import codec
+
+COLUMNS = ("fundingAnn", "funding", "oiUsd", "basis", "premium", "volUsd", "markPx", "maxLeverage",
+           "corrBtc", "score")
+CORR_INTERVAL = "1h"
+CORR_LOOKBACK_H = 24 * 30
+
+_lock = threading.Lock()
+_mem: Dict[str, Tuple[float, Any]] = {}
+
+
+def _ttl() -> float:
+    return float(os.getenv("HL_SCREEN_TTL") or 30)
+
+
+def _cache_path() -> str:
+    return os.getenv("HL_SCREEN_CACHE") or os.path.join(tempfile.gettempdir(), "hl_screen.json")
+
+
+def _f(x: Any) -> float:
+    try:
+        return float(x)
+    except (TypeError, ValueError):
+        return float("nan")
+
+
+# =========================
+# ========= FETCH =========
+# =========================
+
+def meta_and_ctxs(info, ttl_s: Optional[float] = None) -> Tuple[Any, float]:
+    """(metaAndAssetCtxs payload, fetched-at epoch s), from the TTL cache when fresh."""
+    ttl = _ttl() if ttl_s is None else ttl_s
+    now = time.time()
+    with _lock:
+        hit = _mem.get("ctxs")
+        if hit and now - hit[0] < ttl:
+            return hit[1], hit[0]
+        try:
+            with open(_cache_path(), "rb") as f:
+                disk = codec.loads(f.read())
+            if now - float(disk["ts"]) < ttl:
+                _mem["ctxs"] = (float(disk["ts"]), disk["data"])
+                return disk["data"], float(disk["ts"])
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        data = info.meta_and_asset_ctxs()
+        ts = time.time()
+        _mem["ctxs"] = (ts, data)
+        try:
+            tmp = _cache_path() + ".tmp"
+            with open(tmp, "wb") as f:
+                f.write(codec.dumpb({"ts": ts, "data": data}))
+            os.replace(tmp, _cache_path())
+        except OSError:
+            pass
+        return data, ts
+
+
+def decode(payload: Any) -> Dict[str, np.ndarray]:
+    """metaAndAssetCtxs -> column arrays (one row per listed, non-delisted perp)."""
+    meta, ctxs = payload[0], payload[1]
+    rows = [(u, c) for u, c in zip(meta.get("universe", []), ctxs) if not u.get("isDelisted")]
+    col = lambda key: np.array([_f(c.get(key)) for _, c in rows])  # noqa: E731
+    return {
+        "coin": np.array([u.get("name") for u, _ in rows], dtype=object),
+        "maxLeverage": np.array([_f(u.get("maxLeverage")) for u, _ in rows]),
+        "funding": col("funding"),
+        "openInterest": col("openInterest"),
+        "markPx": col("markPx"),
+        "oraclePx": col("oraclePx"),
+        "premium": col("premium"),
+        "volUsd": col("dayNtlVlm"),
+    }
+
+
+# =========================
+# ====== CORRELATION ======
+# =========================
+
+def _closes(coin: str, info, start_ms: int, allow_fetch: bool) -> Optional[np.ndarray]:
+    """(N, 2) [t, close] 1h bars from the archive, else (optionally) fetched once and cached."""
+    import market_data
+    c = market_data.candles(coin, CORR_INTERVAL, start_ms=start_ms)
+    ci = market_data.CANDLE_COLS.index("c")
+    if len(c) >= 24:
+        return np.asarray(c[:, [0, ci]])
+    key = f"closes:{coin}"
+    with _lock:
+        hit = _mem.get(key)
+    if hit and time.time() - hit[0] < 3600:
+        return hit[1]
+    if not allow_fetch:
+        return None
+    rows = market_data.fetch_candles(info, coin, CORR_INTERVAL, start_ms, int(time.time() * 1000))
+    out = rows[:, [0, ci]] if len(rows) else None
+    with _lock:
+        _mem[key] = (time.time(), out)
+    return out
+
+
+def corr_with(ref: np.ndarray, series: List[Optional[np.ndarray]]) -> np.ndarray:
+    """
+    Correlation of log returns with `ref` for every series, on ref's timestamps.
+    Series are aligned into one (T, n) matrix; missing bars are NaN and skipped pairwise.
+    """
+    t = ref[:, 0]
+    px = np.full((len(t), len(series)), np.nan)
+    for j, s in enumerate(series):
+        if s is None or len(s) == 0:
+            continue
+        idx = np.searchsorted(s[:, 0], t)
+        ok = idx < len(s)
+        ok[ok] &= s[idx[ok], 0] == t[ok]
+        px[ok, j] = s[idx[ok], 1]
+    r = np.diff(np.log(px), axis=0)                                   # (T-1, n)
+    rb = np.diff(np.log(ref[:, 1]))[:, None]                          # (T-1, 1)
+    mask = np.isfinite(r) & np.isfinite(rb)
+    n = mask.sum(axis=0)
+    rb_m = np.where(mask, rb, 0.0)
+    r_m = np.where(mask, r, 0.0)
+    mb = rb_m.sum(axis=0) / np.maximum(n, 1)
+    mr = r_m.sum(axis=0) / np.maximum(n, 1)
+    db = np.where(mask, rb - mb, 0.0)
+    dr = np.where(mask, r - mr, 0.0)
+    cov = (db * dr).sum(axis=0)
+    den = np.sqrt((db ** 2).sum(axis=0) * (dr ** 2).sum(axis=0))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        out = cov / den
+    out[n < 24] = np.nan
+    return out
+
+
+# =========================
+# ========= SCREEN ========
+# =========================
+
+def screen(
+    info=None,
+    top: int = 10,
+    sort: str = "score",
+    min_oi_usd: float = 0.0,
+    min_vol_usd: float = 0.0,
+    max_abs_basis: float = 0.02,
+    corr_fetch: int = 10,
+    exclude: Tuple[str, ...] = ("BTC",),
+    ttl_s: Optional[float] = None,
+) -> Dict[str, Any]:
+    """
+    Rank perps as short-hedge candidates for a BTC long. Filters are applied on
+    whole columns; correlation is computed for the survivors (archive data), and
+    the best `corr_fetch` without archive data get their candles fetched.
+    """
+    t0 = time.perf_counter()
+    if info is None:
+        import market_data
+        info = market_data._info()
+    payload, fetched_at = meta_and_ctxs(info, ttl_s)
+    d = decode(payload)
+
+    funding_ann = d["funding"] * 24 * 365
+    oi_usd = d["openInterest"] * d["markPx"]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        basis = d["markPx"] / d["oraclePx"] - 1.0
+    keep = (np.nan_to_num(oi_usd) >= min_oi_usd) & (np.nan_to_num(d["volUsd"]) >= min_vol_usd) \
+        & (np.abs(np.nan_to_num(basis)) <= max_abs_basis) & ~np.isin(d["coin"], list(exclude))
+    idx = np.flatnonzero(keep)
+
+    corr = np.full(len(d["coin"]), np.nan)
+    start_ms = int(time.time() * 1000) - CORR_LOOKBACK_H * 3_600_000
+    btc = _closes("BTC", info, start_ms, allow_fetch=True)
+    if btc is not None and len(idx):
+        # archive first; then fetch the best-carry survivors that are still missing
+        series = {int(i): _closes(str(d["coin"][i]), info, start_ms, allow_fetch=False) for i in idx}
+        missing = [i for i in idx[np.argsort(-np.nan_to_num(funding_ann[idx], nan=-np.inf))] if series[int(i)] is None]
+        fetch = missing[:max(0, int(corr_fetch))]
+        if fetch:
+            with ThreadPoolExecutor(max_workers=min(4, len(fetch)), thread_name_prefix="screen") as pool:
+                got = pool.map(lambda i: _closes(str(d["coin"][i]), info, start_ms, allow_fetch=True), fetch)
+                for i, s in zip(fetch, got):
+                    series[int(i)] = s
+        corr[idx] = corr_with(btc, [series[int(i)] for i in idx])
+
+    score = funding_ann * np.clip(np.nan_to_num(corr), 0.0, None)
+    cols = {"fundingAnn": funding_ann, "funding": d["funding"], "oiUsd": oi_usd, "basis": basis,
+            "premium": d["premium"], "volUsd": d["volUsd"], "markPx": d["markPx"],
+            "maxLeverage": d["maxLeverage"], "corrBtc": corr, "score": score}
+    key = cols.get(sort, score)
+    order = idx[np.argsort(-np.nan_to_num(key[idx], nan=-np.inf), kind="stable")][:max(1, int(top))]
+
+    def _row(i: int) -> Dict[str, Any]:
+        out: Dict[str, Any] = {"coin": str(d["coin"][i])}
+        for c in COLUMNS:
+            v = float(cols[c][i])
+            out[c] = None if math.isnan(v) else v
+        return out
+
+    return {
+        "fetchedAt": int(fetched_at * 1000),
+        "ageMs": int((time.time() - fetched_at) * 1000),
+        "universe": int(len(d["coin"])),
+        "eligible": int(len(idx)),
+        "sort": sort if sort in cols else "score",
+        "latencyMs": round((time.perf_counter() - t0) * 1000, 2),
+        "candidates": [_row(int(i)) for i in order],
+    }
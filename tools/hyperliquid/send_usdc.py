@@ -1,9 +1,12 @@
 #!/usr/bin/env python3
+import profiling  # first: --profile also times the imports below
 import os, sys
 from decimal import Decimal, getcontext
 from dotenv import load_dotenv
 from web3 import Web3
 
+import receipt_watcher
+
 getcontext().prec = 50
 load_dotenv()
 
@@ -101,8 +104,8 @@ def main():
     tx_hash = w3.eth.send_raw_transaction(signed.raw_transaction)
     print("Tx sent:", tx_hash.hex())
 
-    receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
+    receipt = receipt_watcher.wait_for_receipt(w3, tx_hash, timeout=120)
     print(f"✅ Confirmed in block {receipt.blockNumber}")
 
 if __name__ == "__main__":
-    main()
+    profiling.run(main)
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+stress.py — pre-trade scenario engine for cross-margin accounts.
+
+open_market() only knows whether the initial margin fits. This module marks the
+whole account (existing positions + the proposed order) over thousands of
+correlated price shocks at once and reports what a move would do to equity,
+the margin ratio and the liquidation prices.
+
+Model (HL cross margin):
+  equity(s)      = accountValue + sum_i szi_i * px_i * s_i
+  maintenance(s) = sum_i |szi_i| * px_i * (1 + s_i) / (2 * maxLeverage_i)
+  liquidated     <=> equity(s) <= maintenance(s)
+Shocks s are
+  - Monte Carlo: lognormal, per-coin vol, one pairwise correlation (Cholesky)
+  - a deterministic grid where every coin moves by the same fraction, which
+    gives the smallest uniform move that liquidates the account ("liqMove")
+Candidate order sizes are evaluated together, as one (sizes x scenarios)
+array, so "largest size that passes" costs one NumPy pass, not a search.
+
+Vols are the stdev of daily log returns from the market_data.py archive when
+it has the coin, else HL_STRESS_VOL (default 0.08 per day).
+
+Examples:
+  python stress.py                                  # current account
+  python stress.py coin=ETH side=buy size=2         # + proposed order
+  python stress.py coin=ETH side=buy size=2 horizon_days=3 corr=0.9 n=20000
+  python create_orders.py open coin=ETH side=buy size=2 leverage=10 stress=resize
+"""
+
+from __future__ import annotations
+import profiling  # first: --profile also times the imports below
+import math
+import os
+import sys
+import time
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+
+import codec
+
+DEFAULT_MAX_LEVERAGE = 10        # unknown coin: assume a conservative maintenance rate
+DEFAULT_LIMITS = {
+    "max_liq_prob": 0.01,        # share of MC scenarios that may liquidate
+    "min_liq_move": 0.15,        # must survive a uniform adverse move of this size
+}
+GRID = np.round(np.linspace(-0.9, 0.9, 361), 4)   # 0.5% steps
+
+
+def _default_vol() -> float:
+    return float(os.getenv("HL_STRESS_VOL") or 0.08)
+
+
+# =========================
+# ========= BOOK ==========
+# =========================
+
+class Book:
+    """Positions as arrays: coin i has szi[i] at mark px[i] with maintenance rate mmr[i]."""
+
+    __slots__ = ("coins", "szi", "px", "mmr", "equity")
+
+    def __init__(self, coins: Sequence[str], szi, px, mmr, equity: float):
+        self.coins = list(coins)
+        self.szi = np.asarray(szi, dtype=float)
+        self.px = np.asarray(px, dtype=float)
+        self.mmr = np.asarray(mmr, dtype=float)
+        self.equity = float(equity)
+
+    @classmethod
+    def from_state(cls, state, extra: Optional[Dict[str, Dict[str, float]]] = None) -> "Book":
+        """
+        From an AccountState. Marks are positionValue / |szi|. `extra` adds coins
+        that have no position yet: {coin: {"px": ..., "max_leverage": ...}}.
+        """
+        coins, szi, px, mmr = [], [], [], []
+        for p in state.positions:
+            coins.append(p.coin)
+            szi.append(p.szi)
+            px.append(p.position_value / abs(p.szi) if p.szi else p.entry_px)
+            mmr.append(0.5 / (p.max_leverage or DEFAULT_MAX_LEVERAGE))
+        for coin, meta in (extra or {}).items():
+            if coin in coins:
+                continue
+            coins.append(coin)
+            szi.append(0.0)
+            px.append(float(meta["px"]))
+            mmr.append(0.5 / float(meta.get("max_leverage") or DEFAULT_MAX_LEVERAGE))
+        return cls(coins, szi, px, mmr, state.account_value)
+
+    def index(self, coin: str) -> int:
+        return self.coins.index(coin)
+
+
+# =========================
+# ======= SCENARIOS =======
+# =========================
+
+def vols_from_archive(coins: Sequence[str], lookback_days: int = 90) -> Dict[str, float]:
+    """Daily log-return stdev per coin from the local archive (coins without data are omitted)."""
+    try:
+        import market_data
+    except Exception:
+        return {}
+    out: Dict[str, float] = {}
+    for coin in coins:
+        for iv, per_day in (("1d", 1), ("1h", 24)):
+            try:
+                c = market_data.candles(coin, iv)
+            except Exception:
+                c = None
+            if c is None or len(c) < 10:
+                continue
+            close = np.asarray(c[-lookback_days * per_day:, market_data.CANDLE_COLS.index("c")])
+            r = np.diff(np.log(close[close > 0]))
+            if len(r) >= 5:
+                out[coin] = float(r.std(ddof=1) * math.sqrt(per_day))
+                break
+    return out
+
+
+def shocks(vols: np.ndarray, corr: float = 0.8, n: int = 10_000, horizon_days: float = 1.0,
+           seed: Optional[int] = 0) -> np.ndarray:
+    """(n, k) correlated lognormal returns, s = exp(x) - 1."""
+    k = len(vols)
+    if k == 0:
+        return np.zeros((n, 0))
+    rho = np.full((k, k), float(corr))
+    np.fill_diagonal(rho, 1.0)
+    chol = np.linalg.cholesky(rho + 1e-12 * np.eye(k))
+    sig = np.asarray(vols, dtype=float) * math.sqrt(horizon_days)
+    z = np.random.default_rng(seed).standard_normal((n, k)) @ chol.T
+    return np.expm1(z * sig - 0.5 * sig ** 2)
+
+
+# =========================
+# ======= EVALUATE ========
+# =========================
+
+def evaluate(book: Book, s: np.ndarray, szi: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+    """
+    Equity and maintenance margin per scenario. `szi` may be (k,) or (m, k)
+    (m candidate books). Results are (n,) or (m, n).
+    """
+    szi = book.szi if szi is None else np.asarray(szi, dtype=float)
+    ntl = szi * book.px                                   # (..., k)
+    equity = book.equity + np.einsum("...k,nk->...n", ntl, s)
+    maint = np.einsum("...k,nk->...n", np.abs(ntl) * book.mmr, 1.0 + s)
+    return {"equity": equity, "maint": maint}
+
+
+def liquidation_prices(book: Book, szi: Optional[np.ndarray] = None) -> Dict[str, Optional[float]]:
+    """Per coin, the mark at which the account is liquidated if every other mark stays put."""
+    szi = book.szi if szi is None else np.asarray(szi, dtype=float)
+    m0 = float(np.sum(np.abs(szi) * book.px * book.mmr))
+    out: Dict[str, Optional[float]] = {}
+    for i, coin in enumerate(book.coins):
+        if szi[i] == 0:
+            continue
+        # equity + szi_i (x - px_i) = m_rest + |szi_i| x mmr_i  => solve for x
+        m_rest = m0 - abs(szi[i]) * book.px[i] * book.mmr[i]
+        denom = szi[i] - abs(szi[i]) * book.mmr[i]
+        x = (m_rest - book.equity + szi[i] * book.px[i]) / denom
+        out[coin] = float(x) if x > 0 else None
+    return out
+
+
+def _liq_move(book: Book, szi: np.ndarray) -> np.ndarray:
+    """Smallest |uniform move| on GRID that liquidates each candidate book (inf = none)."""
+    s = np.repeat(GRID[:, None], len(book.coins), axis=1)
+    ev = evaluate(book, s, szi)
+    liq = ev["equity"] <= ev["maint"]                      # (m, g)
+    moves = np.where(liq, np.abs(GRID), np.inf)
+    return moves.min(axis=-1)
+
+
+def _metrics(book: Book, mc: np.ndarray, szi: np.ndarray) -> Dict[str, Any]:
+    ev = evaluate(book, mc, szi)
+    eq, mm = ev["equity"], ev["maint"]
+    ratio = mm / np.maximum(eq, 1e-9)                     # equity <= 0 => huge
+    move = float(_liq_move(book, szi[None, :])[0])
+    return {
+        "equity": {"now": book.equity, "p1": float(np.percentile(eq, 1)), "p5": float(np.percentile(eq, 5)),
+                   "median": float(np.median(eq)), "worst": float(eq.min())},
+        "marginRatio": {"now": float(np.sum(np.abs(szi) * book.px * book.mmr) / max(book.equity, 1e-12)),
+                        "p99": float(np.percentile(ratio, 99))},
+        "liqProb": float(np.mean(eq <= mm)),
+        "liqMove": None if math.isinf(move) else move,
+        "liquidationPx": liquidation_prices(book, szi),
+    }
+
+
+def assess(
+    book: Book,
+    coin: Optional[str] = None,
+    size: float = 0.0,
+    vols: Optional[Dict[str, float]] = None,
+    corr: float = 0.8,
+    n: int = 10_000,
+    horizon_days: float = 1.0,
+    limits: Optional[Dict[str, float]] = None,
+    steps: int = 64,
+) -> Dict[str, Any]:
+    """
+    Stress the book before and after adding `size` (signed coin units) of `coin`.
+    A candidate book is acceptable when it passes `limits`, or when it reduces
+    risk: neither liqProb nor liqMove worse than `before`, and at least one
+    better. So an order that de-risks a book already over the limits is not
+    blocked. maxSafeSize is the largest acceptable of `steps` evenly spaced
+    sizes in [0, |size|] (risk is not assumed to grow with size), 0 if none.
+    """
+    t0 = time.perf_counter()
+    lim = {**DEFAULT_LIMITS, **(limits or {})}
+    vols = vols or {}
+    v = np.array([vols.get(c, _default_vol()) for c in book.coins])
+    mc = shocks(v, corr, n, horizon_days)
+
+    before = _metrics(book, mc, book.szi)
+    out: Dict[str, Any] = {"scenarios": n, "horizonDays": horizon_days, "corr": corr,
+                           "vols": dict(zip(book.coins, v.round(5).tolist())), "limits": lim, "before": before}
+    if coin is None or not size:
+        move = math.inf if before["liqMove"] is None else before["liqMove"]
+        out["ok"] = before["liqProb"] <= lim["max_liq_prob"] and move >= lim["min_liq_move"]
+        out["latencyMs"] = round((time.perf_counter() - t0) * 1000, 2)
+        return out
+
+    j = book.index(coin)
+    delta = np.zeros(len(book.coins))
+    delta[j] = float(size)
+    after_szi = book.szi + delta
+    out["after"] = _metrics(book, mc, after_szi)
+
+    # all candidate sizes at once: (steps, k) books -> (steps, n) equity / maintenance
+    frac = np.linspace(0.0, 1.0, steps + 1)
+    cand = book.szi[None, :] + frac[:, None] * delta[None, :]
+    ev = evaluate(book, mc, cand)
+    liq_prob = np.mean(ev["equity"] <= ev["maint"], axis=1)
+    liq_move = _liq_move(book, cand)
+    passes = (liq_prob <= lim["max_liq_prob"]) & (liq_move >= lim["min_liq_move"])
+    move0 = math.inf if before["liqMove"] is None else before["liqMove"]
+    improves = ((liq_prob <= before["liqProb"]) & (liq_move >= move0)
+                & ((liq_prob < before["liqProb"]) | (liq_move > move0)))
+    ok = passes | improves
+    safe = float(frac[ok].max()) * abs(size) if ok.any() else 0.0
+
+    out["ok"] = bool(ok[-1])
+    out["reducesRisk"] = bool(improves[-1])
+    out["maxSafeSize"] = safe
+    out["latencyMs"] = round((time.perf_counter() - t0) * 1000, 2)
+    return out
+
+
+# =========================
+# ==== HL INTEGRATION =====
+# =========================
+
+def max_leverage(info, coin: str) -> float:
+    try:
+        for a in (info.meta() or {}).get("universe", []):
+            if a.get("name") == coin:
+                return float(a.get("maxLeverage") or DEFAULT_MAX_LEVERAGE)
+    except Exception:
+        pass
+    return float(DEFAULT_MAX_LEVERAGE)
+
+
+def check_order(info, state, coin: str, signed_size: float, px: float, **kw) -> Dict[str, Any]:
+    """assess() for a proposed order on a live account (AccountState + the order's mid)."""
+    extra = None
+    if state.position(coin) is None:
+        extra = {coin: {"px": px, "max_leverage": max_leverage(info, coin)}}
+    book = Book.from_state(state, extra)
+    vols = kw.pop("vols", None) or vols_from_archive(book.coins)
+    return assess(book, coin, signed_size, vols=vols, **kw)
+
+
+def main():
+    kv = dict(a.split("=", 1) for a in sys.argv[1:] if "=" in a and not a.startswith("--"))
+    import create_orders
+    address, info, _ = create_orders._setup(skip_ws=True)
+    state = create_orders._account_state(info, address)
+    coin = kv.get("coin")
+    size = float(kv.get("size", 0) or 0)
+    if coin and kv.get("side", "buy").lower() in ("sell", "short"):
+        size = -size
+    limits = {}
+    if "max_liq_prob" in kv:
+        limits["max_liq_prob"] = float(kv["max_liq_prob"])
+    if "min_liq_move" in kv:
+        limits["min_liq_move"] = float(kv["min_liq_move"])
+    opts = dict(corr=float(kv.get("corr", 0.8)), n=int(kv.get("n", 10_000)),
+                horizon_days=float(kv.get("horizon_days", 1.0)), limits=limits)
+    if coin:
+        res = check_order(info, state, coin, size, create_orders._mid_px(info, coin), **opts)
+    else:
+        book = Book.from_state(state)
+        res = assess(book, vols=vols_from_archive(book.coins), **opts)
+    print(codec.dumps(res))
+
+
+if __name__ == "__main__":
+    profiling.run(main)
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+summary_service.py — long-running, request-coalescing account summary server.
+
+`create_orders.py summary` costs an interpreter launch, setup() and four HL
+info calls. This service pays setup() once, then serves summaries from a short
+TTL cache. Concurrent identical requests are single-flighted: while one fetch
+is in progress, every other caller waits for it instead of starting its own.
+
+Examples:
+  python summary_service.py                        # http://127.0.0.1:8787
+  python summary_service.py --port 9000 --ttl 5
+  python summary_service.py --socket /tmp/hl_summary.sock   (POSIX only)
+
+Endpoints:
+  GET /summary       JSON: {"ok", "fetchedAt", "ageMs", "summary", "totals"}
+  GET /summary?fields=openPositions.szi,unrealizedPnl&since=<id>
+                     JSON: {"ok", "fetchedAt", "ageMs", "id", "view" | "delta"}
+                     (projection / changes since a previous id, see summary_view.py)
+  GET /summary.txt   exactly what `create_orders.py summary` prints
+  GET /health
+
+server.js uses it for the "summary" action when HL_SUMMARY_URL is set.
+"""
+
+from __future__ import annotations
+import profiling  # first: --profile also times the imports below
+import os
+import socket
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+from urllib.parse import parse_qs
+
+import codec
+import create_orders
+import summary_view
+
+
+# =========================
+# === SINGLE-FLIGHT TTL ===
+# =========================
+
+class _Flight:
+    __slots__ = ("done", "value", "error", "ts")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+        self.ts = 0.0
+
+
+class CoalescingCache:
+    """
+    TTL cache where a miss is computed by exactly one caller per key;
+    concurrent callers for the same key block on that computation.
+    """
+
+    def __init__(self, ttl_s: float):
+        self.ttl_s = ttl_s
+        self._lock = threading.Lock()
+        self._fresh: Dict[Hashable, Tuple[float, Any]] = {}
+        self._inflight: Dict[Hashable, _Flight] = {}
+        self.upstream_fetches = 0
+        self.hits = 0
+        self.coalesced = 0
+
+    def get(self, key: Hashable, fetch: Callable[[], Any]) -> Tuple[Any, float]:
+        """Return (value, fetched_at_epoch_s)."""
+        with self._lock:
+            hit = self._fresh.get(key)
+            if hit is not None and time.time() - hit[0] < self.ttl_s:
+                self.hits += 1
+                return hit[1], hit[0]
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+                self.upstream_fetches += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value, flight.ts
+
+        try:
+            flight.value = fetch()
+            flight.ts = time.time()
+            with self._lock:
+                self._fresh[key] = (flight.ts, flight.value)
+            return flight.value, flight.ts
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.done.set()
+
+
+# =========================
+# ======== SERVER =========
+# =========================
+
+class SummaryService:
+    def __init__(self, ttl_s: float):
+        self.address, self.info, _ = create_orders._setup(skip_ws=True)
+        self.cache = CoalescingCache(ttl_s)
+        self.snapshots = summary_view.MemoryRing()
+        self._view_lock = threading.Lock()
+        self._last: Tuple[float, Dict[str, Any]] = (0.0, {})
+
+    def summary(self) -> Tuple[Dict[str, Any], float]:
+        return self.cache.get(("summary", self.address),
+                              lambda: create_orders.get_account_summary(self.address, self.info))
+
+    def view(self, fields: Optional[str], since: Optional[str]) -> Tuple[Dict[str, Any], float]:
+        """Projected view / delta of the cached summary; each fetched summary is normalized once."""
+        summary, ts = self.summary()
+        with self._view_lock:
+            if self._last[0] != ts:
+                full = summary_view.normalize(summary)
+                self.snapshots.put(summary_view.snapshot_id(full), full)
+                self._last = (ts, full)
+            full = self._last[1]
+            base = self.snapshots.get(since)
+        return summary_view.render(full, fields, base, since), ts
+
+
+def _make_handler(svc: SummaryService):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send(self, code: int, body: bytes, ctype: str) -> None:
+            self.send_response(code)
+            self.send_header("content-type", ctype)
+            self.send_header("content-length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _json(self, code: int, obj: Dict[str, Any]) -> None:
+            self._send(code, codec.dumpb(obj), "application/json")
+
+        def do_GET(self):
+            path, _, query = self.path.partition("?")
+            path = path.rstrip("/")
+            qs = {k: v[-1] for k, v in parse_qs(query).items()}
+            if path == "/health":
+                c = svc.cache
+                return self._json(200, {"ok": True, "address": svc.address, "ttlS": c.ttl_s,
+                                        "upstreamFetches": c.upstream_fetches,
+                                        "cacheHits": c.hits, "coalesced": c.coalesced})
+            if path not in ("/summary", "/summary.txt"):
+                return self._json(404, {"ok": False, "error": "Not found"})
+            if path == "/summary" and ("fields" in qs or "since" in qs):
+                try:
+                    out, ts = svc.view(qs.get("fields"), qs.get("since"))
+                except Exception as e:
+                    return self._json(502, {"ok": False, "error": f"{type(e).__name__}: {e}"})
+                return self._json(200, {"ok": True, "fetchedAt": int(ts * 1000),
+                                        "ageMs": int((time.time() - ts) * 1000), **out})
+            try:
+                summary, ts = svc.summary()
+            except Exception as e:
+                return self._json(502, {"ok": False, "error": f"{type(e).__name__}: {e}"})
+            if path == "/summary.txt":
+                return self._send(200, create_orders.format_summary(summary).encode("utf-8"),
+                                  "text/plain; charset=utf-8")
+            return self._json(200, {
+                "ok": True,
+                "fetchedAt": int(ts * 1000),
+                "ageMs": int((time.time() - ts) * 1000),
+                "summary": summary,
+                "totals": {k: str(v) for k, v in create_orders.summary_totals(summary).items()},
+            })
+
+        def address_string(self):  # unix sockets have no peer host
+            return self.client_address[0] if isinstance(self.client_address, tuple) and self.client_address else "unix"
+
+        def log_message(self, fmt, *args):
+            if os.getenv("HL_SUMMARY_ACCESS_LOG") == "1":
+                sys.stderr.write("[summary] " + (fmt % args) + "\n")
+
+    return Handler
+
+
+class _UnixHTTPServer(ThreadingHTTPServer):
+    address_family = getattr(socket, "AF_UNIX", None)
+
+    def server_bind(self):
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+        self.socket.bind(self.server_address)
+        self.server_name, self.server_port = "unix", 0
+
+
+def _get_opt(name: str, default: Optional[str] = None) -> Optional[str]:
+    flag = f"--{name}"
+    for i, a in enumerate(sys.argv):
+        if a == flag and i + 1 < len(sys.argv):
+            return sys.argv[i + 1]
+        if a.startswith(flag + "="):
+            return a.split("=", 1)[1]
+    return default
+
+
+def main():
+    host = _get_opt("host", os.getenv("HL_SUMMARY_HOST") or "127.0.0.1")
+    port = int(_get_opt("port", os.getenv("HL_SUMMARY_PORT") or "8787"))
+    ttl = float(_get_opt("ttl", os.getenv("HL_SUMMARY_TTL") or "2"))
+    sock_path = _get_opt("socket")
+
+    svc = SummaryService(ttl)
+    handler = _make_handler(svc)
+    if sock_path:
+        if _UnixHTTPServer.address_family is None:
+            raise RuntimeError("--socket needs a platform with AF_UNIX")
+        server = _UnixHTTPServer(sock_path, handler)
+        where = f"unix:{sock_path}"
+    else:
+        server = ThreadingHTTPServer((host, port), handler)
+        where = f"http://{host}:{port}"
+    server.daemon_threads = True
+    print(f"HL summary service on {where} (ttl={ttl}s, account={svc.address})", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    profiling.run(main)
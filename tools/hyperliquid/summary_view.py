@@ -0,0 +1,217 @@
+"""
+summary_view.py — field projection and snapshot deltas for account summaries.
+
+Pollers rarely need the whole get_account_summary() payload, and most of it
+does not change between polls. Three steps:
+
+  normalize(summary)      lists become dicts keyed by identity (positions and
+                          balances by coin, orders by oid); positions flattened
+  project(view, fields)   keep only `fields`
+  snapshot_id(view)       content hash of the full view (same state => same id)
+  diff(old, new)          {"set": {"a/b/c": value}, "del": ["a/b"]} between views
+
+Field spec: comma-separated paths. A bare name after a dotted path belongs to
+that path's parent, so
+    openPositions.szi,unrealizedPnl,marginSummary.accountValue
+keeps szi + unrealizedPnl of every position and accountValue of marginSummary.
+A top-level name on its own keeps the whole section.
+
+Snapshots for `since=` live in a small on-disk ring (CLI, one process per
+call) or in memory (summary_service.py).
+"""
+
+from __future__ import annotations
+import hashlib
+import os
+import tempfile
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import codec
+
+TOP_KEYS = ("address", "marginSummary", "spotBalances", "openOrders", "openPositions",
+            "leverageByCoin", "midsSample")
+# identity field per list section (always kept so entries stay addressable)
+_IDENTITY = {"spotBalances": "coin", "openOrders": "oid", "openPositions": "coin"}
+RING_SIZE = 16
+
+
+def parse_fields(spec: Optional[str]) -> Optional[Dict[str, Optional[set]]]:
+    """'openPositions.szi,unrealizedPnl,address' -> {'openPositions': {'szi', 'unrealizedPnl'}, 'address': None}"""
+    if not spec:
+        return None
+    out: Dict[str, Optional[set]] = {}
+    parent: Optional[str] = None
+    for tok in (t.strip() for t in spec.split(",")):
+        if not tok:
+            continue
+        if "." in tok:
+            parent, leaf = tok.split(".", 1)
+            if out.get(parent, set()) is not None:
+                out.setdefault(parent, set()).add(leaf)
+        elif tok in TOP_KEYS or parent is None:
+            out[tok] = None          # whole section
+            parent = None
+        elif out.get(parent) is not None:
+            out[parent].add(tok)
+    return out
+
+
+def _flatten_position(p: Dict[str, Any]) -> Dict[str, Any]:
+    pos = dict(p.get("position") or {})
+    if p.get("type") is not None:
+        pos.setdefault("type", p.get("type"))
+    return pos
+
+
+def normalize(summary: Dict[str, Any]) -> Dict[str, Any]:
+    """Full view: list sections keyed by identity, positions flattened."""
+    out: Dict[str, Any] = {}
+    for key, val in summary.items():
+        ident = _IDENTITY.get(key)
+        if ident and isinstance(val, list):
+            items = (_flatten_position(i) for i in val) if key == "openPositions" else val
+            out[key] = {str(i.get(ident)): dict(i) for i in items}
+        else:
+            out[key] = val
+    return out
+
+
+def project(full_view: Dict[str, Any], fields: Optional[Dict[str, Optional[set]]]) -> Dict[str, Any]:
+    if fields is None:
+        return full_view
+    out: Dict[str, Any] = {}
+    for key, keep in fields.items():
+        if key not in full_view:
+            continue
+        val = full_view[key]
+        if keep and key in _IDENTITY and isinstance(val, dict):
+            out[key] = {k: {f: item.get(f) for f in keep if f in item} for k, item in val.items()}
+        elif keep and isinstance(val, dict):
+            out[key] = {f: val.get(f) for f in keep if f in val}
+        else:
+            out[key] = val
+    return out
+
+
+def view(summary: Dict[str, Any], fields: Optional[Dict[str, Optional[set]]] = None) -> Dict[str, Any]:
+    return project(normalize(summary), fields)
+
+
+def _canon(obj: Any) -> bytes:
+    return codec.dumpb(obj, sort_keys=True)
+
+
+def snapshot_id(summary_view: Dict[str, Any]) -> str:
+    return hashlib.sha1(_canon(summary_view)).hexdigest()[:16]
+
+
+def diff(old: Dict[str, Any], new: Dict[str, Any], prefix: str = "") -> Dict[str, Any]:
+    """Paths ('a/b/c') whose value changed or appeared, and paths that disappeared."""
+    changed: Dict[str, Any] = {}
+    removed: List[str] = []
+    for k, v in new.items():
+        path = f"{prefix}{k}"
+        if k not in old:
+            changed[path] = v
+        elif isinstance(v, dict) and isinstance(old[k], dict):
+            sub = diff(old[k], v, path + "/")
+            changed.update(sub["set"])
+            removed.extend(sub["del"])
+        elif v != old[k]:
+            changed[path] = v
+    removed.extend(f"{prefix}{k}" for k in old if k not in new)
+    return {"set": changed, "del": removed}
+
+
+def apply(base: Dict[str, Any], delta: Dict[str, Any]) -> Dict[str, Any]:
+    """Client side: rebuild the new view from the base view and a diff()."""
+    out = codec.loads(_canon(base))
+    for path in delta.get("del", []):
+        *parents, leaf = path.split("/")
+        node = out
+        for p in parents:
+            node = node.get(p, {})
+        node.pop(leaf, None)
+    for path, v in delta.get("set", {}).items():
+        *parents, leaf = path.split("/")
+        node = out
+        for p in parents:
+            node = node.setdefault(p, {})
+        node[leaf] = v
+    return out
+
+
+def render(full_view: Dict[str, Any], fields_spec: Optional[str] = None, base: Optional[Dict[str, Any]] = None,
+           since: Optional[str] = None) -> Dict[str, Any]:
+    """
+    The payload pollers get: {"id", "view"} or, when `base` (the full view of
+    snapshot `since`) is known, {"id", "since", "delta"}. `id` names the full state.
+    """
+    sid = snapshot_id(full_view)
+    fields = parse_fields(fields_spec)
+    cur = project(full_view, fields)
+    if since and base is not None:
+        delta = diff(project(base, fields), cur)
+        return {"id": sid, "since": since, "unchanged": not (delta["set"] or delta["del"]), "delta": delta}
+    out = {"id": sid, "view": cur}
+    if since:
+        out["resync"] = True        # unknown/evicted snapshot: full (projected) view instead
+    return out
+
+
+# =========================
+# ==== SNAPSHOT RINGS =====
+# =========================
+
+class MemoryRing:
+    """Last N full views by id (summary_service.py)."""
+
+    def __init__(self, size: int = RING_SIZE):
+        self.size = size
+        self._d: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    def put(self, sid: str, full_view: Dict[str, Any]) -> None:
+        self._d[sid] = full_view
+        self._d.move_to_end(sid)
+        while len(self._d) > self.size:
+            self._d.popitem(last=False)
+
+    def get(self, sid: Optional[str]) -> Optional[Dict[str, Any]]:
+        return self._d.get(sid) if sid else None
+
+
+class DiskRing:
+    """Last N full views by id under HL_SUMMARY_SNAPSHOTS (CLI: one process per call)."""
+
+    def __init__(self, address: str, size: int = RING_SIZE):
+        root = os.getenv("HL_SUMMARY_SNAPSHOTS") or os.path.join(tempfile.gettempdir(), "hl_summary_snapshots")
+        self.dir = Path(root) / address.lower()
+        self.size = size
+
+    def put(self, sid: str, full_view: Dict[str, Any]) -> None:
+        self.dir.mkdir(parents=True, exist_ok=True)
+        p = self.dir / f"{sid}.json"
+        if not p.exists():
+            tmp = p.with_suffix(".tmp")
+            tmp.write_bytes(_canon(full_view))
+            os.replace(tmp, p)
+        else:
+            os.utime(p)
+        snaps: Iterable[Path] = sorted(self.dir.glob("*.json"), key=lambda x: x.stat().st_mtime)
+        snaps = list(snaps)
+        for old in snaps[:-self.size]:
+            try:
+                old.unlink()
+            except OSError:
+                pass
+
+    def get(self, sid: Optional[str]) -> Optional[Dict[str, Any]]:
+        if not sid or not all(c in "0123456789abcdef" for c in sid):
+            return None
+        p = self.dir / f"{sid}.json"
+        try:
+            return codec.loads(p.read_bytes())
+        except (OSError, ValueError):
+            return None
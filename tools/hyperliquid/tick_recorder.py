@@ -0,0 +1,441 @@
+#!/usr/bin/env python3
+"""
+tick_recorder.py — every mid change, trade and own fill, in fixed-size ring buffers.
+
+`market_data.py mids` samples all_mids() every few seconds over REST. That is
+too coarse for latency / slippage work and costs a request per sample. This
+recorder holds one websocket (allMids, trades per coin, userFills) and writes
+each event as a fixed-size record into a memory-mapped ring per coin and stream:
+
+  <HL_TICK_DIR>/<COIN>/mids.ring     ts, mid                            16 B
+  <HL_TICK_DIR>/<COIN>/trades.ring   ts, t, px, sz, tid, side           48 B
+  <HL_TICK_DIR>/<COIN>/fills.ring    ts, t, px, sz, fee, oid, tid, side 64 B
+
+`ts` is the local receive time (epoch ms, the ordering key), `t` the exchange
+time, side +1 buy / -1 sell (aggressor for trades). Mids are written only when
+they change.
+
+A ring file is a 64-byte header plus `capacity` records, sized once from
+max_mb. When it is full the oldest records are overwritten in place, so disk
+and memory stay constant however long the recorder runs. A ring re-created
+with another layout or size is rotated to <name>.ring.1 first.
+
+One recorder writes a ring (rate_limiter.try_lock on <name>.ring.lock). Readers map it read-only and get NumPy
+views, without copying and without locks:
+
+  import tick_recorder as tr
+  r = tr.open_ring("BTC", "mids")
+  older, newer = r.segments()           # chronological views (one when not wrapped yet)
+  parts = r.window(start_ms, end_ms)    # same, cut to start_ms <= ts < end_ms
+  a = r.read(start_ms, end_ms)          # one array; copies only across the wrap point
+  a["ts"], a["mid"]
+
+segments() leaves out the oldest `guard` slots (capacity // 64), which the
+writer is about to overwrite. r.lapped(head) tells whether it has since
+overwritten more than that.
+
+Examples:
+  python tick_recorder.py record coins=BTC,ETH,SOL
+  python tick_recorder.py record coins=BTC,ETH streams=mids,trades,fills max_mb=64
+  python tick_recorder.py record coins=all streams=mids max_mb=4
+  python tick_recorder.py info
+  python tick_recorder.py tail coin=BTC stream=trades n=20
+
+Env: HL_TICK_DIR (default backend/data/hl_ticks)
+"""
+
+from __future__ import annotations
+import profiling  # first: --profile also times the imports below
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import codec
+
+MAGIC = b"HLRING01"
+VERSION = 1
+HEADER = np.dtype([("magic", "S8"), ("version", "<u4"), ("rec_size", "<u4"), ("capacity", "<u8"),
+                   ("head", "<u8"), ("created_ms", "<i8"), ("stream", "S16"), ("_pad", "V8")])
+STREAMS: Dict[str, np.dtype] = {
+    "mids": np.dtype([("ts", "<i8"), ("mid", "<f8")]),
+    "trades": np.dtype([("ts", "<i8"), ("t", "<i8"), ("px", "<f8"), ("sz", "<f8"), ("tid", "<i8"),
+                        ("side", "<i8")]),
+    "fills": np.dtype([("ts", "<i8"), ("t", "<i8"), ("px", "<f8"), ("sz", "<f8"), ("fee", "<f8"),
+                       ("oid", "<i8"), ("tid", "<i8"), ("side", "<i8")]),
+}
+
+CONFIG: Dict[str, Any] = {
+    "coins": "BTC,ETH,SOL",  # or "all" (mids only: trades are one subscription per coin)
+    "streams": "mids,trades",  # + fills (own userFills, needs config.json)
+    "max_mb": 16.0,           # per ring file
+    "flush": 5.0,             # seconds between msync (0 = leave it to the OS)
+    "stale": 10.0,            # seconds without an allMids push before a warning
+    "heartbeat": 60.0,        # seconds between status lines (0 = off)
+}
+
+
+def tick_dir() -> Path:
+    d = os.getenv("HL_TICK_DIR")
+    return Path(d) if d else Path(__file__).resolve().parents[2] / "backend" / "data" / "hl_ticks"
+
+
+def ring_path(coin: str, stream: str) -> Path:
+    return tick_dir() / coin.upper() / f"{stream}.ring"
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def _emit(event: Dict[str, Any]) -> None:
+    print(codec.dumps(event, pretty=False), flush=True)
+
+
+# =========================
+# ========= RING ==========
+# =========================
+
+class Ring:
+    """One memory-mapped ring of fixed-size `STREAMS[stream]` records."""
+
+    def __init__(self, path: Path, stream: str, capacity: Optional[int] = None, writable: bool = False):
+        if stream not in STREAMS:
+            raise ValueError(f"unknown stream {stream!r} (expected one of {sorted(STREAMS)})")
+        self.path = Path(path)
+        self.stream = stream
+        self.dtype = STREAMS[stream]
+        self._lock_file = None
+        if writable:
+            from rate_limiter import try_lock      # writers only: readers never lock
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._lock_file = open(self.path.with_name(self.path.name + ".lock"), "a+b")
+            if not try_lock(self._lock_file):
+                self._lock_file.close()
+                raise RuntimeError(f"{self.path} is being written by another recorder")
+            self._create_or_rotate(int(capacity or 0))
+        elif not self._valid():
+            raise ValueError(f"{self.path} is not a {stream} ring")
+        buf = np.memmap(self.path, dtype=np.uint8, mode="r+" if writable else "r")
+        self._buf = buf
+        self._hdr = buf[:HEADER.itemsize].view(HEADER)
+        self.capacity = int(self._hdr["capacity"][0])
+        self.records = buf[HEADER.itemsize:HEADER.itemsize + self.capacity * self.dtype.itemsize].view(self.dtype)
+        self.guard = self.capacity // 64
+
+    def _header(self) -> Optional[np.ndarray]:
+        if not self.path.exists() or self.path.stat().st_size < HEADER.itemsize:
+            return None
+        with open(self.path, "rb") as f:
+            return np.frombuffer(f.read(HEADER.itemsize), dtype=HEADER)
+
+    def _valid(self, capacity: Optional[int] = None) -> bool:
+        h = self._header()
+        if h is None or h["magic"][0] != MAGIC or int(h["version"][0]) != VERSION:
+            return False
+        if int(h["rec_size"][0]) != self.dtype.itemsize or h["stream"][0].decode() != self.stream:
+            return False
+        cap = int(h["capacity"][0])
+        if capacity and cap != capacity:
+            return False
+        return self.path.stat().st_size == HEADER.itemsize + cap * self.dtype.itemsize
+
+    def _create_or_rotate(self, capacity: int) -> None:
+        if capacity <= 0:
+            raise ValueError("capacity must be > 0")
+        if self._valid(capacity):
+            return
+        if self.path.exists():
+            os.replace(self.path, self.path.with_name(self.path.name + ".1"))
+        hdr = np.zeros(1, dtype=HEADER)
+        hdr["magic"], hdr["version"], hdr["rec_size"] = MAGIC, VERSION, self.dtype.itemsize
+        hdr["capacity"], hdr["created_ms"], hdr["stream"] = capacity, _now_ms(), self.stream.encode()
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            f.write(hdr.tobytes())
+            f.truncate(HEADER.itemsize + capacity * self.dtype.itemsize)   # sparse until written
+        os.replace(tmp, self.path)
+
+    # ---- writer ----
+    @property
+    def head(self) -> int:
+        """Records ever written; the next one goes to slot head % capacity."""
+        return int(self._hdr["head"][0])
+
+    def append(self, row: Tuple) -> None:
+        h = int(self._hdr["head"][0])
+        self.records[h % self.capacity] = row
+        self._hdr["head"][0] = h + 1         # published after the record, readers never see a half row
+
+    def flush(self) -> None:
+        self._buf.flush()
+
+    def close(self) -> None:
+        if self._buf.mode == "r+":
+            self._buf.flush()
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    # ---- reader ----
+    def __len__(self) -> int:
+        return min(self.head, self.capacity)
+
+    def segments(self, guard: Optional[int] = None) -> Tuple[np.ndarray, ...]:
+        """Chronological zero-copy views of the ring (two once it has wrapped)."""
+        h, cap = self.head, self.capacity
+        if h <= cap:
+            return (self.records[:h],)
+        g = self.guard if guard is None else max(0, int(guard))
+        i = h % cap
+        start = i + g
+        if start >= cap:
+            return (self.records[start - cap:i],)
+        return (self.records[start:], self.records[:i])
+
+    def window(self, start_ms: Optional[int] = None, end_ms: Optional[int] = None,
+               guard: Optional[int] = None) -> Tuple[np.ndarray, ...]:
+        """segments() cut to start_ms <= ts < end_ms (still views)."""
+        out = []
+        for seg in self.segments(guard):
+            ts = seg["ts"]
+            lo = int(np.searchsorted(ts, start_ms, side="left")) if start_ms is not None else 0
+            hi = int(np.searchsorted(ts, end_ms, side="left")) if end_ms is not None else len(seg)
+            if hi > lo:
+                out.append(seg[lo:hi])
+        return tuple(out)
+
+    def read(self, start_ms: Optional[int] = None, end_ms: Optional[int] = None) -> np.ndarray:
+        """One array for the window: a view, or a copy when it spans the wrap point."""
+        parts = self.window(start_ms, end_ms)
+        if not parts:
+            return self.records[:0]
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def tail(self, n: int) -> np.ndarray:
+        """The newest `n` records (a view unless they span the wrap point)."""
+        parts: List[np.ndarray] = []
+        for seg in reversed(self.segments(0)):
+            if n <= 0:
+                break
+            parts.insert(0, seg[max(0, len(seg) - n):])
+            n -= len(parts[0])
+        if not parts:
+            return self.records[:0]
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def lapped(self, head_at_read: int) -> bool:
+        """True if the writer has since overwritten slots a read taken at `head_at_read` could include."""
+        return self.head - head_at_read > self.guard
+
+    def stats(self) -> Dict[str, Any]:
+        segs = self.segments(0)
+        first = next((s for s in segs if len(s)), None)
+        last = next((s for s in reversed(segs) if len(s)), None)
+        st = self.path.stat()
+        return {
+            "path": str(self.path), "stream": self.stream, "capacity": self.capacity, "head": self.head,
+            "records": len(self), "wrapped": self.head > self.capacity,
+            "oldestMs": int(first["ts"][0]) if first is not None else None,
+            "newestMs": int(last["ts"][-1]) if last is not None else None,
+            "fileBytes": st.st_size, "diskBytes": st.st_blocks * 512,
+        }
+
+
+def open_ring(coin: str, stream: str) -> Ring:
+    """Read-only ring for (coin, stream)."""
+    return Ring(ring_path(coin, stream), stream)
+
+
+def capacity_for(stream: str, max_mb: float) -> int:
+    return max(1024, int(float(max_mb) * (1 << 20) - HEADER.itemsize) // STREAMS[stream].itemsize)
+
+
+# =========================
+# ======= RECORDER ========
+# =========================
+
+def _recordable(coin: str) -> bool:
+    return not coin.startswith("@") and "/" not in coin      # perps only (spot keys are "@107", "PURR/USDC")
+
+
+class Recorder:
+    def __init__(self, coins: Optional[Sequence[str]], streams: Sequence[str], max_mb: float):
+        self.coins = {c.upper() for c in coins} if coins else None    # None: every perp in allMids
+        self.streams = tuple(streams)
+        self.max_mb = float(max_mb)
+        self.rings: Dict[Tuple[str, str], Ring] = {}
+        self.counts: Dict[str, int] = {s: 0 for s in self.streams}
+        self._last_mid: Dict[str, str] = {}
+        self._last_mids_at = 0.0
+
+    def ring(self, coin: str, stream: str) -> Ring:
+        key = (coin, stream)
+        r = self.rings.get(key)
+        if r is None:
+            r = self.rings[key] = Ring(ring_path(coin, stream), stream, capacity_for(stream, self.max_mb),
+                                       writable=True)
+        return r
+
+    # ---- websocket callbacks (one thread: the SDK's websocket manager) ----
+    def on_mids(self, msg: Dict[str, Any]) -> None:
+        ts = _now_ms()
+        self._last_mids_at = time.time()
+        last = self._last_mid
+        n = 0
+        for coin, raw in ((msg.get("data") or {}).get("mids") or {}).items():
+            if last.get(coin) == raw:
+                continue
+            if self.coins is not None and coin.upper() not in self.coins:
+                continue
+            if self.coins is None and not _recordable(coin):
+                continue
+            last[coin] = raw
+            self.ring(coin, "mids").append((ts, float(raw)))
+            n += 1
+        self.counts["mids"] += n
+
+    def on_trades(self, msg: Dict[str, Any]) -> None:
+        ts = _now_ms()
+        for tr in msg.get("data") or []:
+            self.ring(tr["coin"], "trades").append(
+                (ts, int(tr["time"]), float(tr["px"]), float(tr["sz"]), int(tr.get("tid") or 0),
+                 1 if tr.get("side") == "B" else -1))
+            self.counts["trades"] += 1
+
+    def on_fills(self, msg: Dict[str, Any]) -> None:
+        data = msg.get("data") or {}
+        if data.get("isSnapshot"):
+            return                              # history on subscribe: out of order, and already in userFills
+        ts = _now_ms()
+        for f in data.get("fills") or []:
+            if not _recordable(f["coin"]):
+                continue
+            self.ring(f["coin"], "fills").append(
+                (ts, int(f["time"]), float(f["px"]), float(f["sz"]), float(f.get("fee") or 0.0),
+                 int(f.get("oid") or 0), int(f.get("tid") or 0), 1 if f.get("side") == "B" else -1))
+            self.counts["fills"] += 1
+
+    def flush(self) -> None:
+        for r in list(self.rings.values()):
+            r.flush()
+
+    def close(self) -> None:
+        for r in list(self.rings.values()):
+            r.close()
+        self.rings.clear()
+
+    # ---- main loop ----
+    def run(self, info, address: Optional[str], cfg: Dict[str, Any]) -> None:
+        if "mids" in self.streams:
+            info.subscribe({"type": "allMids"}, self.on_mids)
+        if "trades" in self.streams:
+            for coin in sorted(self.coins or ()):
+                info.subscribe({"type": "trades", "coin": coin}, self.on_trades)
+        if "fills" in self.streams and address:
+            info.subscribe({"type": "userFills", "user": address}, self.on_fills)
+        _emit({"event": "recorder_started", "dir": str(tick_dir()), "coins": sorted(self.coins or ["all"]),
+               "streams": list(self.streams), "maxMbPerRing": self.max_mb})
+        started = last_flush = last_beat = time.time()
+        stale_reported = False
+        while True:
+            time.sleep(1.0)
+            now = time.time()
+            if cfg["flush"] and now - last_flush >= cfg["flush"]:
+                self.flush()
+                last_flush = now
+            if "mids" in self.streams and now - max(self._last_mids_at, started) > cfg["stale"]:
+                if not stale_reported:
+                    _emit({"event": "mids_stream_stale", "ts": int(now * 1000)})
+                    stale_reported = True
+            else:
+                stale_reported = False
+            if cfg["heartbeat"] and now - last_beat >= cfg["heartbeat"]:
+                _emit({"event": "status", "ts": int(now * 1000), "rings": len(self.rings), "records": dict(self.counts)})
+                last_beat = now
+
+
+# =========================
+# ========= CLI ===========
+# =========================
+
+def _rings(coins: Optional[List[str]], streams: Sequence[str]) -> List[Tuple[str, str]]:
+    base = tick_dir()
+    if coins is None:
+        coins = sorted(p.name for p in base.iterdir() if p.is_dir()) if base.exists() else []
+    return [(c.upper(), s) for c in coins for s in streams if ring_path(c, s).exists()]
+
+
+def _apply_kv(pairs) -> Dict[str, str]:
+    extra: Dict[str, str] = {}
+    for raw in pairs:
+        if "=" not in raw:
+            continue
+        k, v = (x.strip() for x in raw.split("=", 1))
+        k = k.lower()
+        if k not in CONFIG:
+            extra[k] = v
+        elif isinstance(CONFIG[k], float):
+            try:
+                CONFIG[k] = float(v)
+            except ValueError:
+                pass
+        else:
+            CONFIG[k] = v
+    return extra
+
+
+def main():
+    args = sys.argv[1:]
+    cmd = args[0] if args and "=" not in args[0] else "record"
+    extra = _apply_kv(args)
+    coins = None if CONFIG["coins"].strip().lower() == "all" else \
+        [c.strip().upper() for c in CONFIG["coins"].split(",") if c.strip()]
+    streams = [s.strip() for s in CONFIG["streams"].split(",") if s.strip()]
+    bad = [s for s in streams if s not in STREAMS]
+    if bad:
+        raise SystemExit(f"unknown streams {bad}; expected {sorted(STREAMS)}")
+
+    if cmd == "record":
+        from hyperliquid.utils import constants
+        address = None
+        if "fills" in streams:
+            import create_orders
+            address, info, _ = create_orders._setup(skip_ws=False)
+        else:
+            from hyperliquid.info import Info
+            info = Info(constants.MAINNET_API_URL, skip_ws=False)
+        rec = Recorder(coins, streams, CONFIG["max_mb"])
+        try:
+            rec.run(info, address, CONFIG)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            rec.close()
+            try:
+                info.disconnect_websocket()
+            except Exception:
+                pass
+
+    elif cmd == "info":
+        names = coins if any(a.lower().startswith("coins=") for a in args) else None    # default: all on disk
+        out = {f"{c}/{s}": open_ring(c, s).stats() for c, s in _rings(names, sorted(STREAMS))}
+        print(codec.dumps(out))
+
+    elif cmd == "tail":
+        coin = (extra.get("coin") or (coins or ["BTC"])[0]).upper()
+        stream = extra.get("stream") or "mids"
+        n = int(extra.get("n") or 10)
+        r = open_ring(coin, stream)
+        print(codec.dumps([{k: row[k].item() for k in r.dtype.names} for row in r.tail(n)]))
+
+    else:
+        raise SystemExit("Usage: python tick_recorder.py record|info|tail [coins=BTC,ETH|all] "
+                         "[streams=mids,trades,fills] [max_mb=16] [coin=BTC stream=mids n=10]")
+
+
+if __name__ == "__main__":
+    profiling.run(main)
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+watchdog.py — long-running margin / liquidation watchdog for the HL account.
+
+Keeps one decoded account snapshot (create_orders._account_state, refreshed on
+every fill and every `refresh` seconds) and re-marks it on each allMids
+websocket push. Between snapshots, equity, cross margin ratio and per-position
+distance to liquidation are re-marked from the streaming mids. That is O(open
+positions) of arithmetic, with no REST calls and no process spawn.
+
+  margin ratio  = maintenance margin / equity   (HL's "cross margin ratio")
+  liq distance  = |mid - liquidationPx| / mid   (towards liquidation only)
+
+Thresholds fire an alert (JSON line on stdout, optional webhook). Reduce
+thresholds also send a reduce-only IOC for `reduce_pct` of the position, like
+`create_orders.py close coin=X pct=...`. Orders are priced off the streaming
+mid and sent from a worker thread, so detection-to-send is milliseconds.
+
+Examples:
+  python watchdog.py
+  python watchdog.py alert_ratio=0.5 reduce_ratio=0.75 alert_liq=0.12 reduce_liq=0.06 reduce_pct=20
+  python watchdog.py dry_run=1 heartbeat=30
+
+Env: HL_WATCHDOG_WEBHOOK=https://...   (POSTed the same JSON as the alert line)
+"""
+
+from __future__ import annotations
+import profiling  # first: --profile also times the imports below
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+import codec
+import cloids
+import create_orders
+import order_book
+from account_state import AccountState
+
+CONFIG: Dict[str, Any] = {
+    "alert_ratio": 0.60,     # alert when maintenance / equity >= this
+    "reduce_ratio": 0.80,    # reduce every position by reduce_pct
+    "alert_liq": 0.10,       # alert when a position is within 10% of its liq price
+    "reduce_liq": 0.05,      # reduce that position by reduce_pct
+    "reduce_pct": 25.0,
+    "slippage": 0.01,
+    "cooldown": 30.0,        # seconds between repeated actions per (kind, coin)
+    "refresh": 10.0,         # seconds between user_state snapshots
+    "stale": 5.0,            # seconds without a mids push before REST fallback
+    "heartbeat": 60.0,       # seconds between status lines (0 = off)
+    "dry_run": False,
+}
+
+
+def _emit(event: Dict[str, Any]) -> None:
+    print(codec.dumps(event, pretty=False), flush=True)
+
+
+class Watchdog:
+    def __init__(self, address: str, info, exchange, cfg: Dict[str, Any]):
+        self.address = address
+        self.info = info
+        self.exchange = exchange
+        self.cfg = cfg
+        self._lock = threading.Lock()
+        self.state: Optional[AccountState] = None
+        self._snap_upnl = 0.0
+        self._snap_notional = 0.0
+        self._refresh_evt = threading.Event()
+        self._last_mids_at = 0.0
+        self._last_fire: Dict[tuple, float] = {}
+        self._fire_lock = threading.Lock()      # cooldown check-and-set (mids thread, REST fallback, workers)
+        self.last_metrics: Dict[str, Any] = {}
+        self._pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="watchdog-act")
+
+    # ---- snapshot ----
+    def refresh(self) -> None:
+        st = create_orders._account_state(self.info, self.address)
+        notional = sum(p.position_value for p in st.positions)
+        with self._lock:
+            self.state = st
+            self._snap_upnl = st.total_unrealized_pnl
+            self._snap_notional = notional
+
+    def request_refresh(self, _msg: Any = None) -> None:
+        self._refresh_evt.set()
+
+    # ---- streaming ----
+    def on_mids(self, msg: Dict[str, Any]) -> None:
+        mids = (msg.get("data") or {}).get("mids") or {}
+        self._last_mids_at = time.time()
+        self.evaluate(mids)
+
+    def evaluate(self, mids: Dict[str, Any]) -> Dict[str, Any]:
+        t_detect = time.perf_counter()
+        with self._lock:
+            st = self.state
+            snap_upnl, snap_notional = self._snap_upnl, self._snap_notional
+        if st is None:
+            return {}
+
+        upnl = 0.0
+        notional = 0.0
+        liq: Dict[str, Optional[float]] = {}
+        marks: Dict[str, float] = {}
+        for p in st.positions:
+            raw_mid = mids.get(p.coin)
+            mid = float(raw_mid) if raw_mid is not None else (p.position_value / abs(p.szi) if p.szi else p.entry_px)
+            marks[p.coin] = mid
+            upnl += p.szi * (mid - p.entry_px)
+            notional += abs(p.szi) * mid
+            if p.liquidation_px is not None and mid > 0:
+                liq[p.coin] = (mid - p.liquidation_px) / mid if p.szi > 0 else (p.liquidation_px - mid) / mid
+            else:
+                liq[p.coin] = None
+
+        equity = st.account_value - snap_upnl + upnl
+        mm = st.maintenance_margin * (notional / snap_notional) if snap_notional > 0 else st.maintenance_margin
+        ratio = mm / equity if equity > 0 else float("inf")
+        metrics = {"equity": equity, "maintenance": mm, "marginRatio": ratio,
+                   "liqDistance": liq, "marks": marks}
+        self.last_metrics = metrics
+
+        cfg = self.cfg
+        if ratio >= cfg["reduce_ratio"]:
+            for p in st.positions:
+                self._fire("reduce_ratio", p.coin, metrics, t_detect, reduce=True)
+        elif ratio >= cfg["alert_ratio"]:
+            self._fire("alert_ratio", "*", metrics, t_detect)
+        for coin, d in liq.items():
+            if d is None:
+                continue
+            if d <= cfg["reduce_liq"]:
+                self._fire("reduce_liq", coin, metrics, t_detect, reduce=True)
+            elif d <= cfg["alert_liq"]:
+                self._fire("alert_liq", coin, metrics, t_detect)
+        return metrics
+
+    # ---- actions ----
+    def _fire(self, kind: str, coin: str, metrics: Dict[str, Any], t_detect: float, reduce: bool = False) -> None:
+        now = time.time()
+        key = (kind, coin)
+        with self._fire_lock:
+            if now - self._last_fire.get(key, 0.0) < self.cfg["cooldown"]:
+                return
+            self._last_fire[key] = now
+        event = {"event": kind, "coin": coin, "ts": int(now * 1000),
+                 "marginRatio": metrics["marginRatio"], "equity": metrics["equity"],
+                 "liqDistance": metrics["liqDistance"].get(coin) if coin != "*" else None}
+        if reduce and not self.cfg["dry_run"]:
+            self._pool.submit(self._reduce, coin, metrics["marks"].get(coin), t_detect, event)
+        else:
+            event["dryRun"] = bool(reduce and self.cfg["dry_run"])
+            self._alert(event)
+
+    def _reduce(self, coin: str, mid: Optional[float], t_detect: float, event: Dict[str, Any]) -> None:
+        st = self.state
+        p = st.position(coin) if st else None
+        if p is None or not mid:
+            return
+        is_buy = p.szi < 0
+        sz = min(abs(p.szi), order_book.round_sz(self.info, coin, abs(p.szi) * self.cfg["reduce_pct"] / 100.0, up=True))
+        px = order_book.limit_px_for(self.info, coin, is_buy, mid, self.cfg["slippage"])
+        event.update({"action": "reduce_only_ioc", "side": "buy" if is_buy else "sell", "size": sz, "limitPx": px,
+                      "detectToSendMs": round((time.perf_counter() - t_detect) * 1000, 2)})
+        cloid = cloids.make_cloid("watchdog", event["event"], coin, event["ts"])
+        event["cloid"] = cloids.cloid_hex(cloid)
+        sent = create_orders._now_ms()
+        try:
+            event["result"] = self.exchange.order(coin, is_buy, sz, px, {"limit": {"tif": "Ioc"}}, reduce_only=True,
+                                                  cloid=cloid)
+        except Exception as e:
+            event["error"] = f"{type(e).__name__}: {e}"
+        event["ackMs"] = round((time.perf_counter() - t_detect) * 1000, 2)
+        create_orders._log_exec("watchdog_reduce", coin, is_buy, sz, mid, self.cfg["slippage"], event["ts"], sent,
+                                event.get("result", {"status": "err", "response": event.get("error")}),
+                                event["cloid"], reduce_only=True)
+        self._alert(event)
+        self.request_refresh()
+
+    def _alert(self, event: Dict[str, Any]) -> None:
+        _emit(event)
+        hook = os.getenv("HL_WATCHDOG_WEBHOOK")
+        if hook:
+            def _post():
+                try:
+                    import requests
+                    requests.post(hook, json=event, timeout=5)
+                except Exception as e:
+                    print(f"[watchdog] webhook failed: {e}", file=sys.stderr)
+            self._pool.submit(_post)
+
+    # ---- main loop ----
+    def run(self) -> None:
+        self.refresh()
+        self.info.subscribe({"type": "allMids"}, self.on_mids)
+        self.info.subscribe({"type": "userFills", "user": self.address}, self.request_refresh)
+        started = last_refresh = last_beat = time.time()
+        stale_reported = False
+        _emit({"event": "watchdog_started", "address": self.address, "config": self.cfg,
+               "leverageByCoin": self.state.leverage_by_coin() if self.state else {}})
+        while True:
+            triggered = self._refresh_evt.wait(timeout=1.0)
+            now = time.time()
+            if triggered or now - last_refresh >= self.cfg["refresh"]:
+                self._refresh_evt.clear()
+                try:
+                    self.refresh()
+                except Exception as e:
+                    print(f"[watchdog] refresh failed: {e}", file=sys.stderr)
+                last_refresh = now
+            if now - max(self._last_mids_at, started) > self.cfg["stale"]:
+                if not stale_reported:
+                    self._alert({"event": "mids_stream_stale", "ts": int(now * 1000)})
+                    stale_reported = True
+                try:
+                    self.evaluate(self.info.all_mids())  # REST fallback until the stream resumes
+                except Exception as e:
+                    print(f"[watchdog] all_mids fallback failed: {e}", file=sys.stderr)
+            else:
+                stale_reported = False
+            if self.cfg["heartbeat"] and now - last_beat >= self.cfg["heartbeat"]:
+                m = self.last_metrics
+                _emit({"event": "status", "ts": int(now * 1000), "equity": m.get("equity"),
+                       "marginRatio": m.get("marginRatio"), "liqDistance": m.get("liqDistance")})
+                last_beat = now
+
+
+def _apply_kv(pairs) -> None:
+    for raw in pairs:
+        if "=" not in raw:
+            continue
+        k, v = (x.strip() for x in raw.split("=", 1))
+        k = k.lower()
+        if k not in CONFIG:
+            continue
+        if isinstance(CONFIG[k], bool):
+            CONFIG[k] = v.lower() in ("1", "true", "yes", "y", "on")
+        else:
+            try:
+                CONFIG[k] = float(v)
+            except ValueError:
+                pass
+
+
+def main():
+    _apply_kv(sys.argv[1:])
+    address, info, exchange = create_orders._setup(skip_ws=False)
+    try:
+        Watchdog(address, info, exchange, CONFIG).run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        try:
+            info.disconnect_websocket()
+        except Exception:
+            pass
+
+
+if __name__ == "__main__":
+    profiling.run(main)
@@ -1,12 +1,18 @@
+import profiling  # first: --profile also times the imports below
 import os, sys, time, json, requests
-from decimal import Decimal, getcontext
+from decimal import Decimal, getcontext, ROUND_DOWN
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, List, Optional
 
 from dotenv import load_dotenv
 from web3 import Web3
 from eth_account import Account
 
+import codec
+import journal
+import nonces
+import rate_limiter
+
 getcontext().prec = 40
 load_dotenv(dotenv_path=Path(__file__).resolve().parents[2] / ".env")
 
@@ -18,6 +24,8 @@ CHAIN_ID = int(os.getenv("SIG_CHAIN_ID") or 42161)          # Arbitrum One (0xa4
 HL_NET   = (os.getenv("HL_NETWORK") or "Mainnet").strip()   # "Mainnet" | "Testnet"
 
 USDC_ARB = "0xaf88d065e77c8cC2239327C5EDb3A432268e5831"
+HL_MIN_WITHDRAW = Decimal("5")
+HL_WITHDRAW_FEE = Decimal("1")   # flat per withdraw3, deducted from the bridged amount
 ERC20_ABI = json.loads("""
 [
   {"inputs":[{"internalType":"address","name":"account","type":"address"}],"name":"balanceOf","outputs":[{"internalType":"uint256","name":"","type":"uint256"}],"stateMutability":"view","type":"function"},
@@ -32,42 +40,69 @@ def die(msg: str, code: int = 1):
 def mask_key(pk: str) -> str:
     return pk[:6] + "…" + pk[-4:] if pk and len(pk) >= 10 else "****"
 
-def post_info(payload: dict) -> dict:
+def post_info(payload: dict, schema=None):
+    """POST /info; with `schema` the body is decoded straight into that codec struct."""
+    rate_limiter.acquire(rate_limiter.request_weight("/info", payload))
     r = requests.post(INFO_URL, headers={"content-type": "application/json"}, json=payload, timeout=20)
+    if r.status_code == 429:
+        rate_limiter.note_throttled()
     try:
         r.raise_for_status()
     except requests.HTTPError as e:
         die(f"HL info HTTP error: {e}\nBody: {r.text}")
-    return r.json()
+    return codec.response(r, schema)
 
 def get_withdrawable(addr_hex: str) -> Decimal:
-    data = post_info({"type": "clearinghouseState", "user": addr_hex})
-    return Decimal(data.get("withdrawable", "0"))
+    data = post_info({"type": "clearinghouseState", "user": addr_hex}, codec.ClearinghouseState)
+    return Decimal(data.withdrawable or "0")
 
 def wait_for_arb_usdc_credit(w3: Web3, to_addr: str, amount_human: str,
-                             poll_ms: int = 6000, timeout_s: int = 900) -> None:
+                             poll_ms: int = 6000, timeout_s: int = 900,
+                             baseline: Optional[Decimal] = None) -> None:
+    pending = wait_for_arb_usdc_credits(w3, {to_addr: Decimal(str(amount_human))}, poll_ms=poll_ms,
+                                        timeout_s=timeout_s,
+                                        baselines={to_addr: baseline} if baseline is not None else None)
+    if pending:
+        die("Timed out waiting for Arbitrum USDC credit.", code=2)
+
+def wait_for_arb_usdc_credits(w3: Web3, expected: Dict[str, Decimal],
+                              poll_ms: int = 6000, timeout_s: int = 900,
+                              baselines: Optional[Dict[str, Decimal]] = None) -> List[str]:
+    """
+    One polling loop for every destination of a (batched) withdrawal.
+    `expected` maps destination -> gross withdraw3 amount sent to it.
+    `baselines` maps destination -> balance before the withdrawal (journal); read now if missing.
+    Returns the destinations still not credited at `timeout_s` (empty when all landed).
+    """
     usdc = w3.eth.contract(address=Web3.to_checksum_address(USDC_ARB), abi=ERC20_ABI)
     dec = usdc.functions.decimals().call()
-    to_addr_cs = Web3.to_checksum_address(to_addr)
-
-    start = Decimal(usdc.functions.balanceOf(to_addr_cs).call()) / (10 ** dec)
-    target = Decimal(str(amount_human))
-    expected_net = target - Decimal("1")   # HL ~ $1 fee
-    if expected_net < 0:
-        expected_net = Decimal(0)
-    min_delta = expected_net * Decimal("0.98")
+    known = {Web3.to_checksum_address(a): Decimal(str(v)) for a, v in (baselines or {}).items() if v is not None}
+
+    pending = {}
+    for to_addr, gross in expected.items():
+        to_addr_cs = Web3.to_checksum_address(to_addr)
+        start = known.get(to_addr_cs)
+        if start is None:
+            start = Decimal(usdc.functions.balanceOf(to_addr_cs).call()) / (10 ** dec)
+        expected_net = Decimal(str(gross)) - HL_WITHDRAW_FEE   # HL ~ $1 fee
+        if expected_net < 0:
+            expected_net = Decimal(0)
+        pending[to_addr_cs] = (start, expected_net * Decimal("0.98"))
+        print(f"Arbitrum USDC before ({to_addr_cs}): {start}")
 
     t0 = time.time()
-    print(f"Arbitrum USDC before: {start}")
     while time.time() - t0 < timeout_s:
-        bal = Decimal(usdc.functions.balanceOf(to_addr_cs).call()) / (10 ** dec)
-        d = bal - start
-        print(f"Arbitrum USDC now: {bal} (Δ {d})")
-        if d >= min_delta:
+        for to_addr_cs, (start, min_delta) in list(pending.items()):
+            bal = Decimal(usdc.functions.balanceOf(to_addr_cs).call()) / (10 ** dec)
+            d = bal - start
+            print(f"Arbitrum USDC now ({to_addr_cs}): {bal} (Δ {d})")
+            if d >= min_delta:
+                pending.pop(to_addr_cs)
+        if not pending:
             print("🎉 Withdrawal credited on Arbitrum.")
-            return
+            return []
         time.sleep(poll_ms / 1000)
-    die("Timed out waiting for Arbitrum USDC credit.", code=2)
+    return list(pending)
 
 # ---------- Build & sign EIP-712 exactly as HL expects ----------
 def build_typed_withdraw(hyperliquid_chain: str, destination: str, amount_str: str, now_ms: int, signature_chain_id: int) -> dict:
@@ -142,22 +177,34 @@ def recover_signer(typed: dict, r_int: int, s_int: int, v_int: int) -> str:
 def to_hex32(x: int) -> str:
     return "0x" + x.to_bytes(32, "big").hex()
 
-def initiate_hl_withdraw(pk_hex: str, signer_addr: str, dest_addr: str, amount_usdc: str,
-                         signature_chain_id: int, hyperliquid_chain: str):
+def _next_nonce_ms(signer: Optional[str] = None) -> int:
+    """Millisecond nonce, strictly increasing per signer across every process on the host (nonces.py)."""
+    return nonces.next_nonce(signer)
+
+def check_withdrawable(signer_addr: str, amount_usdc: str) -> Decimal:
     # Check withdrawable for the signer (HL recovers signer from the signature)
     w = get_withdrawable(signer_addr)
     print(f"  HL withdrawable (USDC) for signer {signer_addr}: {w}")
     amt = Decimal(amount_usdc)
-    if amt < Decimal("5"):
+    if amt < HL_MIN_WITHDRAW:
         die("Amount must be >= 5 USDC (HL min).")
     if w < amt * Decimal("0.98"):
         die("Insufficient withdrawable on HL for this amount (allowing ~2% tolerance).")
+    return w
+
+def initiate_hl_withdraw(pk_hex: str, signer_addr: str, dest_addr: str, amount_usdc: str,
+                         signature_chain_id: int, hyperliquid_chain: str):
+    check_withdrawable(signer_addr, amount_usdc)
+    return send_withdraw3(pk_hex, signer_addr, dest_addr, amount_usdc, signature_chain_id, hyperliquid_chain)
 
-    now_ms = int(time.time() * 1000)
+def sign_withdraw3(pk_hex: str, signer_addr: str, dest_addr: str, amount_usdc: str,
+                   signature_chain_id: int, hyperliquid_chain: str) -> dict:
+    """Signed withdraw3 /exchange payload (nonce = time). Journaled before it is sent."""
+    now_ms = _next_nonce_ms(signer_addr)
     typed = build_typed_withdraw(hyperliquid_chain, dest_addr, amount_usdc, now_ms, signature_chain_id)
 
     print("→ EIP-712 typed message to sign:")
-    print(json.dumps(typed, indent=2))
+    print(codec.dumps(typed))
 
     r_int, s_int, v_int = sign_typed(pk_hex, typed)
     recovered = recover_signer(typed, r_int, s_int, v_int)
@@ -166,7 +213,7 @@ def initiate_hl_withdraw(pk_hex: str, signer_addr: str, dest_addr: str, amount_u
         die(f"Recovered signer {recovered} != provided signer {signer_addr}. "
             "This means the domain/type/message don’t match HL’s schema.")
 
-    payload = {
+    return {
         "action": {
             "type": "withdraw3",
             "hyperliquidChain": hyperliquid_chain,         # "Mainnet" | "Testnet"
@@ -179,16 +226,255 @@ def initiate_hl_withdraw(pk_hex: str, signer_addr: str, dest_addr: str, amount_u
         "signature": {"r": to_hex32(r_int), "s": to_hex32(s_int), "v": v_int}
     }
 
+def post_withdraw3(payload: dict) -> dict:
+    """
+    POST a signed withdraw3. Re-posting the same payload is safe: HL accepts a nonce once.
+    HTTP / transport errors raise (the caller decides whether the withdraw may have gone through).
+    """
     print("→ POST /exchange withdraw3 payload:")
     printable = {**payload, "signature": {**payload["signature"], "r": payload["signature"]["r"][:10]+"…", "s": payload["signature"]["s"][:10]+"…"}}
-    print(json.dumps(printable, indent=2))
+    print(codec.dumps(printable))
 
+    rate_limiter.acquire(rate_limiter.request_weight("/exchange", payload))
     r = requests.post(EXCHANGE_URL, headers={"content-type": "application/json"}, json=payload, timeout=30)
+    if r.status_code == 429:
+        rate_limiter.note_throttled()
     try:
         r.raise_for_status()
     except requests.HTTPError as e:
-        die(f"HL exchange HTTP error: {e}\nBody: {r.text}")
-    print("✅ Exchange responded:", r.json())
+        raise RuntimeError(f"HL exchange HTTP error: {e}\nBody: {r.text}") from None
+    resp = codec.response(r)
+    print("✅ Exchange responded:", resp)
+    return resp
+
+def send_withdraw3(pk_hex: str, signer_addr: str, dest_addr: str, amount_usdc: str,
+                   signature_chain_id: int, hyperliquid_chain: str) -> dict:
+    """Sign and POST one withdraw3 action. Returns the exchange JSON response."""
+    return post_withdraw3(sign_withdraw3(pk_hex, signer_addr, dest_addr, amount_usdc, signature_chain_id,
+                                         hyperliquid_chain))
+
+def withdraw_in_ledger(addr_hex: str, nonce: int, start_ms: int) -> bool:
+    """True if HL's ledger has the withdraw3 with this nonce (i.e. an earlier POST went through)."""
+    rows = post_info({"type": "userNonFundingLedgerUpdates", "user": addr_hex, "startTime": int(start_ms)},
+                     codec.LedgerUpdates)
+    return any(row.delta is not None and row.delta.type == "withdraw" and row.delta.nonce == int(nonce)
+               for row in rows or [])
+
+def _journaled_post(flow, payload: dict, signer_addr: str) -> dict:
+    """POST (or re-POST after a crash) and resolve an ambiguous answer from the ledger."""
+    resp = post_withdraw3(payload)
+    if not (isinstance(resp, dict) and resp.get("status") == "ok") and flow.resumed \
+            and withdraw_in_ledger(signer_addr, payload["nonce"], payload["nonce"] - 60_000):
+        print("  ↻ withdraw3 with this nonce already executed before the restart")
+        resp = {"status": "ok", "recoveredFromLedger": True}
+    return resp
+
+def arb_usdc_balances(w3: Web3, addrs: List[str]) -> Dict[str, Decimal]:
+    usdc = w3.eth.contract(address=Web3.to_checksum_address(USDC_ARB), abi=ERC20_ABI)
+    dec = usdc.functions.decimals().call()
+    return {Web3.to_checksum_address(a): Decimal(usdc.functions.balanceOf(Web3.to_checksum_address(a)).call()) / (10 ** dec)
+            for a in addrs}
+
+# ---------- Batch mode: net many queued requests into few withdraw3 actions ----------
+def _fmt_usdc(x: Decimal) -> str:
+    q = x.quantize(Decimal("0.000001"), rounding=ROUND_DOWN)
+    return format(q.normalize(), "f")
+
+def parse_batch_spec(spec: str) -> List[dict]:
+    """
+    "id:amount[@dest],..." -> [{"id", "amount", "dest"}]. The id is optional
+    ("25,40@0xabc" gets ids "0", "1").
+    """
+    out = []
+    for i, item in enumerate(x.strip() for x in spec.split(",")):
+        if not item:
+            continue
+        dest = None
+        if "@" in item:
+            item, dest = item.split("@", 1)
+        rid, amt = item.split(":", 1) if ":" in item else (str(i), item)
+        out.append({"id": rid.strip(), "amount": amt.strip(), "dest": dest.strip() if dest else None})
+    return out
+
+def load_batch_file(path: str) -> List[dict]:
+    """JSON list of {"id", "amount", "dest"?} (e.g. pending withdraw requests exported by the keeper)."""
+    p = Path(path)
+    if not p.exists():
+        die(f"Batch file not found: {p}")
+    rows = json.loads(p.read_text())
+    return [{"id": str(r.get("id", i)), "amount": str(r["amount"]), "dest": r.get("dest")}
+            for i, r in enumerate(rows)]
+
+def plan_batch(requests_in: List[dict], withdrawable: Decimal, default_dest: str) -> dict:
+    """
+    Net requests per destination into one withdraw3 each.
+      - requests are admitted FIFO while the running total fits `withdrawable`
+      - a destination whose total is below the HL minimum is deferred
+      - the $1 fee of each withdraw3 is shared pro-rata by the requests in it
+    """
+    allocations = []
+    groups: Dict[str, dict] = {}
+    budget = withdrawable
+
+    # destinations that can never reach the HL minimum don't consume budget
+    dest_totals: Dict[str, Decimal] = {}
+    for rq in requests_in:
+        amt = Decimal(str(rq["amount"]))
+        if amt > 0:
+            dest = (rq.get("dest") or default_dest).lower()
+            dest_totals[dest] = dest_totals.get(dest, Decimal(0)) + amt
+
+    for rq in requests_in:
+        amt = Decimal(str(rq["amount"]))
+        dest = (rq.get("dest") or default_dest).lower()
+        row = {"id": rq["id"], "amount": str(amt), "dest": dest}
+        if amt <= 0:
+            row["status"] = "rejected_non_positive"
+        elif dest_totals.get(dest, Decimal(0)) < HL_MIN_WITHDRAW:
+            row["status"] = "deferred_below_hl_min"
+        elif amt > budget:
+            row["status"] = "deferred_insufficient_withdrawable"
+        else:
+            budget -= amt
+            g = groups.setdefault(dest, {"dest": dest, "total": Decimal(0), "ids": []})
+            g["total"] += amt
+            g["ids"].append(rq["id"])
+            row["status"] = "planned"
+        allocations.append(row)
+
+    for dest, g in list(groups.items()):
+        if g["total"] < HL_MIN_WITHDRAW:
+            for row in allocations:
+                if row["dest"] == dest and row["status"] == "planned":
+                    row["status"] = "deferred_below_hl_min"
+            groups.pop(dest)
+            continue
+        for row in allocations:
+            if row["dest"] == dest and row["status"] == "planned":
+                share = Decimal(row["amount"]) / g["total"]
+                row["feeShare"] = _fmt_usdc(HL_WITHDRAW_FEE * share)
+                row["net"] = _fmt_usdc(Decimal(row["amount"]) - HL_WITHDRAW_FEE * share)
+    return {"groups": list(groups.values()), "allocations": allocations}
+
+def _batch_group(flow, g: dict, pk_hex: str, signer_addr: str, signature_chain_id: int,
+                 hyperliquid_chain: str) -> dict:
+    """
+    Sign (once, journaled before the POST) and send one group's withdraw3.
+    Returns {"status": "sent"|"err", "response", "nonce"}. An answer that isn't
+    "ok" is checked against the HL ledger: a timeout, or a re-post after a
+    restart, may already have gone through.
+    """
+    payload = (flow.get("payloads") or {}).get(g["dest"])
+    try:
+        if payload is None:
+            payload = sign_withdraw3(pk_hex, signer_addr, g["dest"], g["total"], signature_chain_id,
+                                     hyperliquid_chain)
+            flow.save(payloads={**(flow.get("payloads") or {}), g["dest"]: payload})
+        else:
+            print(f"  ↻ re-posting the journaled withdraw3 (nonce {payload['nonce']})")
+        resp = post_withdraw3(payload)
+    except (Exception, SystemExit) as e:        # die() in signing exits: record it, keep going
+        resp = {"status": "err", "error": f"{type(e).__name__}: {e}"}
+        print(f"❌ withdraw3 → {g['dest']} failed: {resp['error']}")
+    status = "sent" if isinstance(resp, dict) and resp.get("status") == "ok" else "err"
+    if status == "err" and payload is not None:
+        try:
+            if withdraw_in_ledger(signer_addr, payload["nonce"], payload["nonce"] - 60_000):
+                print("  ↻ withdraw3 with this nonce is in the HL ledger")
+                status = "sent"
+                resp = {**resp, "recoveredFromLedger": True} if isinstance(resp, dict) else \
+                    {"status": "ok", "recoveredFromLedger": True}
+        except (Exception, SystemExit) as le:     # post_info exits on HTTP errors
+            resp = {**resp, "ledgerCheck": f"{type(le).__name__}: {le}"} if isinstance(resp, dict) else resp
+    return {"status": status, "response": resp, "nonce": payload["nonce"] if payload is not None else None}
+
+def run_batch(pk_hex: str, signer_addr: str, requests_in: List[dict], default_dest: str,
+              signature_chain_id: int, hyperliquid_chain: str, no_wait: bool, job: Optional[str] = None) -> dict:
+    """
+    Plan, send one withdraw3 per destination, optionally wait for the credits.
+    Journaled under `job` (kind "withdraw_batch") like single mode: the plan and
+    baselines first, then each group's signed payload before it is posted and
+    its outcome after. A restarted job keeps the journaled plan (not a new one
+    from the by-then lower withdrawable), skips groups with an outcome, and
+    re-posts the stored payload of any group without one (same nonce, so it
+    can't pay twice).
+    The per-request allocations are always printed as the last stdout line, also
+    when a step fails or exits half-way: requests already paid out must never be
+    re-queued by the keeper.
+      sent / credited   withdraw3 accepted (credited: landed on Arbitrum)
+      credit_pending    accepted, credit not seen before the wait timed out
+      err               not sent (rejected, or an error and not in the HL ledger)
+      planned           not attempted (an earlier step exited)
+    The exit code is 0 once the plan exists; the statuses say what happened.
+    """
+    result: Dict[str, Any] = {"action": "withdraw_batch", "withdrawActions": 0, "credited": None,
+                              "groups": [], "allocations": []}
+    try:
+        flow = journal.begin("withdraw_batch", job, requests=requests_in, dest=default_dest, signer=signer_addr)
+        result["job"] = flow.job
+        if flow.phase == "done":
+            print(f"✅ Job {flow.job} already completed.")
+            result = flow.get("result") or result
+            return result
+        if flow.resumed:
+            print(f"↻ Resuming job {flow.job} after phase '{flow.phase}'")
+
+        w3 = Web3(Web3.HTTPProvider(ARB_RPC, request_kwargs={"timeout": 30})) if ARB_RPC and not no_wait else None
+        if not flow.reached("planned"):
+            w = get_withdrawable(signer_addr)
+            print(f"  HL withdrawable (USDC) for signer {signer_addr}: {w}")
+            plan = plan_batch(requests_in, w, default_dest)
+            for g in plan["groups"]:
+                g["total"] = _fmt_usdc(g["total"])
+            baselines: Dict[str, Decimal] = {}
+            if w3 is not None and plan["groups"]:
+                try:                            # before sending, so a fast credit isn't in the baseline
+                    baselines = arb_usdc_balances(w3, [g["dest"] for g in plan["groups"]])
+                except Exception as e:
+                    print(f"⚠ Arbitrum baseline read failed ({e}); reading it after the sends")
+            flow.mark("planned", plan=plan, withdrawable=str(w), baselines={k: str(v) for k, v in baselines.items()})
+        plan = json.loads(json.dumps(flow.get("plan")))     # a copy: statuses below are derived per run
+        baselines = {k: Decimal(v) for k, v in (flow.get("baselines") or {}).items()}
+        result.update({"withdrawable": flow.get("withdrawable"), **plan})
+
+        sent: Dict[str, Decimal] = {}
+        for g in plan["groups"]:
+            out = (flow.get("outcomes") or {}).get(g["dest"])
+            if out is None or out["status"] != "sent":     # a resumed job retries unsent groups (safe: same payload)
+                print(f"▶ withdraw3 {g['total']} USDC → {g['dest']} (requests: {', '.join(g['ids'])})")
+                out = _batch_group(flow, g, pk_hex, signer_addr, signature_chain_id, hyperliquid_chain)
+                flow.save(outcomes={**(flow.get("outcomes") or {}), g["dest"]: out})
+            g["response"] = out["response"]
+            if out["nonce"] is not None:
+                g["nonce"] = out["nonce"]
+            for row in plan["allocations"]:
+                if row["dest"] == g["dest"] and row["status"] == "planned":
+                    row["status"] = out["status"]
+            if out["status"] == "sent":
+                sent[g["dest"]] = Decimal(g["total"])
+            result["withdrawActions"] = len(sent)
+        if not flow.reached("sent"):
+            flow.mark("sent")
+
+        if sent and w3 is not None:
+            if flow.reached("credited"):
+                pending = set(flow.get("pending") or [])
+            else:
+                print(f"⏳ Waiting for Arbitrum USDC credit ({len(sent)} destination(s))…")
+                pending = {d.lower() for d in wait_for_arb_usdc_credits(
+                    w3, sent, poll_ms=6000, timeout_s=900,
+                    baselines={d: baselines.get(Web3.to_checksum_address(d)) for d in sent})}
+                flow.mark("credited", pending=sorted(pending))
+            result["credited"] = not pending
+            for row in plan["allocations"]:
+                if row["status"] == "sent":
+                    row["status"] = "credit_pending" if row["dest"].lower() in pending else "credited"
+            if pending:
+                print(f"⚠ Credit not seen yet for {len(pending)} destination(s); the withdraw3s were accepted")
+        flow.mark("done", result=result)
+    finally:
+        print(codec.dumps(result, pretty=False))   # last line: per-request allocations for the keeper
+    return result
 
 def load_config(path: Optional[str]) -> dict:
     if not path:
@@ -200,16 +486,29 @@ def load_config(path: Optional[str]) -> dict:
     return json.loads(p.read_text())
 
 def main():
-    # Usage: python withdraw_hl.py <amountUSDC> [--pk 0x...] [--dest 0x...] [--config path.json] [--no-wait] [--testnet]
-    if len(sys.argv) < 2:
-        die("Usage: python withdraw_hl.py <amountUSDC> [--pk 0x...] [--dest 0x...] [--config path.json] [--no-wait] [--testnet]")
-
-    amount_human = sys.argv[1]
+    # Usage: python withdraw_hl.py <amountUSDC> [--pk 0x...] [--dest 0x...] [--config path.json] [--no-wait] [--testnet] [--job ID]
+    #        python withdraw_hl.py --batch "id:amount[@dest],..." | --batch-file reqs.json  [same flags, incl. --job ID]
+    batch_spec = None
+    batch_file = None
+    if "--batch" in sys.argv:
+        try: batch_spec = sys.argv[sys.argv.index("--batch") + 1]
+        except Exception: die("Provide a value after --batch")
+    if "--batch-file" in sys.argv:
+        try: batch_file = sys.argv[sys.argv.index("--batch-file") + 1]
+        except Exception: die("Provide a value after --batch-file")
+    is_batch = batch_spec is not None or batch_file is not None
+
+    if len(sys.argv) < 2 or (not is_batch and sys.argv[1].startswith("--")):
+        die("Usage: python withdraw_hl.py <amountUSDC> [--pk 0x...] [--dest 0x...] [--config path.json] [--no-wait] [--testnet] [--job ID]\n"
+            "       python withdraw_hl.py --batch \"id:amount[@dest],...\" | --batch-file reqs.json [flags] [--job ID]")
+
+    amount_human = None if is_batch else sys.argv[1]
     pk_cli = None
     dest_cli = None
     cfg_path = None
     no_wait = "--no-wait" in sys.argv
     is_testnet = "--testnet" in sys.argv
+    job = journal.job_from_args(sys.argv)
 
     if "--pk" in sys.argv:
         try: pk_cli = sys.argv[sys.argv.index("--pk") + 1]
@@ -234,7 +533,7 @@ def main():
     expected = (os.getenv("USER") or cfg_addr or signer_addr).lower()
 
     print("▶ Hyperliquid USDC withdraw starting…")
-    print(f"  Amount: {amount_human} USDC")
+    print(f"  Amount: {amount_human if not is_batch else 'batch'} USDC")
     print(f"  PK: {mask_key(PK)}")
     print(f"  Signer (derived from PK): {signer_addr}")
     if cfg_addr:
@@ -254,24 +553,63 @@ def main():
     print(f"  Destination (Arbitrum EOA): {dest_addr}")
     print(f"  Network: {net_label}")
 
+    if is_batch:
+        reqs = parse_batch_spec(batch_spec) if batch_spec is not None else load_batch_file(batch_file)
+        if not reqs:
+            die("Batch is empty.")
+        if not no_wait and not ARB_RPC:
+            print("⚠ ARB_RPC not set; cannot wait for on-chain credit. Exiting after HL request.")
+        run_batch(PK, signer_addr, reqs, dest_addr, signature_chain_id, net_label, no_wait, job)
+        return
+
+    flow = journal.begin("withdraw", job, amount=amount_human, dest=dest_addr, signer=signer_addr)
+    if flow.resumed:
+        print(f"↻ Resuming job {flow.job} after phase '{flow.phase}'")
+    if flow.phase == "done":
+        print("✅ Already completed.")
+        return
+
+    # Sign once and journal the payload: a restart re-posts it (same nonce), never a second withdraw3
+    if not flow.reached("signed"):
+        check_withdrawable(signer_addr, amount_human)
+        baseline = None
+        if ARB_RPC and not no_wait:
+            w3 = Web3(Web3.HTTPProvider(ARB_RPC, request_kwargs={"timeout": 30}))
+            baseline = arb_usdc_balances(w3, [dest_addr])[Web3.to_checksum_address(dest_addr)]
+        payload = sign_withdraw3(PK, signer_addr, dest_addr, amount_human, signature_chain_id, net_label)
+        flow.mark("signed", payload=payload, nonce=payload["nonce"],
+                  baseline=str(baseline) if baseline is not None else None)
+
     # Kick off HL withdrawal
-    initiate_hl_withdraw(PK, signer_addr, dest_addr, amount_human, signature_chain_id, net_label)
+    if not flow.reached("sent"):
+        resp = _journaled_post(flow, flow.get("payload"), signer_addr)
+        if not (isinstance(resp, dict) and resp.get("status") == "ok"):
+            flow.mark("failed", response=resp)
+            die(f"withdraw3 rejected: {resp}")
+        flow.mark("sent", response=resp)
 
     # Optional on-chain credit wait
     if no_wait:
+        flow.mark("done")
         print("✅ Withdrawal requested. Skipping on-chain credit wait (--no-wait).")
         return
     if not ARB_RPC:
+        flow.mark("done")
         print("⚠ ARB_RPC not set; cannot wait for on-chain credit. Exiting after HL request.")
         return
 
-    w3 = Web3(Web3.HTTPProvider(ARB_RPC, request_kwargs={"timeout": 30}))
-    print("⏳ Waiting for Arbitrum USDC credit…")
-    wait_for_arb_usdc_credit(w3, dest_addr, amount_human, poll_ms=6000, timeout_s=900)
+    if not flow.reached("credited"):
+        w3 = Web3(Web3.HTTPProvider(ARB_RPC, request_kwargs={"timeout": 30}))
+        print("⏳ Waiting for Arbitrum USDC credit…")
+        baseline = flow.get("baseline")
+        wait_for_arb_usdc_credit(w3, dest_addr, amount_human, poll_ms=6000, timeout_s=900,
+                                 baseline=Decimal(baseline) if baseline is not None else None)
+        flow.mark("credited")
+    flow.mark("done")
     print("🎉 Done.")
 
 if __name__ == "__main__":
     try:
-        main()
+        profiling.run(main)
     except Exception as e:
         die(str(e))